@@ -1,12 +1,10 @@
+import functools
+import io
+import logging
 import os
 import time
-from datetime import datetime
-import unicodedata
+from datetime import date, datetime
 import streamlit as st
-import pandas as pd
-from io import BytesIO
-import plotly.express as px
-from PIL import Image
 
 # =========================================
 #  Carga opcional de .env (solo desarrollo)
@@ -129,243 +127,372 @@ with st.sidebar:
         st.session_state.clear()
         st.rerun()
 
+# =========================
+#  IMPORTACIONES DIFERIDAS
+# =========================
+# pandas, Plotly y el paquete `murc` se cargan recién después del login: la
+# pantalla de acceso no los espera. Python los importa una vez por proceso;
+# en las ejecuciones siguientes estas líneas solo los toman de sys.modules.
+t_importaciones = time.perf_counter()
+import pandas as pd
+import plotly.express as px
+
+from murc.cache import RUTA_CACHE, CacheEtapas, procesar_con_cache
+from murc.compacto import memoria_sesion
+from murc.cubo import CuboAgregado, nivel_cvss
+from murc.diferencias import NUEVA, PERSISTENTE, REMEDIADA, comparar
+from murc.exportar import FORMATOS, CacheExportaciones, clave_exportacion, formatos_disponibles
+from murc.filtros import IndiceFiltros
+from murc.graficos import celdas_seleccionadas, dispersion, filas_del_bin
+from murc.historial import RUTA_HISTORIAL, HistorialMURC
+from murc.inteligencia import RUTA_INTELIGENCIA, IndiceInteligencia
+from murc.lotes import nombres_unicos, puntuar_lote
+from murc.metricas import MedicionEtapa, Metricas, medir, registrando
+from murc.motor import puntuar_libro
+from murc.nucleo import ORDEN_NIVEL, PERFIL_MURC, PerfilPuntuacion
+from murc.perfiles import Sensibilidad, cargar_perfiles, rejilla_perfiles, repuntuar, validar
+from murc.ranking import cursor_de, top_k, top_k_por_grupo
+from murc.tabla import TAMANOS_PAGINA, TablaPaginada
+segundos_importaciones = time.perf_counter() - t_importaciones
+
 # =========================
 #   ENCABEZADO CON LOGO
 # =========================
+@st.cache_resource(show_spinner=False)
+def logo(ruta: str = "logo_murc.png", lado: int = 280) -> bytes:
+    # El PNG original (1024 px, ~900 KB) se reduce una vez por proceso al doble del ancho mostrado.
+    from PIL import Image
+    with Image.open(ruta) as img:
+        img.thumbnail((lado, lado))
+        salida = io.BytesIO()
+        img.save(salida, format="PNG", optimize=True)
+    return salida.getvalue()
+
 def header():
     try:
-        logo = Image.open("logo_murc.png")
+        imagen = logo()
         st.markdown('<div class="murc-header">', unsafe_allow_html=True)
-        st.image(logo, width=140)
+        st.image(imagen, width=140)
         st.markdown("<h2>Modelo Unificado de Riesgo Cibernético (MURC)</h2>", unsafe_allow_html=True)
         st.markdown('</div>', unsafe_allow_html=True)
     except Exception:
         st.markdown("## Modelo Unificado de Riesgo Cibernético (MURC)")
 
-header()
+# Arranque de la sesión: importaciones diferidas y encabezado (se guarda la primera ejecución).
+arranque = Metricas("arranque")
+arranque.agregar(MedicionEtapa("importaciones", segundos=segundos_importaciones))
+with arranque.etapa("encabezado"):
+    header()
+if "metricas_arranque" not in st.session_state:
+    arranque.escribir()
+    st.session_state["metricas_arranque"] = arranque
 # 👇 aquí cambié el texto
 st.markdown('<span class="badge-conf">Versión académica — Prototipo MURC</span>', unsafe_allow_html=True)
 st.write("Sube tu archivo Excel con las hojas: `Escaneo`, `CVSSF` y `Criticidad_Activos`.")
 
 # =========================
-#   HELPERS
+#   FUNCIONES DE NEGOCIO
 # =========================
-def _norm(s: str) -> str:
-    if s is None: return ""
-    s = str(s)
-    s = unicodedata.normalize("NFKD", s).encode("ascii", "ignore").decode("ascii")
-    return s.strip().lower().replace(" ", "").replace("-", "").replace("_", "")
-
-def _to_num(series: pd.Series) -> pd.Series:
-    return pd.to_numeric(series.astype("string").str.replace(",", ".", regex=False), errors="coerce")
-
-def _match_col(headers, aliases):
-    norm_map = { _norm(h): h for h in headers }
-    for alias in aliases:
-        a = _norm(alias)
-        if a in norm_map:
-            return norm_map[a]
-        for k, real in norm_map.items():
-            if a in k:
-                return real
-    return None
+# La lógica de cálculo vive en el paquete `murc` (compartida con la CLI).
+@st.cache_resource(show_spinner=False)
+def cache_etapas() -> CacheEtapas:
+    # Compartida entre sesiones: cada hoja se guarda bajo la huella de su contenido y cada
+    # archivo bajo su SHA-256. Memoria acotada por tamaño y, con MURC_CACHE, nivel en disco
+    # compartido con los demás procesos.
+    return CacheEtapas(directorio=RUTA_CACHE or None)
+
+# Resultado compacto (claves como categorías, puntajes float32, nivel int8): menos memoria por sesión.
+COMPACTO = os.getenv("MURC_COMPACTO", "1") == "1"
+
+@st.cache_resource(show_spinner=False)
+def indice_inteligencia(ruta: str, modificado: float) -> IndiceInteligencia:
+    # Índice de NVD/EPSS/KEV abierto con memmap y compartido entre sesiones;
+    # al recompilarlo cambia la fecha de modificación y se vuelve a abrir.
+    return IndiceInteligencia(ruta)
+
+def inteligencia():
+    # Si existe el índice (MURC_INTELIGENCIA), completa CVSS/CVSSF vacíos del libro.
+    if not os.path.exists(RUTA_INTELIGENCIA):
+        return None
+    return indice_inteligencia(RUTA_INTELIGENCIA, os.path.getmtime(RUTA_INTELIGENCIA))
+
+def procesar_archivo_bytes(data_bytes: bytes):
+    # Lectura por hoja (solo las hojas cuyo contenido cambió), unión y cálculo de riesgo.
+    # Devuelve (resultado, eventos de caché por etapa, clave del resultado).
+    return procesar_con_cache(data_bytes, cache_etapas(), compacto=COMPACTO, inteligencia=inteligencia())
+
+# Panel de diagnóstico (tiempos, filas y memoria por etapa) solo para administración.
+DIAGNOSTICO = os.getenv("MURC_DIAGNOSTICO", "0") == "1"
+
+@st.cache_resource(show_spinner=False)
+def historial() -> HistorialMURC:
+    # Histórico SQLite en disco (MURC_HISTORIAL), compartido entre sesiones.
+    return HistorialMURC(RUTA_HISTORIAL)
+
+@st.cache_resource(show_spinner=False)
+def cache_exportaciones() -> CacheExportaciones:
+    # Archivos ya exportados por estado de filtros, compartidos entre sesiones.
+    return CacheExportaciones()
+
+COLORES_NIVEL = {
+    "BAJO": "#2ca02c", "MEDIO": "#ff7f0e",
+    "ALTO": "#d62728", "CRÍTICO": "#8b0000",
+    "SIN DATO": "#808080"
+}
+COLORES_CRITIC = {
+    "Bajo": "#2ca02c", "Medio": "#ff7f0e",
+    "Alto": "#d62728", "Critico": "#8b0000",
+    "Sin dato": "#808080"
+}
 
 # =========================
-#   FUNCIONES DE NEGOCIO
+#   SECCIONES (FRAGMENTOS)
 # =========================
-@st.cache_data(show_spinner=False)
-def procesar_archivo_bytes(data_bytes: bytes) -> pd.DataFrame:
-    xls = pd.ExcelFile(BytesIO(data_bytes), engine="openpyxl")
-
-    # ---- Hoja Escaneo ----
-    esc_hdr = pd.read_excel(xls, sheet_name="Escaneo", nrows=0).columns
-    id_e  = _match_col(esc_hdr, ["Identificador","ID","Id_vuln","CVE","CVE_ID"])
-    act_e = _match_col(esc_hdr, ["Activo","Asset","Equipo","Hostname","Sistema"])
-    if not id_e or not act_e:
-        raise ValueError(f"No encuentro columnas de Identificador/Activo en hoja Escaneo. Encabezados: {list(esc_hdr)}")
-
-    escaneo_df = pd.read_excel(
-        xls, sheet_name="Escaneo",
-        usecols=[id_e, act_e],
-        dtype={id_e:"string", act_e:"string"}
-    ).rename(columns={id_e:"Identificador", act_e:"Activo"})
-    escaneo_df["Identificador"] = escaneo_df["Identificador"].str.strip().str.upper()
-    escaneo_df["Activo"]        = escaneo_df["Activo"].str.strip().str.upper()
-
-    # ---- Hoja CVSSF ----
-    cv_hdr = pd.read_excel(xls, sheet_name="CVSSF", nrows=0).columns
-    id_c   = _match_col(cv_hdr, ["Identificador","ID","Id_vuln","CVE","CVE_ID"])
-    cvss_c = _match_col(cv_hdr, ["CVSS","CVSS_Base","cvssscore"])
-    cvssf_c= _match_col(cv_hdr, ["CVSSF","KEV","Exploitability","Threat_Score"])
-    if not id_c or not cvss_c or not cvssf_c:
-        raise ValueError(f"No encuentro Identificador/CVSS/CVSSF en hoja CVSSF. Encabezados: {list(cv_hdr)}")
-
-    cvssf_df = pd.read_excel(
-        xls, sheet_name="CVSSF",
-        usecols=[id_c, cvss_c, cvssf_c],
-        dtype={id_c:"string"}
-    ).rename(columns={id_c:"Identificador", cvss_c:"CVSS", cvssf_c:"CVSSF"})
-    cvssf_df["Identificador"] = cvssf_df["Identificador"].str.strip().str.upper()
-    cvssf_df["CVSS"]  = _to_num(cvssf_df["CVSS"])
-    cvssf_df["CVSSF"] = _to_num(cvssf_df["CVSSF"])
-
-    # ---- Hoja Criticidad_Activos ----
-    cr_hdr = pd.read_excel(xls, sheet_name="Criticidad_Activos", nrows=0).columns
-    act_cr  = _match_col(cr_hdr, ["Activo","Asset","Equipo","Hostname","Sistema"])
-    crit_cr = _match_col(cr_hdr, ["Criticidad","Criticidad_Activo","Clasificacion","Criticality"])
-    if not act_cr or not crit_cr:
-        raise ValueError(
-            "Usecols no coincide con las columnas, columnas esperadas pero no encontradas: "
-            "['Activo','Criticidad'] (hoja: Criticidad_Activos). "
-            f"Encabezados detectados: {list(cr_hdr)}"
-        )
-
-    criticidad_df = pd.read_excel(
-        xls, sheet_name="Criticidad_Activos",
-        usecols=[act_cr, crit_cr],
-        dtype={act_cr:"string", crit_cr:"string"}
-    ).rename(columns={act_cr:"Activo", crit_cr:"Criticidad"})
-    criticidad_df["Activo"]     = criticidad_df["Activo"].str.strip().str.upper()
-    criticidad_df["Criticidad"] = criticidad_df["Criticidad"].astype("string").str.strip().str.capitalize()
-
-    # ---- Uniones ----
-    df = escaneo_df.merge(cvssf_df, on="Identificador", how="left") \
-                   .merge(criticidad_df, on="Activo", how="left")
-
-    # ---- Cálculo de riesgo ----
-    mapa_criticidad = {"bajo":1, "medio":2, "alto":3, "critico":4, "crítico":4}
-    df["Criticidad_num"]  = df["Criticidad"].astype("string").str.lower().map(mapa_criticidad)
-    df["cvss_norm"]       = df["CVSS"] / 10
-    df["cvssf_norm"]      = df["CVSSF"] / 4096
-    df["criticidad_norm"] = df["Criticidad_num"] / 4
-
-    df["riesgo"] = (
-        0.5*df["cvss_norm"].fillna(0) +
-        0.3*df["cvssf_norm"].fillna(0) +
-        0.2*df["criticidad_norm"].fillna(0)
-    )
-
-    bins   = [-1, 0.25, 0.50, 0.75, float("inf")]
-    labels = ["BAJO","MEDIO","ALTO","CRÍTICO"]
-    df["Nivel de Exposición"] = pd.cut(df["riesgo"].fillna(-1), bins=bins, labels=labels).astype("string")
-    df["Nivel de Exposición"] = df["Nivel de Exposición"].fillna("SIN DATO")
-
-    columnas = ["Activo","Identificador","CVSS","CVSSF","Criticidad","riesgo","Nivel de Exposición"]
-    return df[columnas].drop_duplicates().reset_index(drop=True)
+# Cada sección es un st.fragment: al tocar uno de sus widgets se vuelve a
+# ejecutar solo esa sección (con las que tenga anidadas), no el script
+# completo. Los datos llegan como argumentos de la última ejecución completa.
+# Cada ejecución de una sección se mide por separado (MURC_METRICAS y panel
+# de diagnóstico).
+try:
+    from streamlit.runtime.scriptrunner_utils.exceptions import ScriptControlException
+    CONTROL_STREAMLIT = (ScriptControlException,)
+except ImportError:
+    # Versiones anteriores: st.rerun/st.stop lanzan estas excepciones (subclases de Exception en algunas).
+    from streamlit.runtime.scriptrunner import RerunException, StopException
+    CONTROL_STREAMLIT = (RerunException, StopException)
+
+def seccion(nombre: str):
+    def decorar(fn):
+        @st.fragment
+        @functools.wraps(fn)
+        def ejecutar(*args, **kwargs):
+            medidas = Metricas(f"seccion:{nombre}")
+            try:
+                with registrando(medidas), medidas.etapa(nombre):
+                    fn(*args, **kwargs)
+            except CONTROL_STREAMLIT:
+                # st.rerun / st.stop dentro de la sección: no son errores.
+                raise
+            except Exception as e:
+                logging.exception("Error en la sección %s", nombre)
+                st.error(f"❌ Error al procesar el archivo: {e}")
+            medidas.escribir()
+            st.session_state.setdefault("metricas_secciones", {})[nombre] = medidas
+        return ejecutar
+    return decorar
 
 # =========================
-#       INTERFAZ UI
+#   HELPERS DE INTERFAZ
 # =========================
-archivo_subido = st.file_uploader("Selecciona un archivo Excel", type=["xlsx"])
-
-if archivo_subido:
+def detalle_bins(evento, disp, df, x, y, color, columnas, max_filas=1000):
+    # Drill-down del modo agregado: filas de las celdas seleccionadas en el gráfico.
+    if disp.modo != "bins":
+        return
+    celdas = celdas_seleccionadas(evento)
+    if not celdas:
+        st.caption(f"Modo agregado ({len(df):,} puntos). Selecciona una o más celdas para ver sus filas.".replace(",", "."))
+        return
+    filas = pd.concat([filas_del_bin(df, x, y, color, disp.bordes, bx, by, v) for bx, by, v in celdas])
+    st.caption(f"{len(filas):,} filas en las celdas seleccionadas (se muestran hasta {max_filas:,}).".replace(",", "."))
+    st.dataframe(filas[columnas].head(max_filas), use_container_width=True, height=300)
+
+def selector_perfil() -> PerfilPuntuacion:
+    # Pesos, normalizador de CVSSF y umbrales: perfiles predefinidos (MURC_PERFILES) o uno propio.
+    perfiles = {p.nombre: p for p in cargar_perfiles()}
+    nombre = st.sidebar.selectbox("⚖️ Perfil de puntuación", list(perfiles) + ["Personalizado"])
+    if nombre != "Personalizado":
+        perfil = perfiles[nombre]
+        st.sidebar.caption(
+            f"Pesos {perfil.peso_cvss:g}/{perfil.peso_cvssf:g}/{perfil.peso_criticidad:g} · "
+            f"CVSSF/{perfil.max_cvssf:g} · umbrales {'/'.join(f'{u:g}' for u in perfil.umbrales)}"
+        )
+        return perfil
+    with st.sidebar.expander("Perfil personalizado", expanded=True):
+        w1 = st.number_input("Peso CVSS", 0.0, 1.0, PERFIL_MURC.peso_cvss, 0.05)
+        w2 = st.number_input("Peso CVSSF", 0.0, 1.0, PERFIL_MURC.peso_cvssf, 0.05)
+        w3 = st.number_input("Peso Criticidad", 0.0, 1.0, PERFIL_MURC.peso_criticidad, 0.05)
+        max_cvssf = st.number_input("Normalizador CVSSF", 1.0, value=float(PERFIL_MURC.max_cvssf), step=256.0)
+        umbrales = st.slider("Umbrales MEDIO / ALTO", 0.0, 1.0, PERFIL_MURC.umbrales[:2], 0.05)
+        critico = st.slider("Umbral CRÍTICO", umbrales[1], 1.0, max(PERFIL_MURC.umbrales[2], umbrales[1]), 0.05)
+    perfil = PerfilPuntuacion("Personalizado", w1, w2, w3, max_cvssf=max_cvssf, umbrales=(*umbrales, critico))
     try:
-        with st.spinner("Procesando archivo..."):
-            data_bytes = archivo_subido.getvalue()
-            resultado = procesar_archivo_bytes(data_bytes)
-
-        st.success("✅ Archivo procesado con éxito.")
-
-        # -------- Filtros --------
-        with st.expander("🔎 Filtros", expanded=True):
-            colf1, colf2, colf3 = st.columns([1,1,2])
-            niveles = sorted(resultado["Nivel de Exposición"].dropna().unique().tolist())
-            criticidades = sorted(resultado["Criticidad"].dropna().unique().tolist())
-            sel_niveles = colf1.multiselect("Nivel de Exposición", niveles, default=niveles)
-            sel_critic  = colf2.multiselect("Criticidad", criticidades, default=criticidades)
-            buscar_activo = colf3.text_input("Buscar por nombre de activo (contiene):").strip().upper()
-
-        df_filt = resultado.copy()
-        if sel_niveles:   df_filt = df_filt[df_filt["Nivel de Exposición"].isin(sel_niveles)]
-        if sel_critic:    df_filt = df_filt[df_filt["Criticidad"].isin(sel_critic)]
-        if buscar_activo: df_filt = df_filt[df_filt["Activo"].str.contains(buscar_activo, na=False)]
-
-        # -------- Justificación (solo visible) --------
-        just = (
-            "La exposición se clasifica como " + df_filt["Nivel de Exposición"].astype("string").fillna("SIN DATO") +
-            " porque la vulnerabilidad " + df_filt["Identificador"].astype("string").fillna("No asignado") +
-            " tiene CVSS " + df_filt["CVSS"].round(2).astype("string").replace({"nan":"s/d"}) +
-            ", CVSSF " + df_filt["CVSSF"].round(0).astype("Int64").astype("string").replace({"<NA>":"s/d"}) +
-            " y afecta al activo " + df_filt["Activo"].astype("string").fillna("Sin nombre") +
-            " con criticidad " + df_filt["Criticidad"].astype("string").fillna("Sin dato") + "."
+        validar(perfil)
+    except ValueError as e:
+        st.sidebar.error(f"{e}; se usa el perfil MURC.")
+        return PERFIL_MURC
+    return perfil
+
+@seccion("sensibilidad")
+def seccion_sensibilidad(resultado, perfil):
+    # Qué pasaría con otros pesos y umbrales: hallazgos que cambian de nivel respecto del perfil actual.
+    with st.expander("🧪 Sensibilidad de pesos y umbrales", expanded=False):
+        colS1, colS2, colS3 = st.columns(3)
+        paso = colS1.select_slider("Paso de los pesos", [0.2, 0.1, 0.05, 0.025], value=0.05)
+        juegos = colS2.text_area("Umbrales (un juego por línea)", "0.25, 0.5, 0.75\n0.3, 0.55, 0.8", height=80)
+        normalizadores = colS3.text_input("Normalizadores de CVSSF", "4096")
+        try:
+            umbrales = [tuple(float(u) for u in linea.split(",")) for linea in juegos.splitlines() if linea.strip()]
+            max_cvssf = [float(x) for x in normalizadores.split(",") if x.strip()]
+            perfiles = rejilla_perfiles(paso, umbrales, max_cvssf)
+            for p in perfiles:
+                validar(p)
+        except ValueError as e:
+            st.warning(f"Parámetros inválidos: {e}")
+            return
+        if st.button(f"Calcular sensibilidad ({len(perfiles):,} perfiles)".replace(",", ".")):
+            # La agrupación por (CVSS, CVSSF, criticidad) se reutiliza mientras no cambie el archivo.
+            if st.session_state.get("clave_sensibilidad") != st.session_state["clave_base"]:
+                st.session_state["sensibilidad"] = Sensibilidad(resultado)
+                st.session_state["clave_sensibilidad"] = st.session_state["clave_base"]
+            t0 = time.perf_counter()
+            st.session_state["tabla_sensibilidad"] = st.session_state["sensibilidad"].comparar(perfiles, base=perfil)
+            st.session_state["segundos_sensibilidad"] = time.perf_counter() - t0
+        tabla_sens = st.session_state.get("tabla_sensibilidad")
+        if tabla_sens is None:
+            return
+        st.caption(
+            f"{len(tabla_sens):,} perfiles × {len(resultado):,} hallazgos en "
+            f"{st.session_state['segundos_sensibilidad']:.2f} s; cambios respecto del perfil «{perfil.nombre}».".replace(",", ".")
+        )
+        fig_sens = px.scatter(
+            tabla_sens, x="Peso CVSS", y="Peso CVSSF", color="% Cambian", symbol="Umbrales",
+            hover_data=["Perfil", "Cambian", "Suben", "Bajan"], color_continuous_scale="Reds", height=380
+        )
+        fig_sens.update_layout(margin=dict(l=10,r=30,t=30,b=10))
+        st.plotly_chart(fig_sens, use_container_width=True)
+        st.dataframe(
+            tabla_sens.sort_values("Cambian", ascending=False, kind="stable"),
+            hide_index=True, use_container_width=True, height=320
         )
-        df_filt = df_filt.assign(Justificación=just)
-
-        # -------- KPIs --------
-        c1, c2, c3, c4, c5 = st.columns(5)
-        total = len(df_filt)
-        c1.metric("Activos (filtrados)", f"{total:,}".replace(",", "."))
-        for col, label in zip([c2,c3,c4,c5], ["BAJO","MEDIO","ALTO","CRÍTICO"]):
-            col.metric(f"{label}", int((df_filt["Nivel de Exposición"]==label).sum()))
-
-        st.divider()
-
-        # -------- Tabla --------
-        st.subheader("📄 Resultados")
-        st.dataframe(df_filt, use_container_width=True, height=420)
-
-        # -------- Gráficos (Plotly) --------
-        st.subheader("📈 Visualizaciones")
-
-        colores_nivel = {
-            "BAJO": "#2ca02c", "MEDIO": "#ff7f0e",
-            "ALTO": "#d62728", "CRÍTICO": "#8b0000",
-            "SIN DATO": "#808080"
-        }
-        colores_critic = {
-            "Bajo": "#2ca02c", "Medio": "#ff7f0e",
-            "Alto": "#d62728", "Critico": "#8b0000",
-            "Sin dato": "#808080"
-        }
 
+def memoria_de_la_sesion() -> pd.DataFrame:
+    # MB por objeto de la sesión; se recalcula solo cuando cambia alguno de los objetos grandes.
+    estado = {k: v for k, v in st.session_state.items() if k != "memoria_sesion"}
+    firma = tuple(sorted(
+        (k, id(v)) for k, v in estado.items() if not isinstance(v, (str, int, float, bool, type(None)))
+    ))
+    memo = st.session_state.get("memoria_sesion")
+    if memo is None or memo[0] != firma:
+        memo = (firma, memoria_sesion(estado))
+        st.session_state["memoria_sesion"] = memo
+    return memo[1]
+
+@seccion("lote")
+def seccion_lote():
+    # Varias unidades de negocio: un libro por filial, puntuados en paralelo y consolidados.
+    with st.expander("🗂️ Lote de varias unidades de negocio", expanded=False):
+        archivos = st.file_uploader(
+            "Libros Excel (uno por unidad)", type=["xlsx"], accept_multiple_files=True, key="archivos_lote"
+        )
+        if archivos and st.button(f"Procesar lote ({len(archivos)} archivos)"):
+            barra = st.progress(0.0, text="Procesando lote...")
+            def avance(hechos, total, info):
+                barra.progress(hechos / total, text=f"{hechos}/{total} · {info.origen}")
+            indice_ti = inteligencia()
+            # Nombres repetidos (mismo libro de dos carpetas) se distinguen con sufijo.
+            nombres = nombres_unicos(a.name for a in archivos)
+            lote = puntuar_lote({n: a.getvalue() for n, a in zip(nombres, archivos)}, al_avanzar=avance,
+                                inteligencia=indice_ti.ruta if indice_ti is not None else None)
+            st.session_state["lote"] = lote
+            st.session_state["clave_lote"] = clave_exportacion("lote", sorted(a.file_id for a in archivos))
+        lote = st.session_state.get("lote")
+        if lote is None:
+            return
+        st.caption(f"{len(lote.resultado):,} filas consolidadas en {lote.segundos:.1f} s.".replace(",", "."))
+        for info in lote.errores:
+            st.error(f"❌ {info.origen}: {info.error}")
+        st.dataframe(lote.informe(), hide_index=True, use_container_width=True)
+        if len(lote.resultado):
+            resumen = pd.crosstab(lote.resultado["Origen"], lote.resultado["Nivel de Exposición"])
+            st.dataframe(resumen, use_container_width=True)
+            clave = clave_exportacion(st.session_state["clave_lote"], "csv")
+            ruta = cache_exportaciones().ruta(clave)
+            if ruta is None and st.button("Preparar consolidado (CSV)"):
+                with st.spinner("Generando archivo..."):
+                    ruta = cache_exportaciones().generar(clave, lote.resultado, "csv")
+            if ruta is not None:
+                with open(ruta, "rb") as f:
+                    st.download_button(
+                        "Descargar consolidado (CSV)", data=f,
+                        file_name="Resultado_Riesgo_Unificado_Lote.csv", mime="text/csv"
+                    )
+
+@seccion("tabla")
+def seccion_tabla(tabla, filas_filt, total):
+    # Solo se envía al navegador la página visible, ordenada por riesgo;
+    # la justificación se arma únicamente para esas filas.
+    filas_orden = tabla.ordenar(filas_filt)
+    colp1, colp2, _ = st.columns([1,1,3])
+    tam_pagina = colp1.selectbox("Filas por página", TAMANOS_PAGINA, index=1)
+    n_paginas  = TablaPaginada.paginas(total, tam_pagina)
+    pagina     = colp2.number_input(f"Página (de {n_paginas})", min_value=1, max_value=n_paginas, value=1, step=1)
+    with medir("tabla_pagina", filas_entrada=total) as m:
+        df_pagina = tabla.pagina(filas_orden, pagina, tam_pagina)
+        m.filas_salida = len(df_pagina)
+    st.dataframe(df_pagina, use_container_width=True, height=420)
+    desde = min(total, (pagina - 1) * tam_pagina + 1)
+    hasta = min(total, pagina * tam_pagina)
+    st.caption(f"Filas {desde:,}–{hasta:,} de {total:,}, ordenadas por riesgo (mayor a menor).".replace(",", "."))
+
+@seccion("ranking_grupos")
+def seccion_ranking_grupos(df_filt, total):
+    with st.expander("🏆 Más riesgosas por activo y por criticidad"):
+        colr1, colr2, _ = st.columns([1,1,3])
+        top_n = colr1.number_input("Vulnerabilidades por grupo", min_value=1, max_value=50, value=5, step=1)
+        max_activos = colr2.number_input("Activos a mostrar", min_value=10, max_value=2000, value=50, step=10)
+        cols_rank = ["Puesto","Activo","Identificador","riesgo","Nivel de Exposición","CVSS","CVSSF","Criticidad"]
+        posiciones = df_filt.index.to_numpy()
+        with medir("ranking_grupos", filas_entrada=total) as m:
+            filas_act, puesto_act = top_k_por_grupo(df_filt["riesgo"], df_filt["Activo"], top_n,
+                                                    posiciones=posiciones, max_grupos=max_activos)
+            filas_crit, puesto_crit = top_k_por_grupo(df_filt["riesgo"], df_filt["Criticidad"], top_n, posiciones=posiciones)
+            m.filas_salida = len(filas_act) + len(filas_crit)
+        tab_act, tab_crit = st.tabs(["Por activo", "Por criticidad"])
+        tab_act.dataframe(df_filt.iloc[filas_act].assign(Puesto=puesto_act)[cols_rank],
+                          hide_index=True, use_container_width=True, height=380)
+        tab_act.caption(f"Los {top_n} hallazgos de mayor riesgo de cada activo; primero los activos con el hallazgo más riesgoso.")
+        tab_crit.dataframe(df_filt.iloc[filas_crit].assign(Puesto=puesto_crit)[cols_rank],
+                           hide_index=True, use_container_width=True, height=380)
+
+@seccion("graficos")
+def seccion_graficos(cubo, celdas, por_nivel):
+    # Seleccionar celdas en el modo agregado del scatter vuelve a ejecutar solo esta sección.
+    with medir("graficos_resumen", filas_entrada=len(celdas)):
         # Barras por nivel
-        conteo_nivel = df_filt.groupby("Nivel de Exposición", dropna=False).size().reset_index(name="Cantidad")
+        conteo_nivel = pd.DataFrame({"Nivel de Exposición": list(por_nivel), "Cantidad": list(por_nivel.values())})
         orden_niveles = ["BAJO","MEDIO","ALTO","CRÍTICO","SIN DATO"]
         conteo_nivel["Nivel de Exposición"] = pd.Categorical(conteo_nivel["Nivel de Exposición"], categories=orden_niveles, ordered=True)
         fig_barras = px.bar(
             conteo_nivel.sort_values("Nivel de Exposición"),
             x="Nivel de Exposición", y="Cantidad",
             color="Nivel de Exposición",
-            color_discrete_map=colores_nivel,
+            color_discrete_map=COLORES_NIVEL,
             text="Cantidad", height=360
         )
         fig_barras.update_layout(showlegend=False, margin=dict(l=10,r=10,t=30,b=10))
         fig_barras.update_traces(textposition="outside")
 
         # Donut por criticidad
-        dist_critic = (
-            df_filt.assign(Criticidad=df_filt["Criticidad"].astype("string"))
-                  .groupby("Criticidad", dropna=False)
-                  .size().reset_index(name="Cantidad")
-        )
+        dist_critic = cubo.por_criticidad(celdas)
         dist_critic["Criticidad"] = dist_critic["Criticidad"].fillna("Sin dato")
         fig_donut = px.pie(
             dist_critic, names="Criticidad", values="Cantidad",
             hole=0.55, color="Criticidad",
-            color_discrete_map=colores_critic, height=360
+            color_discrete_map=COLORES_CRITIC, height=360
         )
         fig_donut.update_layout(margin=dict(l=10,r=10,t=30,b=10))
 
-        # Scatter
-        agrup = (
-            df_filt
-            .groupby("Activo", dropna=False)
-            .agg(
-                prom_riesgo=("riesgo","mean"),
-                suma_cvssf=("CVSSF","sum"),
-                suma_cvss=("CVSS","sum"),
-                count_vuln=("Identificador","size"),
-                nivel=("Nivel de Exposición","first"),
-                critic=("Criticidad","first")
-            )
-            .reset_index()
-        )
-        fig_scatter = px.scatter(
+    # Scatter
+    with medir("grafico_activos", filas_entrada=len(celdas)) as m_activos:
+        agrup = cubo.por_activo(celdas)
+        y_max = max(agrup["suma_cvssf"].max(), 1)
+        y_lim = y_max * 1.15
+        disp_activos = dispersion(
             agrup,
             x="count_vuln",
             y="suma_cvssf",
             color="nivel",
-            color_discrete_map=colores_nivel,
+            color_discrete_map=COLORES_NIVEL,
             size="suma_cvss", size_max=32,
             hover_data={
                 "Activo": True, "critic": True, "nivel": True,
@@ -377,10 +504,10 @@ if archivo_subido:
                 "nivel": "Nivel de Exposición",
                 "critic": "Criticidad"
             },
-            height=460
+            height=460,
+            rango_y=(0, y_lim)
         )
-        y_max = max(agrup["suma_cvssf"].max(), 1)
-        y_lim = y_max * 1.15
+        fig_scatter = disp_activos.fig
         fig_scatter.update_layout(
             margin=dict(l=10, r=30, t=30, b=10),
             yaxis=dict(title="Suma de CVSSF", range=[0, y_lim]),
@@ -388,67 +515,96 @@ if archivo_subido:
             legend_title_text="Nivel de Exposición",
             shapes=[], annotations=[]
         )
+        m_activos.filas_salida = len(agrup)
+
+    cA, cB = st.columns(2)
+    with cA: st.plotly_chart(fig_barras, use_container_width=True)
+    with cB: st.plotly_chart(fig_donut, use_container_width=True)
+    ev_activos = st.plotly_chart(
+        fig_scatter, use_container_width=True, key="scatter_activos",
+        on_select="rerun" if disp_activos.modo == "bins" else "ignore"
+    )
+    detalle_bins(ev_activos, disp_activos, agrup, "count_vuln", "suma_cvssf", "nivel",
+                 ["Activo","critic","nivel","prom_riesgo","suma_cvssf","suma_cvss","count_vuln"])
+
+@seccion("tabla_delta")
+def seccion_tabla_delta(df_comp, cols_tabla, total_cmp):
+    # Selección parcial de las 50 mayores, sin ordenar todas las filas. «Siguientes 50»
+    # continúa después de la última fila vista (cursor), aunque cambien los filtros;
+    # paginar vuelve a ejecutar solo esta tabla.
+    delta_abs = df_comp["Delta(MURC-CVSS)"].abs()
+    posiciones = df_comp.index.to_numpy()
+    if st.session_state.get("clave_cursores") != st.session_state["clave_resultado"]:
+        st.session_state["cursores_delta"] = [None]
+        st.session_state["clave_cursores"] = st.session_state["clave_resultado"]
+    cursores = st.session_state["cursores_delta"]
+    with medir("ranking_delta", filas_entrada=total_cmp) as m:
+        top = top_k(delta_abs, 50, posiciones=posiciones, despues=cursores[-1])
+        m.filas_salida = len(top)
+    st.dataframe(df_comp.iloc[top][cols_tabla], use_container_width=True, height=380)
+    # Los botones mueven el cursor en su callback, antes de la siguiente ejecución de la sección.
+    cb1, cb2, cb3 = st.columns([1,1,3])
+    cb1.button("⬅️ Anteriores", disabled=len(cursores) == 1, key="delta_anteriores", on_click=cursores.pop)
+    cb2.button("Siguientes 50 ➡️", disabled=len(top) < 50, key="delta_siguientes",
+               on_click=cursores.append, args=(cursor_de(delta_abs, top, posiciones=posiciones),))
+    cb3.caption(f"Página {len(cursores)}")
+
+@seccion("comparacion")
+def seccion_comparacion(df_filt, cubo, celdas, total):
+    with st.expander("📊 Comparación CVSS vs MURC (priorización)", expanded=True):
+        # Columnas derivadas sobre una vista de df_filt (sus columnas no se copian).
+        df_comp = pd.DataFrame({c: df_filt[c] for c in df_filt.columns}, copy=False)
+
+        df_comp["MURC_0a10"] = (df_comp["riesgo"] * 10).round(2)
+
+        df_comp["Nivel_CVSS"] = nivel_cvss(df_comp["CVSS"])
+
+        df_comp["Delta(MURC-CVSS)"] = (df_comp["MURC_0a10"] - df_comp["CVSS"]).round(2)
+
+        df_comp["_ord_murc"] = df_comp["Nivel de Exposición"].astype("string").map(ORDEN_NIVEL).fillna(0)
+        df_comp["_ord_cvss"] = df_comp["Nivel_CVSS"].map(ORDEN_NIVEL).fillna(0)
+        diff_nivel = (df_comp["_ord_murc"] - df_comp["_ord_cvss"]).astype(int)
+
+        def etiqueta_cambio(n):
+            if n > 0:  return "⬆️ Sube prioridad (MURC > CVSS)"
+            if n < 0:  return "⬇️ Baja prioridad (MURC < CVSS)"
+            return "➡️ Mantiene prioridad"
+
+        df_comp["Cambio_prioridad"] = diff_nivel.map(etiqueta_cambio)
+
+        # Conteos desde el cubo (celdas Nivel de Exposición × Nivel_CVSS), no desde las filas.
+        cambios = cubo.por_nivel_cvss(celdas)
+        signo = cambios["Diferencia"].clip(-1, 1)
+        cambios["Cambio_prioridad"] = signo.map(etiqueta_cambio)
+        dist_cambio = cambios.groupby("Cambio_prioridad", sort=False)["Cantidad"].sum().reset_index()
+        total_cmp = total
+        suben, bajan, igual = (int(cambios.loc[signo == s, "Cantidad"].sum()) for s in (1, -1, 0))
+
+        c1c, c2c, c3c, c4c = st.columns(4)
+        c1c.metric("Registros comparados", f"{total_cmp:,}".replace(",", "."))
+        c2c.metric("Suben prioridad", suben)
+        c3c.metric("Bajan prioridad", bajan)
+        c4c.metric("Sin cambio", igual)
 
-        cA, cB = st.columns(2)
-        with cA: st.plotly_chart(fig_barras, use_container_width=True)
-        with cB: st.plotly_chart(fig_donut, use_container_width=True)
-        st.plotly_chart(fig_scatter, use_container_width=True)
-
-        # =========================
-        #  COMPARACIÓN: CVSS vs MURC
-        # =========================
-        with st.expander("📊 Comparación CVSS vs MURC (priorización)", expanded=True):
-            df_comp = df_filt.copy()
-
-            df_comp["MURC_0a10"] = (df_comp["riesgo"] * 10).round(2)
-
-            bins_cvss = [-0.01, 2.5, 5.0, 7.5, float("inf")]
-            labels_nivel = ["BAJO", "MEDIO", "ALTO", "CRÍTICO"]
-            df_comp["Nivel_CVSS"] = pd.cut(
-                (df_comp["CVSS"]).fillna(-0.01),
-                bins=bins_cvss, labels=labels_nivel
-            ).astype("string").fillna("SIN DATO")
-
-            df_comp["Delta(MURC-CVSS)"] = (df_comp["MURC_0a10"] - df_comp["CVSS"]).round(2)
-
-            orden = {"BAJO":1, "MEDIO":2, "ALTO":3, "CRÍTICO":4, "SIN DATO":0}
-            df_comp["_ord_murc"] = df_comp["Nivel de Exposición"].map(orden).fillna(0)
-            df_comp["_ord_cvss"] = df_comp["Nivel_CVSS"].map(orden).fillna(0)
-            diff_nivel = (df_comp["_ord_murc"] - df_comp["_ord_cvss"]).astype(int)
-
-            def etiqueta_cambio(n):
-                if n > 0:  return "⬆️ Sube prioridad (MURC > CVSS)"
-                if n < 0:  return "⬇️ Baja prioridad (MURC < CVSS)"
-                return "➡️ Mantiene prioridad"
-
-            df_comp["Cambio_prioridad"] = diff_nivel.map(etiqueta_cambio)
-
-            total_cmp = len(df_comp)
-            suben = int((diff_nivel > 0).sum())
-            bajan = int((diff_nivel < 0).sum())
-            igual = int((diff_nivel == 0).sum())
-
-            c1c, c2c, c3c, c4c = st.columns(4)
-            c1c.metric("Registros comparados", f"{total_cmp:,}".replace(",", "."))
-            c2c.metric("Suben prioridad", suben)
-            c3c.metric("Bajan prioridad", bajan)
-            c4c.metric("Sin cambio", igual)
-
-            st.write("---")
+        st.write("---")
 
-            cols_tabla = ["Activo","Identificador","CVSS","MURC_0a10","Delta(MURC-CVSS)","Nivel_CVSS","Nivel de Exposición","Criticidad"]
-            st.subheader("Tabla comparativa (Top 50 por diferencia absoluta)")
-            df_top = df_comp.assign(_abs= df_comp["Delta(MURC-CVSS)"].abs()) \
-                            .sort_values("_abs", ascending=False)[cols_tabla].head(50)
-            st.dataframe(df_top, use_container_width=True, height=380)
+        cols_tabla = ["Activo","Identificador","CVSS","MURC_0a10","Delta(MURC-CVSS)","Nivel_CVSS","Nivel de Exposición","Criticidad"]
+        st.subheader("Tabla comparativa (Top 50 por diferencia absoluta)")
+        seccion_tabla_delta(df_comp, cols_tabla, total_cmp)
 
-            st.write("---")
+        st.write("---")
 
-            st.subheader("Dispersión: CVSS (x) vs MURC en escala 0–10 (y)")
-            fig_cmp = px.scatter(
+        st.subheader("Dispersión: CVSS (x) vs MURC en escala 0–10 (y)")
+        with medir("grafico_cvss_murc", filas_entrada=total_cmp):
+            max_axis = max(
+                (df_comp["CVSS"].max() if pd.notna(df_comp["CVSS"].max()) else 10),
+                (df_comp["MURC_0a10"].max() if pd.notna(df_comp["MURC_0a10"].max()) else 10)
+            )
+            disp_cmp = dispersion(
                 df_comp,
                 x="CVSS", y="MURC_0a10",
                 color="Cambio_prioridad",
+                category_orders={"Cambio_prioridad": [etiqueta_cambio(1), etiqueta_cambio(-1), etiqueta_cambio(0)]},
                 hover_data={
                     "Activo": True,
                     "Identificador": True,
@@ -460,44 +616,321 @@ if archivo_subido:
                     "Delta(MURC-CVSS)": ":.2f",
                 },
                 labels={"MURC_0a10":"MURC (0–10)"},
-                height=460
-            )
-            max_axis = max(
-                (df_comp["CVSS"].max() if pd.notna(df_comp["CVSS"].max()) else 10),
-                (df_comp["MURC_0a10"].max() if pd.notna(df_comp["MURC_0a10"].max()) else 10)
+                height=460,
+                rango_x=(0, max_axis), rango_y=(0, max_axis)
             )
+            fig_cmp = disp_cmp.fig
             fig_cmp.add_shape(type="line", x0=0, y0=0, x1=max_axis, y1=max_axis,
                               line=dict(dash="dash"))
             fig_cmp.update_layout(margin=dict(l=10,r=30,t=30,b=10), legend_title_text="Cambio de prioridad")
-            st.plotly_chart(fig_cmp, use_container_width=True)
-
-            st.subheader("Distribución de cambios de prioridad")
-            dist_cambio = df_comp.groupby("Cambio_prioridad").size().reset_index(name="Cantidad")
-            fig_bar_cmp = px.bar(
-                dist_cambio.sort_values("Cantidad", ascending=False),
-                x="Cambio_prioridad", y="Cantidad",
-                text="Cantidad", height=320
-            )
-            fig_bar_cmp.update_traces(textposition="outside")
-            fig_bar_cmp.update_layout(showlegend=False, margin=dict(l=10,r=30,t=30,b=10))
-            st.plotly_chart(fig_bar_cmp, use_container_width=True)
-
-        # -------- Descargas --------
-        st.subheader("📥 Descargas")
-        output_excel = BytesIO(); df_filt.to_excel(output_excel, index=False)
-        st.download_button(
-            label="Descargar resultado filtrado (Excel)",
-            data=output_excel.getvalue(),
-            file_name="Resultado_Riesgo_Unificado.xlsx",
-            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+        ev_cmp = st.plotly_chart(
+            fig_cmp, use_container_width=True, key="scatter_cmp",
+            on_select="rerun" if disp_cmp.modo == "bins" else "ignore"
         )
-        output_csv = df_filt.to_csv(index=False, encoding="utf-8-sig")
-        st.download_button(
-            label="Descargar resultado filtrado (CSV)",
-            data=output_csv,
-            file_name="Resultado_Riesgo_Unificado.csv",
-            mime="text/csv"
+        detalle_bins(ev_cmp, disp_cmp, df_comp, "CVSS", "MURC_0a10", "Cambio_prioridad", cols_tabla + ["Cambio_prioridad"])
+
+        st.subheader("Distribución de cambios de prioridad")
+        fig_bar_cmp = px.bar(
+            dist_cambio.sort_values("Cantidad", ascending=False),
+            x="Cambio_prioridad", y="Cantidad",
+            text="Cantidad", height=320
         )
+        fig_bar_cmp.update_traces(textposition="outside")
+        fig_bar_cmp.update_layout(showlegend=False, margin=dict(l=10,r=30,t=30,b=10))
+        st.plotly_chart(fig_bar_cmp, use_container_width=True)
+
+@seccion("descargas")
+def seccion_descargas(df_filt, total, filtros):
+    # El archivo se genera solo cuando se pide y queda en caché para ese estado de filtros.
+    st.subheader("📥 Descargas")
+    etiquetas_formato = {"xlsx": "Excel", "csv": "CSV", "parquet": "Parquet"}
+    formato = st.radio(
+        "Formato", formatos_disponibles(), horizontal=True,
+        format_func=lambda f: etiquetas_formato[f]
+    )
+    clave_exp = clave_exportacion(st.session_state["clave_resultado"], *filtros, formato)
+    ruta_exp = cache_exportaciones().ruta(clave_exp)
+    if ruta_exp is None and st.button(f"Preparar resultado filtrado ({etiquetas_formato[formato]})"):
+        with st.spinner("Generando archivo..."), medir(f"exportacion_{formato}", filas_entrada=total) as m:
+            ruta_exp = cache_exportaciones().generar(clave_exp, df_filt, formato)
+            m.filas_salida = total
+    if ruta_exp is not None:
+        with open(ruta_exp, "rb") as f:
+            st.download_button(
+                label=f"Descargar resultado filtrado ({etiquetas_formato[formato]})",
+                data=f,
+                file_name=f"Resultado_Riesgo_Unificado.{FORMATOS[formato][1]}",
+                mime=FORMATOS[formato][2]
+            )
+
+@seccion("tablero")
+def seccion_tablero(resultado, indice, tabla, cubo):
+    # Todo lo que depende de los filtros; cambiar un filtro vuelve a ejecutar solo esta sección.
+    with st.expander("🔎 Filtros", expanded=True):
+        colf1, colf2, colf3 = st.columns([1,1,2])
+        niveles = indice.niveles
+        criticidades = indice.criticidades
+        sel_niveles = colf1.multiselect("Nivel de Exposición", niveles, default=niveles)
+        sel_critic  = colf2.multiselect("Criticidad", criticidades, default=criticidades)
+        buscar_activo = colf3.text_input("Buscar por nombre de activo (contiene):").strip().upper()
+
+    # Se resuelve con el índice (bitmaps + trigramas), sin recorrer ni copiar la tabla;
+    # los KPIs y gráficos de resumen salen de las celdas filtradas del cubo.
+    with medir("filtros", filas_entrada=len(resultado)) as m:
+        filas_filt = indice.filtrar(sel_niveles, sel_critic, buscar_activo)
+        df_filt = indice.aplicar(resultado, filas_filt)
+        celdas = cubo.filtrar(sel_niveles, sel_critic, indice.activos_que_contienen(buscar_activo) if buscar_activo else None)
+        m.filas_salida = len(df_filt)
+
+    # -------- KPIs --------
+    c1, c2, c3, c4, c5 = st.columns(5)
+    total = cubo.total(celdas)
+    por_nivel = cubo.por_nivel(celdas)
+    c1.metric("Activos (filtrados)", f"{total:,}".replace(",", "."))
+    for col, label in zip([c2,c3,c4,c5], ["BAJO","MEDIO","ALTO","CRÍTICO"]):
+        col.metric(f"{label}", por_nivel.get(label, 0))
+
+    st.divider()
+
+    # -------- Tabla --------
+    st.subheader("📄 Resultados")
+    seccion_tabla(tabla, filas_filt, total)
+
+    # -------- Ranking por grupo --------
+    seccion_ranking_grupos(df_filt, total)
+
+    # -------- Gráficos (Plotly) --------
+    st.subheader("📈 Visualizaciones")
+    seccion_graficos(cubo, celdas, por_nivel)
+
+    # =========================
+    #  COMPARACIÓN: CVSS vs MURC
+    # =========================
+    seccion_comparacion(df_filt, cubo, celdas, total)
+
+    # -------- Descargas --------
+    seccion_descargas(df_filt, total, (sorted(sel_niveles), sorted(sel_critic), buscar_activo))
+
+@seccion("historico")
+def seccion_historico(resultado, origen, perfil):
+    with st.expander("🕓 Histórico de escaneos", expanded=False):
+        hist = historial()
+        colh1, colh2 = st.columns([1,2])
+        fecha_esc = colh1.date_input("Fecha del escaneo", value=date.today())
+        colh2.write("")
+        if colh2.button("Guardar este escaneo en el histórico"):
+            # Se guarda el resultado MURC: el histórico no mezcla puntajes de distintos perfiles.
+            with st.spinner("Guardando en el histórico..."):
+                corrida_id = hist.registrar(
+                    st.session_state["resultado_base"], fecha_esc, origen=origen,
+                    clave=st.session_state["clave_base"], perfil=PERFIL_MURC.nombre
+                )
+            st.success(f"Escaneo guardado (corrida {corrida_id}).")
+
+        corridas = hist.corridas()
+        if corridas.empty:
+            st.info("Aún no hay escaneos guardados en el histórico.")
+        else:
+            st.dataframe(corridas, hide_index=True, use_container_width=True)
+            if perfil != PERFIL_MURC:
+                st.caption(f"Tendencias con el perfil {PERFIL_MURC.nombre} (el histórico guarda el resultado MURC).")
+            tendencia = (
+                hist.tendencia_niveles().reset_index()
+                    .melt(id_vars="fecha_escaneo", var_name="Nivel de Exposición", value_name="Cantidad")
+            )
+            fig_tend = px.line(
+                tendencia, x="fecha_escaneo", y="Cantidad",
+                color="Nivel de Exposición", color_discrete_map=COLORES_NIVEL,
+                markers=True, height=340, labels={"fecha_escaneo": "Fecha de escaneo"}
+            )
+            fig_tend.update_layout(margin=dict(l=10,r=30,t=30,b=10))
+            st.plotly_chart(fig_tend, use_container_width=True)
+
+            consulta = st.text_input("Evolución de un activo o identificador (valor exacto):").strip().upper()
+            if consulta:
+                hist_act = hist.historia_activo(consulta)
+                hist_id  = hist.historia_identificador(consulta)
+                if not hist_act.empty:
+                    st.caption(f"Activo {consulta}")
+                    st.dataframe(hist_act, hide_index=True, use_container_width=True)
+                if not hist_id.empty:
+                    st.caption(f"Identificador {consulta}")
+                    st.dataframe(hist_id, hide_index=True, use_container_width=True)
+                if hist_act.empty and hist_id.empty:
+                    st.info("Sin registros en el histórico para ese valor.")
+
+@seccion("diferencias")
+def seccion_diferencias(resultado, perfil):
+    with st.expander("🔀 Comparar con un escaneo anterior", expanded=False):
+        fuente = st.radio("Escaneo anterior", ["Histórico", "Otro archivo"], horizontal=True)
+        previo, clave_previo = None, None
+        if fuente == "Histórico":
+            corridas_prev = historial().corridas()
+            if corridas_prev.empty:
+                st.info("Aún no hay escaneos guardados en el histórico.")
+            else:
+                corrida_prev = st.selectbox(
+                    "Corrida", corridas_prev["id"].tolist(),
+                    format_func=lambda i: "{fecha_escaneo} · {origen} (id {id})".format(
+                        **corridas_prev.set_index("id", drop=False).loc[i].to_dict()
+                    )
+                )
+                clave_previo = f"corrida:{corrida_prev}"
+                # Las corridas de otro perfil (p. ej. de la CLI) se repuntúan desde CVSS, CVSSF y Criticidad.
+                desde = PERFIL_MURC if historial().perfil(corrida_prev) == PERFIL_MURC.nombre else None
+                previo = lambda: repuntuar(historial().hallazgos(corrida_prev), perfil, desde)
+        else:
+            archivo_prev = st.file_uploader("Libro Excel del escaneo anterior", type=["xlsx"], key="archivo_prev")
+            if archivo_prev:
+                clave_previo = f"archivo:{archivo_prev.file_id}"
+                previo = lambda: repuntuar(puntuar_libro(archivo_prev.getvalue(), inteligencia=inteligencia()), perfil)
+
+        if previo is None:
+            return
+        # Se recalcula solo si cambia alguno de los dos escaneos.
+        clave_dif = (st.session_state["clave_resultado"], clave_previo, perfil)
+        if st.session_state.get("clave_dif") != clave_dif:
+            with st.spinner("Comparando escaneos..."), medir("diferencias", filas_entrada=len(resultado)):
+                st.session_state["dif"] = comparar(previo(), resultado)
+                st.session_state["clave_dif"] = clave_dif
+        dif = st.session_state["dif"]
+
+        cols_kpi = st.columns(5)
+        for col, (nombre, valor) in zip(cols_kpi, dif.kpis().items()):
+            col.metric(nombre, f"{valor:,}".replace(",", "."))
+
+        matriz = dif.matriz_transicion()
+        fig_matriz = px.imshow(
+            matriz, text_auto=True, aspect="auto", color_continuous_scale="Blues",
+            labels=dict(x="Nivel actual", y="Nivel anterior", color="Cantidad"), height=380
+        )
+        fig_matriz.update_layout(margin=dict(l=10,r=30,t=30,b=10))
+        cM, cN = st.columns([3,2])
+        with cM: st.plotly_chart(fig_matriz, use_container_width=True)
+        with cN:
+            fig_mov = px.bar(
+                dif.movimientos().sort_values("Cantidad", ascending=False),
+                x="Movimiento", y="Cantidad", text="Cantidad", height=380
+            )
+            fig_mov.update_traces(textposition="outside")
+            fig_mov.update_layout(showlegend=False, margin=dict(l=10,r=30,t=30,b=10))
+            st.plotly_chart(fig_mov, use_container_width=True)
+
+        sel_estado = st.multiselect("Estado", [NUEVA, REMEDIADA, PERSISTENTE], default=[NUEVA, REMEDIADA])
+        detalle = dif.detalle[dif.detalle["Estado"].isin(sel_estado)]
+        st.caption(f"{len(detalle):,} pares (Activo, Identificador); se muestran hasta 1.000.".replace(",", "."))
+        st.dataframe(detalle.head(1000), use_container_width=True, height=320)
+
+def tabla_secciones() -> pd.DataFrame:
+    # Última ejecución de cada sección (completa o solo de la sección), con sus etapas.
+    filas = [
+        (nombre, m.etapa, round(m.segundos, 4), m.filas_entrada, m.filas_salida, m.pico_mb)
+        for nombre, medidas in st.session_state.get("metricas_secciones", {}).items()
+        for m in medidas.mediciones
+    ]
+    return pd.DataFrame(filas, columns=["Sección", "Etapa", "Segundos", "Filas entrada", "Filas salida", "Pico MB"])
+
+# =========================
+#       INTERFAZ UI
+# =========================
+seccion_lote()
+
+archivo_subido = st.file_uploader("Selecciona un archivo Excel", type=["xlsx"])
+
+if archivo_subido:
+    try:
+        # Mediciones por etapa: la carga se mide una vez por archivo; cada sección mide sus propias ejecuciones.
+        metricas = Metricas("interaccion")
+        # Solo se reprocesa cuando cambia el archivo, no en cada interacción.
+        recien_cargado = st.session_state.get("archivo_id") != archivo_subido.file_id
+        if recien_cargado:
+            with st.spinner("Procesando archivo..."):
+                carga = Metricas(f"carga:{archivo_subido.name}")
+                with registrando(carga):
+                    with carga.etapa("procesar") as m:
+                        procesado = procesar_archivo_bytes(archivo_subido.getvalue())
+                        m.filas_salida = len(procesado.resultado)
+                st.session_state["resultado_base"] = procesado.resultado
+                st.session_state["eventos_cache"]  = procesado.eventos
+                st.session_state["clave_base"]     = procesado.clave
+                st.session_state["archivo_id"] = archivo_subido.file_id
+                st.session_state["metricas_carga"] = carga
+
+        # -------- Perfil de puntuación --------
+        perfil = selector_perfil()
+        # Al cambiar de perfil se repuntúa el resultado en memoria (sin releer el libro).
+        if recien_cargado or st.session_state.get("perfil_aplicado") != perfil:
+            medidas = carga if recien_cargado else metricas
+            with st.spinner("Aplicando perfil..."), registrando(medidas):
+                base = st.session_state["resultado_base"]
+                with medidas.etapa("perfil", filas_entrada=len(base)):
+                    st.session_state["resultado"] = repuntuar(base, perfil)
+                st.session_state["clave_resultado"] = (
+                    st.session_state["clave_base"] if perfil == PERFIL_MURC
+                    else clave_exportacion(st.session_state["clave_base"], perfil)
+                )
+                with medidas.etapa("indice_filtros", filas_entrada=len(base)):
+                    st.session_state["indice_filtros"] = IndiceFiltros(st.session_state["resultado"])
+                with medidas.etapa("orden_tabla", filas_entrada=len(base)):
+                    st.session_state["tabla"] = TablaPaginada(st.session_state["resultado"])
+                with medidas.etapa("cubo", filas_entrada=len(base)) as m:
+                    st.session_state["cubo"] = CuboAgregado(st.session_state["resultado"])
+                    m.filas_salida = len(st.session_state["cubo"])
+            st.session_state["perfil_aplicado"] = perfil
+            if recien_cargado:
+                carga.escribir()
+        resultado = st.session_state["resultado"]
+
+        indice_ti = inteligencia()
+        if indice_ti is not None:
+            with st.sidebar.expander(f"🛰️ Inteligencia de amenazas: {len(indice_ti):,} CVE".replace(",", ".")):
+                st.caption("CVSS y CVSSF vacíos en el libro se completan con NVD, EPSS y KEV; los valores del libro mandan.")
+                st.dataframe(indice_ti.fuentes(), hide_index=True, use_container_width=True)
+
+        with st.sidebar.expander("🗄️ Caché por etapas"):
+            st.caption("Última carga: " + ", ".join(f"{k}: {v}" for k, v in st.session_state["eventos_cache"].items()))
+            st.dataframe(cache_etapas().ocupacion(), hide_index=True, use_container_width=True)
+            st.dataframe(cache_etapas().estadisticas(), hide_index=True, use_container_width=True)
+
+        st.success("✅ Archivo procesado con éxito.")
+
+        # -------- Secciones que se vuelven a ejecutar por separado --------
+        seccion_tablero(resultado, st.session_state["indice_filtros"], st.session_state["tabla"], st.session_state["cubo"])
+
+        seccion_sensibilidad(st.session_state["resultado_base"], perfil)
+
+        # =========================
+        #  HISTÓRICO DE ESCANEOS
+        # =========================
+        seccion_historico(resultado, archivo_subido.name, perfil)
+
+        # =========================
+        #  DIFERENCIAS ENTRE ESCANEOS
+        # =========================
+        seccion_diferencias(resultado, perfil)
+
+        # -------- Memoria de la sesión --------
+        mem = memoria_de_la_sesion()
+        with st.sidebar.expander(f"💾 Memoria de la sesión: {mem['MB'].sum():,.1f} MB"):
+            st.caption(
+                ("Resultado compacto" if COMPACTO else "Resultado sin compactar (MURC_COMPACTO=0)") +
+                "; no incluye el archivo subido."
+            )
+            st.dataframe(mem[mem["MB"] >= 0.01], hide_index=True, use_container_width=True)
+
+        # -------- Diagnóstico (administración) --------
+        metricas.escribir()
+        if DIAGNOSTICO:
+            with st.sidebar.expander("🩺 Diagnóstico por etapa"):
+                st.caption("Arranque de la sesión")
+                st.dataframe(st.session_state["metricas_arranque"].tabla(), hide_index=True, use_container_width=True)
+                st.caption("Carga del archivo")
+                st.dataframe(st.session_state["metricas_carga"].tabla(), hide_index=True, use_container_width=True)
+                if metricas.mediciones:
+                    st.caption("Última ejecución completa")
+                    st.dataframe(metricas.tabla(), hide_index=True, use_container_width=True)
+                st.caption("Secciones (su última ejecución; se actualiza en la próxima ejecución completa)")
+                st.dataframe(tabla_secciones(), hide_index=True, use_container_width=True)
 
         # -------- Pie de página --------
         st.write("---")
@@ -0,0 +1,13 @@
+"""Modelo Unificado de Riesgo Cibernético (MURC): motor de cálculo reutilizable."""
+from .ingesta import leer_libro
+from .motor import puntuar_archivo, puntuar_libro, puntuar_por_bloques
+from .nucleo import COLUMNAS_RESULTADO, puntuar
+
+__all__ = [
+    "COLUMNAS_RESULTADO",
+    "leer_libro",
+    "puntuar",
+    "puntuar_archivo",
+    "puntuar_libro",
+    "puntuar_por_bloques",
+]
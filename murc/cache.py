@@ -0,0 +1,411 @@
+"""Caché por etapas, direccionada por contenido.
+
+Cada hoja normalizada se guarda bajo la huella de su propio contenido
+(ver ``huella.py``) y el resultado puntuado bajo la combinación de las tres.
+Si un analista solo modifica Criticidad_Activos y vuelve a subir el libro,
+Escaneo y CVSSF salen de la caché y solo se relee esa hoja y se rehace la
+unión. Además, el SHA-256 del archivo completo apunta a la clave de su
+resultado: volver a subir el mismo libro no recalcula ni las huellas por hoja.
+
+Dos niveles, ambos con vencimiento (MURC_CACHE_TTL, segundos desde que se
+guardó la entrada):
+
+* memoria — LRU por tamaño (MURC_CACHE_MB), compartida entre las sesiones
+  del proceso;
+* disco — solo si se define MURC_CACHE (un directorio): un Parquet por tabla y un
+  índice SQLite con tamaño, creación y último uso, compartido entre procesos
+  (varios workers de la interfaz, la CLI). LRU por tamaño
+  (MURC_CACHE_DISCO_MB). Lo que se encuentra en disco sube a memoria.
+
+Los aciertos, fallos, desalojos por tamaño y entradas vencidas se cuentan
+por etapa y nivel (los de disco, sumando todos los procesos).
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import NamedTuple
+
+import pandas as pd
+
+from .compacto import memoria_bytes
+from .huella import huella_archivo, huellas_hojas
+from .ingesta import HOJAS, leer_hojas
+from .inteligencia import enriquecer_cvssf
+from .metricas import medir
+from .nucleo import HOJA_CRITICIDAD, HOJA_CVSSF, HOJA_ESCANEO, puntuar
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    # Sin pyarrow la caché queda solo en memoria
+    pa = pq = None
+
+RUTA_CACHE = os.getenv("MURC_CACHE", "")                      # directorio del nivel en disco; vacío = solo memoria
+MAX_MB_MEMORIA = float(os.getenv("MURC_CACHE_MB", "512"))
+MAX_MB_DISCO = float(os.getenv("MURC_CACHE_DISCO_MB", "4096"))
+TTL_CACHE = float(os.getenv("MURC_CACHE_TTL", "86400"))       # 0 = sin vencimiento
+
+ETAPA_ARCHIVO = "Archivo"
+ETAPA_RESULTADO = "Resultado"
+ETAPA_RESULTADO_COMPACTO = "Resultado compacto"
+EVENTOS = ("aciertos", "fallos", "desalojos", "vencidas")
+COLUMNAS_ESTADISTICAS = ["Nivel", "Etapa", "Aciertos", "Fallos", "Desalojos", "Vencidas"]
+
+class Procesado(NamedTuple):
+    resultado: pd.DataFrame
+    eventos: dict   # {etapa: "acierto"|"acierto en disco"|"fallo"} en esta llamada
+    clave: str      # huella del resultado (combinación de las tres hojas)
+
+class _Entrada(NamedTuple):
+    valor: object
+    bytes: int
+    creado: float
+
+# =========================
+#   PARQUET
+# =========================
+_META_CATEGORIAS = b"murc_categorias_texto"
+
+def _escribir_parquet(df: pd.DataFrame, ruta):
+    # Parquet no guarda el tipo de las categorías: las de texto (StringDtype,
+    # resultado compacto) se anotan en el esquema para restaurarlas al leer.
+    tabla = pa.Table.from_pandas(df)
+    texto = [
+        c for c in df.columns
+        if isinstance(df[c].dtype, pd.CategoricalDtype) and isinstance(df[c].cat.categories.dtype, pd.StringDtype)
+    ]
+    meta = {**(tabla.schema.metadata or {}), _META_CATEGORIAS: json.dumps(texto).encode()}
+    pq.write_table(tabla.replace_schema_metadata(meta), ruta)
+
+def _leer_parquet(ruta) -> pd.DataFrame:
+    tabla = pq.read_table(ruta)
+    df = tabla.to_pandas()
+    for c in json.loads((tabla.schema.metadata or {}).get(_META_CATEGORIAS, b"[]")):
+        tipo = pd.CategoricalDtype(df[c].cat.categories.astype("string"), ordered=df[c].cat.ordered)
+        df[c] = pd.Categorical.from_codes(df[c].cat.codes, dtype=tipo)
+    return df
+
+# =========================
+#   NIVEL EN DISCO
+# =========================
+_ESQUEMA = """
+CREATE TABLE IF NOT EXISTS entradas (
+    etapa   TEXT NOT NULL,
+    clave   TEXT NOT NULL,
+    archivo TEXT,               -- Parquet de una tabla, o
+    texto   TEXT,               -- un valor de texto (clave de resultado por archivo)
+    bytes   INTEGER NOT NULL,
+    creado  REAL NOT NULL,
+    usado   REAL NOT NULL,
+    PRIMARY KEY (etapa, clave)
+);
+CREATE INDEX IF NOT EXISTS ix_entradas_usado ON entradas(usado);
+CREATE TABLE IF NOT EXISTS contadores (
+    etapa  TEXT NOT NULL,
+    evento TEXT NOT NULL,
+    n      INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (etapa, evento)
+);
+"""
+
+class CacheDisco:
+    """Tablas en Parquet con un índice SQLite; varios procesos pueden usar el mismo directorio."""
+
+    def __init__(self, directorio=RUTA_CACHE, max_mb: float = MAX_MB_DISCO, ttl: float = TTL_CACHE):
+        if pq is None:
+            raise ValueError("El nivel en disco de la caché requiere el paquete 'pyarrow'.")
+        self.directorio = str(directorio)
+        os.makedirs(self.directorio, exist_ok=True)
+        self.max_bytes = int(max_mb * 2**20)
+        self.ttl = ttl
+        self._indice = os.path.join(self.directorio, "indice.db")
+        con = self._conectar()
+        try:
+            con.executescript(_ESQUEMA)
+        finally:
+            con.close()
+
+    def _conectar(self):
+        con = sqlite3.connect(self._indice, timeout=30)
+        con.execute("PRAGMA journal_mode=WAL")
+        con.execute("PRAGMA synchronous=NORMAL")
+        return con
+
+    def _contar(self, con, etapa: str, evento: str):
+        con.execute(
+            "INSERT INTO contadores VALUES (?, ?, 1) "
+            "ON CONFLICT(etapa, evento) DO UPDATE SET n = n + 1",
+            (etapa, evento),
+        )
+
+    def _borrar(self, con, filas, evento: str):
+        # El Parquet se borra aunque otro proceso lo esté leyendo: en Linux la
+        # lectura en curso sigue con el archivo abierto.
+        for etapa, clave, archivo in filas:
+            con.execute("DELETE FROM entradas WHERE etapa = ? AND clave = ?", (etapa, clave))
+            self._contar(con, etapa, evento)
+            if archivo:
+                try:
+                    os.remove(os.path.join(self.directorio, archivo))
+                except FileNotFoundError:
+                    pass
+
+    def _desalojar(self, con, ahora: float):
+        if self.ttl > 0:
+            vencidas = con.execute(
+                "SELECT etapa, clave, archivo FROM entradas WHERE creado < ?", (ahora - self.ttl,)
+            ).fetchall()
+            self._borrar(con, vencidas, "vencidas")
+        total = con.execute("SELECT COALESCE(SUM(bytes), 0) FROM entradas").fetchone()[0]
+        sobran = []
+        for etapa, clave, archivo, tamano in con.execute(
+            "SELECT etapa, clave, archivo, bytes FROM entradas ORDER BY usado"
+        ).fetchall():
+            if total <= self.max_bytes:
+                break
+            sobran.append((etapa, clave, archivo))
+            total -= tamano
+        self._borrar(con, sobran, "desalojos")
+
+    def buscar(self, etapa: str, clave: str):
+        """(valor, momento en que se guardó) o (None, None); registra el evento."""
+        con = self._conectar()
+        try:
+            fila = con.execute(
+                "SELECT archivo, texto, creado FROM entradas WHERE etapa = ? AND clave = ?", (etapa, clave)
+            ).fetchone()
+            ahora = time.time()
+            if fila is not None and self.ttl > 0 and ahora - fila[2] > self.ttl:
+                with con:
+                    self._borrar(con, [(etapa, clave, fila[0])], "vencidas")
+                fila = None
+            valor = None
+            if fila is not None:
+                archivo, valor, creado = fila
+                if archivo is not None:
+                    # Se lee fuera de la transacción para no bloquear a los demás procesos.
+                    try:
+                        valor = _leer_parquet(os.path.join(self.directorio, archivo))
+                    except (OSError, ValueError):
+                        # Borrado o incompleto (otro proceso lo desalojó): se descarta la entrada.
+                        with con:
+                            con.execute("DELETE FROM entradas WHERE etapa = ? AND clave = ?", (etapa, clave))
+                        valor = None
+            with con:
+                if valor is None:
+                    self._contar(con, etapa, "fallos")
+                    return None, None
+                con.execute("UPDATE entradas SET usado = ? WHERE etapa = ? AND clave = ?", (ahora, etapa, clave))
+                self._contar(con, etapa, "aciertos")
+            return valor, creado
+        finally:
+            con.close()
+
+    def guardar(self, etapa: str, clave: str, valor):
+        """Guarda un DataFrame (Parquet) o un texto; otros valores no se guardan en disco."""
+        if isinstance(valor, pd.DataFrame):
+            archivo = hashlib.sha256(f"{etapa}|{clave}".encode()).hexdigest() + ".parquet"
+            final = os.path.join(self.directorio, archivo)
+            fd, parcial = tempfile.mkstemp(dir=self.directorio, suffix=".parquet.tmp")
+            os.close(fd)
+            try:
+                _escribir_parquet(valor, parcial)
+                os.replace(parcial, final)
+            finally:
+                if os.path.exists(parcial):
+                    os.remove(parcial)
+            texto, tamano = None, os.path.getsize(final)
+        elif isinstance(valor, str):
+            archivo, texto, tamano = None, valor, len(valor.encode("utf-8"))
+        else:
+            return
+        ahora = time.time()
+        con = self._conectar()
+        try:
+            with con:
+                con.execute(
+                    "INSERT OR REPLACE INTO entradas VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (etapa, clave, archivo, texto, tamano, ahora, ahora),
+                )
+                self._desalojar(con, ahora)
+        finally:
+            con.close()
+
+    def ocupacion(self) -> tuple:
+        """(entradas, bytes) en disco."""
+        con = self._conectar()
+        try:
+            return tuple(con.execute("SELECT COUNT(*), COALESCE(SUM(bytes), 0) FROM entradas").fetchone())
+        finally:
+            con.close()
+
+    def contadores(self) -> list:
+        """Filas (etapa, aciertos, fallos, desalojos, vencidas) de todos los procesos."""
+        con = self._conectar()
+        try:
+            filas = con.execute("SELECT etapa, evento, n FROM contadores").fetchall()
+        finally:
+            con.close()
+        por_etapa = {}
+        for etapa, evento, n in filas:
+            por_etapa.setdefault(etapa, dict.fromkeys(EVENTOS, 0))[evento] = n
+        return [(etapa, *(c[e] for e in EVENTOS)) for etapa, c in por_etapa.items()]
+
+# =========================
+#   CACHÉ POR ETAPAS
+# =========================
+class CacheEtapas:
+    """LRU por tamaño en memoria, segura entre hilos, con vencimiento y un nivel opcional en disco.
+
+    ``max_mb`` limita la suma de los tamaños en memoria (``memoria_bytes``);
+    una entrada más grande que el límite solo se guarda en disco. ``ttl``
+    (segundos desde que se guardó; 0 = sin vencimiento) vale para ambos
+    niveles. Con ``directorio`` se agrega el nivel en disco (``CacheDisco``).
+    """
+
+    def __init__(self, max_mb: float = MAX_MB_MEMORIA, ttl: float = TTL_CACHE, directorio=None,
+                 max_mb_disco: float = MAX_MB_DISCO):
+        self.max_bytes = int(max_mb * 2**20)
+        self.ttl = ttl
+        # Sin pyarrow el nivel en disco queda deshabilitado.
+        self.disco = CacheDisco(directorio, max_mb_disco, ttl) if directorio and pq is not None else None
+        self._datos = OrderedDict()   # (etapa, clave) -> _Entrada, del menos al más reciente
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._contadores = {}
+
+    def _contar(self, etapa: str, tipo: str):
+        c = self._contadores.setdefault(etapa, dict.fromkeys(EVENTOS, 0))
+        c[tipo] += 1
+
+    def _quitar(self, llave, tipo: str):
+        self._bytes -= self._datos.pop(llave).bytes
+        self._contar(llave[0], tipo)
+
+    def _vencida(self, entrada: _Entrada, ahora: float) -> bool:
+        return self.ttl > 0 and ahora - entrada.creado > self.ttl
+
+    def consultar(self, etapa: str, clave: str):
+        """(valor o None, evento): «acierto», «acierto en disco» o «fallo». Registra el evento."""
+        llave = (etapa, clave)
+        with self._lock:
+            entrada = self._datos.get(llave)
+            if entrada is not None and self._vencida(entrada, time.time()):
+                self._quitar(llave, "vencidas")
+                entrada = None
+            if entrada is not None:
+                self._datos.move_to_end(llave)
+                self._contar(etapa, "aciertos")
+                return entrada.valor, "acierto"
+            self._contar(etapa, "fallos")
+        if self.disco is not None:
+            valor, creado = self.disco.buscar(etapa, clave)
+            if valor is not None:
+                self._en_memoria(etapa, clave, valor, creado)
+                return valor, "acierto en disco"
+        return None, "fallo"
+
+    def buscar(self, etapa: str, clave: str):
+        """Devuelve el valor guardado o None, y registra el acierto/fallo."""
+        return self.consultar(etapa, clave)[0]
+
+    def guardar(self, etapa: str, clave: str, valor):
+        self._en_memoria(etapa, clave, valor, time.time())
+        if self.disco is not None:
+            with medir("cache_disco", filas_entrada=len(valor) if isinstance(valor, pd.DataFrame) else None):
+                self.disco.guardar(etapa, clave, valor)
+
+    def _en_memoria(self, etapa: str, clave: str, valor, creado: float):
+        tamano = memoria_bytes(valor)
+        llave = (etapa, clave)
+        with self._lock:
+            if llave in self._datos:
+                self._bytes -= self._datos.pop(llave).bytes
+            if tamano > self.max_bytes:
+                return
+            self._datos[llave] = _Entrada(valor, tamano, creado)
+            self._bytes += tamano
+            ahora = time.time()
+            for vieja in [k for k, e in self._datos.items() if self._vencida(e, ahora)]:
+                self._quitar(vieja, "vencidas")
+            while self._bytes > self.max_bytes:
+                self._quitar(next(iter(self._datos)), "desalojos")
+
+    def estadisticas(self) -> pd.DataFrame:
+        """Eventos por nivel y etapa (los de disco suman todos los procesos que comparten el directorio)."""
+        with self._lock:
+            filas = [("memoria", etapa, *(c[e] for e in EVENTOS)) for etapa, c in self._contadores.items()]
+        if self.disco is not None:
+            filas += [("disco", *fila) for fila in self.disco.contadores()]
+        return pd.DataFrame(filas, columns=COLUMNAS_ESTADISTICAS)
+
+    def ocupacion(self) -> pd.DataFrame:
+        """Entradas y MB por nivel, con su límite."""
+        with self._lock:
+            filas = [("memoria", len(self._datos), self._bytes, self.max_bytes)]
+        if self.disco is not None:
+            filas.append(("disco", *self.disco.ocupacion(), self.disco.max_bytes))
+        tabla = pd.DataFrame(filas, columns=["Nivel", "Entradas", "MB", "Límite MB"])
+        tabla[["MB", "Límite MB"]] = (tabla[["MB", "Límite MB"]] / 2**20).round(1)
+        return tabla
+
+def _clave_resultado(huellas: dict) -> str:
+    return hashlib.sha256("|".join(huellas[h] for h in HOJAS).encode()).hexdigest()
+
+def procesar_con_cache(origen, cache: CacheEtapas, paralelo=None, compacto: bool = False,
+                       inteligencia=None, huella: str = None) -> Procesado:
+    """Puntúa ``origen`` reutilizando las etapas ya calculadas.
+
+    Con ``compacto`` el resultado se guarda y devuelve en la representación
+    compacta (``compacto.py``); las hojas normalizadas son las mismas. Con
+    ``inteligencia`` (``IndiceInteligencia``) la hoja CVSSF se completa con
+    los feeds locales y la versión del índice entra en la clave del resultado.
+    ``huella`` es el SHA-256 del archivo si ya se calculó (``huella_archivo``).
+    """
+    if huella is None:
+        with medir("huella_archivo"):
+            huella = huella_archivo(origen)
+    if inteligencia is not None:
+        huella = hashlib.sha256(f"{huella}|{inteligencia.version}".encode()).hexdigest()
+    etapa = ETAPA_RESULTADO_COMPACTO if compacto else ETAPA_RESULTADO
+
+    # Un archivo ya visto apunta a la clave de su resultado, sin abrir el zip.
+    eventos, huellas = {}, None
+    clave, eventos[ETAPA_ARCHIVO] = cache.consultar(ETAPA_ARCHIVO, huella)
+    if clave is None:
+        with medir("huellas"):
+            huellas = huellas_hojas(origen, HOJAS)
+        clave = _clave_resultado(huellas)
+        if inteligencia is not None:
+            clave = hashlib.sha256(f"{clave}|{inteligencia.version}".encode()).hexdigest()
+        cache.guardar(ETAPA_ARCHIVO, huella, clave)
+    resultado, eventos[etapa] = cache.consultar(etapa, clave)
+    if resultado is not None:
+        return Procesado(resultado, eventos, clave)
+
+    if huellas is None:
+        with medir("huellas"):
+            huellas = huellas_hojas(origen, HOJAS)
+    frames = {}
+    for hoja in HOJAS:
+        frames[hoja], eventos[hoja] = cache.consultar(hoja, huellas[hoja])
+
+    faltantes = [h for h in HOJAS if frames[h] is None]
+    if faltantes:
+        leidas, _ = leer_hojas(origen, faltantes, paralelo=paralelo)
+        for hoja, df in leidas.items():
+            cache.guardar(hoja, huellas[hoja], df)
+            frames[hoja] = df
+
+    cvssf_df = frames[HOJA_CVSSF]
+    if inteligencia is not None:
+        cvssf_df = enriquecer_cvssf(cvssf_df, inteligencia, frames[HOJA_ESCANEO]["Identificador"])
+    resultado = puntuar(frames[HOJA_ESCANEO], cvssf_df, frames[HOJA_CRITICIDAD], compacto=compacto)
+    cache.guardar(etapa, clave, resultado)
+    return Procesado(resultado, eventos, clave)
@@ -0,0 +1,143 @@
+"""Prueba de carga del servicio de puntuación (``servicio.py``).
+
+Varios clientes concurrentes, cada uno con su conexión HTTP/1.1 persistente,
+envían lotes sintéticos de hallazgos a ``POST /puntuar``. Se informa el
+rendimiento (solicitudes y hallazgos por segundo) y las latencias p50/p99::
+
+    python -m murc carga --levantar --clientes 8 --solicitudes 200 --filas 20
+"""
+import http.client
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from dataclasses import dataclass, field
+from urllib.parse import urlparse
+
+import numpy as np
+
+from .servicio import PUERTO, TOKEN
+from .sintetico import CRITICIDADES, CRITICIDADES_INVALIDAS
+
+@dataclass
+class InformeCarga:
+    solicitudes: int = 0
+    hallazgos: int = 0
+    errores: int = 0
+    segundos: float = 0.0
+    latencias: list = field(default_factory=list, repr=False)   # segundos por solicitud exitosa
+
+    def percentil(self, p: float) -> float:
+        return float(np.percentile(self.latencias, p)) * 1000 if self.latencias else float("nan")
+
+    def __str__(self):
+        s = max(self.segundos, 1e-9)
+        return (
+            f"{self.solicitudes} solicitudes ({self.errores} errores) en {self.segundos:.1f} s: "
+            f"{self.solicitudes / s:.0f} sol/s, {self.hallazgos / s:.0f} hallazgos/s, "
+            f"p50 {self.percentil(50):.1f} ms, p99 {self.percentil(99):.1f} ms"
+        )
+
+def lotes_sinteticos(n_lotes: int, filas: int, semilla: int = 0, formato: str = "json") -> list:
+    """Cuerpos de solicitud con ``filas`` hallazgos cada uno (JSON o CSV)."""
+    rng = np.random.default_rng(semilla)
+    criticidades = CRITICIDADES + CRITICIDADES_INVALIDAS
+    cuerpos = []
+    for _ in range(n_lotes):
+        ids = [f"CVE-{a}-{n}" for a, n in zip(rng.integers(2015, 2026, filas), rng.integers(1000, 60000, filas))]
+        activos = [f"SRV-{i:05d}" for i in rng.integers(0, 5000, filas)]
+        cvss = rng.integers(0, 101, filas) / 10
+        cvssf = np.round(4.0 ** (cvss - 4), 2)
+        crit = rng.choice(criticidades, filas)
+        if formato == "csv":
+            lineas = ["Identificador,Activo,CVSS,CVSSF,Criticidad"]
+            lineas += [f"{i},{a},{c},{f},{k}" for i, a, c, f, k in zip(ids, activos, cvss, cvssf, crit)]
+            cuerpos.append("\n".join(lineas).encode("utf-8"))
+        else:
+            hallazgos = [
+                {"Identificador": i, "Activo": a, "CVSS": float(c), "CVSSF": float(f), "Criticidad": str(k)}
+                for i, a, c, f, k in zip(ids, activos, cvss, cvssf, crit)
+            ]
+            cuerpos.append(json.dumps({"hallazgos": hallazgos}).encode("utf-8"))
+    return cuerpos
+
+def ejecutar_carga(url: str, clientes: int = 8, solicitudes: int = 100, filas: int = 20, perfil: str = None,
+                   formato: str = "json", token: str = TOKEN, semilla: int = 0) -> InformeCarga:
+    """``clientes`` hilos envían ``solicitudes`` lotes cada uno, reutilizando su conexión."""
+    destino = urlparse(url)
+    ruta = "/puntuar" + (f"?perfil={perfil}" if perfil else "")
+    encabezados = {"Content-Type": "text/csv" if formato == "csv" else "application/json"}
+    if token:
+        encabezados["Authorization"] = f"Bearer {token}"
+    cuerpos = lotes_sinteticos(min(solicitudes, 50), filas, semilla, formato)
+    informe, lock = InformeCarga(), threading.Lock()
+    inicio = threading.Barrier(clientes + 1)
+
+    def cliente(n):
+        conexion = http.client.HTTPConnection(destino.hostname, destino.port or PUERTO, timeout=60)
+        latencias, errores = [], 0
+        inicio.wait()
+        for k in range(solicitudes):
+            t0 = time.perf_counter()
+            try:
+                conexion.request("POST", ruta, body=cuerpos[(n + k) % len(cuerpos)], headers=encabezados)
+                respuesta = conexion.getresponse()
+                respuesta.read()
+                if respuesta.status == 200:
+                    latencias.append(time.perf_counter() - t0)
+                else:
+                    errores += 1
+            except (OSError, http.client.HTTPException):
+                errores += 1
+                conexion.close()          # se reconecta en la próxima solicitud
+        conexion.close()
+        with lock:
+            informe.latencias += latencias
+            informe.errores += errores
+
+    hilos = [threading.Thread(target=cliente, args=(n,)) for n in range(clientes)]
+    for h in hilos:
+        h.start()
+    inicio.wait()
+    t0 = time.perf_counter()
+    for h in hilos:
+        h.join()
+    informe.segundos = time.perf_counter() - t0
+    informe.solicitudes = clientes * solicitudes
+    informe.hallazgos = len(informe.latencias) * filas
+    return informe
+
+def levantar_local(puerto: int, procesos=None, espera_ms=None, timeout: float = 30.0) -> subprocess.Popen:
+    """Inicia ``python -m murc servir`` en otro proceso y espera a que responda /salud."""
+    cmd = [sys.executable, "-m", "murc", "servir", "--puerto", str(puerto)]
+    if procesos:
+        cmd += ["--procesos", str(procesos)]
+    if espera_ms is not None:
+        cmd += ["--espera-ms", str(espera_ms)]
+    proceso = subprocess.Popen(cmd, env=os.environ.copy())
+    limite = time.monotonic() + timeout
+    while time.monotonic() < limite:
+        if proceso.poll() is not None:
+            raise RuntimeError(f"el servicio terminó al iniciar (código {proceso.returncode})")
+        try:
+            conexion = http.client.HTTPConnection("127.0.0.1", puerto, timeout=1)
+            conexion.request("GET", "/salud")
+            if conexion.getresponse().status == 200:
+                return proceso
+        except OSError:
+            time.sleep(0.2)
+    detener_local(proceso)
+    raise TimeoutError(f"el servicio no respondió en {timeout:.0f} s")
+
+def detener_local(proceso: subprocess.Popen, timeout: float = 10.0) -> None:
+    """Detiene el servicio de ``levantar_local`` (SIGTERM y, si no termina a tiempo, SIGKILL)."""
+    if proceso.poll() is not None:
+        return
+    proceso.terminate()
+    try:
+        proceso.wait(timeout)
+    except subprocess.TimeoutExpired:
+        proceso.kill()
+        proceso.wait()
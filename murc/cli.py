@@ -0,0 +1,291 @@
+"""Línea de comandos MURC (uso en cron / procesos por lotes, sin navegador).
+
+Ejemplo::
+
+    python -m murc puntuar escaneo_nocturno.xlsx -o resultado.csv
+"""
+import argparse
+import os
+import sys
+import time
+from contextlib import nullcontext
+from urllib.parse import urlparse
+
+from .carga import detener_local, ejecutar_carga, levantar_local
+from .diferencias import comparar
+from .exportar import FORMATOS, escribir_csv, formato_por_extension
+from .historial import RUTA_HISTORIAL, HistorialMURC
+from .ingesta import leer_libro
+from .inteligencia import RUTA_INTELIGENCIA, IndiceInteligencia, compilar
+from .lectura import TAM_BLOQUE
+from .lotes import archivos_de_directorio, puntuar_lote
+from .motor import puntuar_archivo, puntuar_libro
+from .nucleo import PERFIL_MURC
+from .perfiles import RUTA_PERFILES, cargar_perfiles, rejilla_perfiles, repuntuar, sensibilidad
+from .rendimiento import (
+    RUTA_LINEA_BASE, TAMANOS, UMBRAL_REGRESION,
+    cargar_linea_base, comparar_con_base, ejecutar, etapas_disponibles, guardar_linea_base,
+)
+from .servicio import ESPERA_LOTE, MAX_FILAS_LOTE, PUERTO, servir
+from .sintetico import generar_libro
+
+def _perfil(nombre, ruta):
+    perfiles = {p.nombre: p for p in cargar_perfiles(ruta)}
+    if nombre not in perfiles:
+        raise KeyError(f"perfil '{nombre}' no encontrado; disponibles: {', '.join(perfiles)}")
+    return perfiles[nombre]
+
+def _cmd_puntuar(args) -> int:
+    formato = args.formato or formato_por_extension(args.salida)
+    perfil = _perfil(args.perfil, args.perfiles)
+    corrida = nullcontext()
+    if args.historial:
+        corrida = HistorialMURC(args.historial).corrida(args.fecha_escaneo, origen=os.path.basename(args.archivo),
+                                                        perfil=perfil.nombre)
+    with corrida as c:
+        resumen = puntuar_archivo(
+            args.archivo, args.salida, tam_bloque=args.tam_bloque, sep=args.sep, formato=formato,
+            al_bloque=c.agregar if c else None, perfil=perfil,
+            inteligencia=args.inteligencia,
+        )
+    print(
+        f"{resumen.filas_escaneo} filas de Escaneo -> {resumen.filas_escritas} filas puntuadas "
+        f"({resumen.bloques} bloques, {resumen.segundos:.1f} s) en {args.salida}",
+        file=sys.stderr,
+    )
+    return 0
+
+def _cmd_ingesta(args) -> int:
+    modos = [False, True] if args.comparar else [False if args.secuencial else None]
+    for paralelo in modos:
+        print(leer_libro(args.archivo, paralelo=paralelo).informe)
+    return 0
+
+def _cargar_resultado(ref: str, historial):
+    # Un número se interpreta como id de corrida del histórico; si no, como libro .xlsx.
+    # Las corridas puntuadas con otro perfil se llevan a MURC para comparar lo mismo.
+    if historial and ref.isdigit():
+        h = HistorialMURC(historial)
+        desde = PERFIL_MURC if h.perfil(int(ref)) == PERFIL_MURC.nombre else None
+        return repuntuar(h.hallazgos(int(ref)), PERFIL_MURC, desde)
+    return puntuar_libro(ref)
+
+def _cmd_diferencias(args) -> int:
+    dif = comparar(_cargar_resultado(args.anterior, args.historial), _cargar_resultado(args.actual, args.historial))
+    for nombre, valor in dif.kpis().items():
+        print(f"{nombre:<14} {valor:>10}")
+    print()
+    print(dif.matriz_transicion().to_string())
+    if args.salida:
+        escribir_csv([dif.detalle], args.salida)
+    return 0
+
+def _cmd_lote(args) -> int:
+    archivos = {}
+    for ruta in args.entradas:
+        archivos.update(archivos_de_directorio(ruta) if os.path.isdir(ruta) else {os.path.basename(ruta): ruta})
+    if not archivos:
+        raise FileNotFoundError("no se encontraron libros .xlsx en la entrada")
+
+    def avance(hechos, total, info):
+        estado = f"❌ {info.error}" if info.error else f"{info.filas} filas"
+        print(f"[{hechos}/{total}] {info.origen}: {estado} ({info.segundos:.1f} s)", file=sys.stderr)
+
+    lote = puntuar_lote(archivos, max_procesos=args.procesos, al_avanzar=avance, inteligencia=args.inteligencia)
+    formato = args.formato or formato_por_extension(args.salida)
+    FORMATOS[formato][0]([lote.resultado], args.salida)
+    print(
+        f"{len(archivos) - len(lote.errores)}/{len(archivos)} libros -> {len(lote.resultado)} filas "
+        f"({lote.segundos:.1f} s) en {args.salida}",
+        file=sys.stderr,
+    )
+    return 1 if lote.errores else 0
+
+def _cmd_sintetico(args) -> int:
+    tamanos = generar_libro(args.salida, args.hallazgos, semilla=args.semilla)
+    print(", ".join(f"{hoja}: {n} filas" for hoja, n in tamanos.items()) + f" en {args.salida}", file=sys.stderr)
+    return 0
+
+def _cmd_rendimiento(args) -> int:
+    def mostrar(fila):
+        memoria = "" if fila["Memoria_MB"] is None else f"{fila['Memoria_MB']:>9.1f} MB"
+        print(f"{fila['Tamaño']:>9} {fila['Etapa']:<17} {fila['Segundos']:>9.3f} s {memoria}", file=sys.stderr)
+
+    mediciones = ejecutar(args.tamanos, args.etapas, repeticiones=args.repeticiones, memoria=not args.sin_memoria,
+                          directorio=args.directorio, semilla=args.semilla, al_medir=mostrar)
+    if args.guardar_base:
+        guardar_linea_base(mediciones, args.guardar_base, args.base)
+        print(f"Línea base '{args.guardar_base}' guardada en {args.base}", file=sys.stderr)
+    if args.comparar is None:
+        return 0
+    comparacion = comparar_con_base(mediciones, cargar_linea_base(args.comparar or None, args.base), args.umbral)
+    print(comparacion.to_string(index=False))
+    return 1 if comparacion["Regresión"].any() else 0
+
+def _cmd_sensibilidad(args) -> int:
+    perfiles = rejilla_perfiles(args.paso, args.umbrales, args.max_cvssf) if args.rejilla or not args.perfiles else []
+    if args.perfiles:
+        perfiles += cargar_perfiles(args.perfiles)
+    resultado = puntuar_libro(args.archivo)
+    t0 = time.perf_counter()
+    tabla = sensibilidad(resultado, perfiles, base=_perfil(args.base, args.perfiles))
+    print(
+        f"{len(perfiles)} perfiles x {len(resultado)} hallazgos ({time.perf_counter() - t0:.2f} s)",
+        file=sys.stderr,
+    )
+    tabla = tabla.sort_values("Cambian", ascending=False, kind="stable")
+    print(tabla.head(args.mostrar).to_string(index=False))
+    if args.salida:
+        escribir_csv([tabla], args.salida)
+    return 0
+
+def _cmd_inteligencia(args) -> int:
+    if args.nvd or args.epss or args.kev or args.completo:
+        print(compilar(args.indice, nvd=args.nvd, epss=args.epss, kev=args.kev, completo=args.completo), file=sys.stderr)
+    indice = IndiceInteligencia(args.indice)
+    if args.buscar:
+        t0 = time.perf_counter()
+        datos = indice.buscar(args.buscar)
+        print(datos.assign(Identificador=args.buscar).set_index("Identificador").to_string())
+        print(f"{len(args.buscar)} búsquedas en {1000 * (time.perf_counter() - t0):.1f} ms", file=sys.stderr)
+    elif not (args.nvd or args.epss or args.kev):
+        print(f"{len(indice)} CVE (versión {indice.version[:12]})")
+        print(indice.fuentes().to_string(index=False))
+    return 0
+
+def _cmd_servir(args) -> int:
+    def al_iniciar(servidor):
+        host, puerto = servidor.server_address[:2]
+        print(f"Servicio MURC en http://{host}:{puerto} ({servidor.agrupador.procesos} procesos)", file=sys.stderr)
+
+    servir(args.host, args.puerto, procesos=args.procesos, espera=args.espera_ms / 1000, max_filas=args.max_lote,
+           inteligencia=args.inteligencia, perfiles=cargar_perfiles(args.perfiles), verboso=args.verboso,
+           al_iniciar=al_iniciar)
+    return 0
+
+def _cmd_carga(args) -> int:
+    url, servicio = args.url, None
+    if args.levantar:
+        servicio = levantar_local(urlparse(url).port or PUERTO, args.procesos, args.espera_ms)
+    try:
+        informe = ejecutar_carga(url, args.clientes, args.solicitudes, args.filas, perfil=args.perfil, formato=args.formato)
+    finally:
+        if servicio is not None:
+            detener_local(servicio)
+    print(informe)
+    return 1 if informe.errores else 0
+
+def _umbrales(texto: str) -> tuple:
+    return tuple(float(u) for u in texto.split(","))
+
+def construir_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="murc", description="Modelo Unificado de Riesgo Cibernético (MURC)")
+    sub = parser.add_subparsers(dest="comando", required=True)
+
+    p = sub.add_parser("puntuar", help="Puntúa un libro Excel y escribe el resultado (CSV, xlsx o Parquet)")
+    p.add_argument("archivo", help="Libro .xlsx con las hojas Escaneo, CVSSF y Criticidad_Activos")
+    p.add_argument("-o", "--salida", required=True, help="Archivo de salida")
+    p.add_argument("--formato", choices=list(FORMATOS), help="Formato de salida (por defecto, según la extensión; si no, csv)")
+    p.add_argument("--tam-bloque", type=int, default=TAM_BLOQUE, help=f"Filas de Escaneo por bloque (por defecto {TAM_BLOQUE})")
+    p.add_argument("--sep", default=",", help="Separador del CSV (por defecto ',')")
+    p.add_argument("--historial", nargs="?", const=RUTA_HISTORIAL, help=f"Agrega la corrida al histórico SQLite (por defecto {RUTA_HISTORIAL})")
+    p.add_argument("--fecha-escaneo", help="Fecha del escaneo para el histórico (AAAA-MM-DD, por defecto hoy)")
+    p.add_argument("--perfil", default="MURC", help="Perfil de puntuación (por defecto MURC: 0.5/0.3/0.2)")
+    p.add_argument("--perfiles", default=RUTA_PERFILES, help="JSON con perfiles propios (por defecto MURC_PERFILES)")
+    p.add_argument("--inteligencia", nargs="?", const=RUTA_INTELIGENCIA, help=f"Completa CVSS/CVSSF con el índice de feeds (por defecto {RUTA_INTELIGENCIA})")
+    p.set_defaults(func=_cmd_puntuar)
+
+    p = sub.add_parser("ingesta", help="Mide el tiempo de lectura por hoja de un libro Excel")
+    p.add_argument("archivo", help="Libro .xlsx a medir")
+    modo = p.add_mutually_exclusive_group()
+    modo.add_argument("--secuencial", action="store_true", help="Lee las hojas una tras otra")
+    modo.add_argument("--comparar", action="store_true", help="Mide secuencial y paralelo sobre el mismo archivo")
+    p.set_defaults(func=_cmd_ingesta)
+
+    p = sub.add_parser("diferencias", help="Compara dos escaneos: nuevas, remediadas y persistentes")
+    p.add_argument("anterior", help="Libro .xlsx anterior o id de corrida del histórico")
+    p.add_argument("actual", help="Libro .xlsx actual o id de corrida del histórico")
+    p.add_argument("--historial", nargs="?", const=RUTA_HISTORIAL, help="Histórico SQLite para resolver ids de corrida")
+    p.add_argument("-o", "--salida", help="CSV con el detalle por (Activo, Identificador)")
+    p.set_defaults(func=_cmd_diferencias)
+
+    p = sub.add_parser("sensibilidad", help="Cuántos hallazgos cambian de nivel con otros pesos y umbrales")
+    p.add_argument("archivo", help="Libro .xlsx a puntuar")
+    p.add_argument("--paso", type=float, default=0.1, help="Paso de la rejilla de pesos (por defecto 0.1)")
+    p.add_argument("--umbrales", type=_umbrales, nargs="+", help="Juegos de umbrales, p. ej. 0.25,0.5,0.75 0.3,0.55,0.8")
+    p.add_argument("--max-cvssf", type=float, nargs="+", help="Normalizadores de CVSSF a probar (por defecto 4096)")
+    p.add_argument("--perfiles", default=RUTA_PERFILES, help="JSON con perfiles propios a evaluar (además o en lugar de la rejilla)")
+    p.add_argument("--rejilla", action="store_true", help="Con --perfiles, evalúa también la rejilla de pesos")
+    p.add_argument("--base", default="MURC", help="Perfil contra el que se cuentan los cambios (por defecto MURC)")
+    p.add_argument("--mostrar", type=int, default=20, help="Perfiles a mostrar, de más a menos cambios")
+    p.add_argument("-o", "--salida", help="CSV con la tabla completa")
+    p.set_defaults(func=_cmd_sensibilidad)
+
+    p = sub.add_parser("lote", help="Puntúa varios libros (p. ej. uno por filial) en paralelo y consolida")
+    p.add_argument("entradas", nargs="+", help="Directorios y/o libros .xlsx")
+    p.add_argument("-o", "--salida", required=True, help="Archivo consolidado (con la columna Origen)")
+    p.add_argument("--formato", choices=list(FORMATOS), help="Formato de salida (por defecto, según la extensión; si no, csv)")
+    p.add_argument("--procesos", type=int, help="Procesos en paralelo (por defecto, uno por núcleo)")
+    p.add_argument("--inteligencia", nargs="?", const=RUTA_INTELIGENCIA, help=f"Completa CVSS/CVSSF con el índice de feeds (por defecto {RUTA_INTELIGENCIA})")
+    p.set_defaults(func=_cmd_lote)
+
+    p = sub.add_parser("inteligencia", help="Compila o consulta el índice local de NVD, EPSS y KEV")
+    p.add_argument("--nvd", nargs="+", help="Feeds NVD JSON (archivos o directorios, admite .gz)")
+    p.add_argument("--epss", nargs="+", help="CSV de EPSS (archivos o directorios, admite .gz)")
+    p.add_argument("--kev", nargs="+", help="Catálogo KEV de CISA (JSON o CSV)")
+    p.add_argument("-o", "--indice", default=RUTA_INTELIGENCIA, help=f"Índice a crear o actualizar (por defecto {RUTA_INTELIGENCIA})")
+    p.add_argument("--completo", action="store_true", help="Reconstruye el índice desde cero en lugar de actualizarlo")
+    p.add_argument("--buscar", nargs="+", metavar="CVE", help="Muestra los datos de estos identificadores")
+    p.set_defaults(func=_cmd_inteligencia)
+
+    p = sub.add_parser("servir", help="Servicio HTTP local de puntuación (JSON o CSV de hallazgos)")
+    p.add_argument("--host", default="127.0.0.1", help="Dirección de escucha (por defecto 127.0.0.1)")
+    p.add_argument("--puerto", type=int, default=PUERTO, help=f"Puerto (por defecto {PUERTO}, o MURC_PUERTO_SERVICIO)")
+    p.add_argument("--procesos", type=int, help="Procesos de puntuación (por defecto, uno por núcleo)")
+    p.add_argument("--espera-ms", type=float, default=ESPERA_LOTE * 1000, help=f"Espera máxima para juntar solicitudes pequeñas (por defecto {ESPERA_LOTE * 1000:g} ms)")
+    p.add_argument("--max-lote", type=int, default=MAX_FILAS_LOTE, help=f"Filas por micro-lote; solicitudes mayores van solas (por defecto {MAX_FILAS_LOTE})")
+    p.add_argument("--perfiles", default=RUTA_PERFILES, help="JSON con perfiles propios, elegibles con ?perfil=NOMBRE")
+    p.add_argument("--inteligencia", nargs="?", const=RUTA_INTELIGENCIA, help=f"Completa CVSS/CVSSF con el índice de feeds (por defecto {RUTA_INTELIGENCIA})")
+    p.add_argument("--verboso", action="store_true", help="Registra cada solicitud en stderr")
+    p.set_defaults(func=_cmd_servir)
+
+    p = sub.add_parser("carga", help="Prueba de carga del servicio: solicitudes/s y latencia p50/p99")
+    p.add_argument("--url", default=f"http://127.0.0.1:{PUERTO}", help=f"Servicio a probar (por defecto http://127.0.0.1:{PUERTO})")
+    p.add_argument("--levantar", action="store_true", help="Inicia un servicio local en el puerto de --url durante la prueba")
+    p.add_argument("--procesos", type=int, help="Con --levantar, procesos del servicio")
+    p.add_argument("--espera-ms", type=float, help="Con --levantar, espera de los micro-lotes")
+    p.add_argument("--clientes", type=int, default=8, help="Clientes concurrentes (por defecto 8)")
+    p.add_argument("--solicitudes", type=int, default=100, help="Solicitudes por cliente (por defecto 100)")
+    p.add_argument("--filas", type=int, default=20, help="Hallazgos por solicitud (por defecto 20)")
+    p.add_argument("--perfil", help="Perfil de puntuación (por defecto MURC)")
+    p.add_argument("--formato", choices=["json", "csv"], default="json", help="Formato de las solicitudes")
+    p.set_defaults(func=_cmd_carga)
+
+    p = sub.add_parser("sintetico", help="Genera un libro MURC sintético (alias, comas decimales, criticidad incompleta)")
+    p.add_argument("salida", help="Libro .xlsx a generar")
+    p.add_argument("-n", "--hallazgos", type=int, default=100_000, help="Filas de la hoja Escaneo (por defecto 100000)")
+    p.add_argument("--semilla", type=int, default=0, help="Semilla aleatoria (por defecto 0)")
+    p.set_defaults(func=_cmd_sintetico)
+
+    p = sub.add_parser("rendimiento", help="Mide tiempo y memoria por etapa sobre libros sintéticos")
+    p.add_argument("--tamanos", type=int, nargs="+", default=TAMANOS, help=f"Hallazgos por libro (por defecto {' '.join(map(str, TAMANOS))})")
+    p.add_argument("--etapas", nargs="+", choices=etapas_disponibles(), help="Etapas a medir (por defecto todas)")
+    p.add_argument("--repeticiones", type=int, default=1, help="Corridas por etapa; se informa la más rápida")
+    p.add_argument("--sin-memoria", action="store_true", help="No mide el pico de memoria (más rápido)")
+    p.add_argument("--directorio", help="Dónde generar y reutilizar los libros sintéticos")
+    p.add_argument("--semilla", type=int, default=0, help="Semilla de los libros sintéticos")
+    p.add_argument("--base", default=RUTA_LINEA_BASE, help=f"JSON de líneas base (por defecto {RUTA_LINEA_BASE})")
+    p.add_argument("--guardar-base", metavar="ETIQUETA", help="Guarda las mediciones como línea base ETIQUETA")
+    p.add_argument("--comparar", nargs="?", const="", metavar="ETIQUETA", help="Compara con la línea base ETIQUETA (por defecto, la última)")
+    p.add_argument("--umbral", type=float, default=UMBRAL_REGRESION, help=f"Razón actual/base que cuenta como regresión (por defecto {UMBRAL_REGRESION})")
+    p.set_defaults(func=_cmd_rendimiento)
+
+    return parser
+
+def main(argv=None) -> int:
+    args = construir_parser().parse_args(argv)
+    try:
+        return args.func(args)
+    except (ValueError, KeyError, FileNotFoundError) as e:
+        print(f"❌ Error al procesar el archivo: {e}", file=sys.stderr)
+        return 2
@@ -0,0 +1,87 @@
+"""Representación compacta del resultado puntuado.
+
+* Activo, Identificador y Criticidad se codifican como diccionario
+  (``category``): cada texto distinto se guarda una vez y las filas llevan
+  un código entero.
+* CVSS, CVSSF y riesgo pasan a float32.
+* Nivel de Exposición es una categoría con los niveles fijos (códigos int8).
+
+La deduplicación se hace sobre los códigos y no sobre los textos. El nivel
+se calcula antes de reducir a float32, así que coincide con el del modo
+normal; riesgo, CVSS y CVSSF conservan unos 7 dígitos significativos.
+"""
+import sys
+
+import numpy as np
+import pandas as pd
+
+from .nucleo import COLUMNAS_RESULTADO, NIVELES, NIVEL_SIN_DATO
+
+CLAVES = ["Activo", "Identificador", "Criticidad"]
+PUNTAJES = ["CVSS", "CVSSF", "riesgo"]
+TIPO_NIVEL = pd.CategoricalDtype(NIVELES + [NIVEL_SIN_DATO])
+
+def es_compacto(df: pd.DataFrame) -> bool:
+    return isinstance(df["Nivel de Exposición"].dtype, pd.CategoricalDtype)
+
+def compactar(df: pd.DataFrame, deduplicar: bool = True) -> pd.DataFrame:
+    """Resultado con ``COLUMNAS_RESULTADO`` en representación compacta.
+
+    Con ``deduplicar`` quita las filas repetidas igual que ``drop_duplicates``
+    (se conserva la primera), comparando códigos en lugar de textos.
+    """
+    claves = {c: df[c].astype("category") for c in CLAVES}
+    if deduplicar:
+        # riesgo y nivel dependen solo de CVSS, CVSSF y Criticidad: basta con las cinco columnas.
+        codigos = pd.DataFrame({**{c: s.cat.codes for c, s in claves.items()}, "CVSS": df["CVSS"], "CVSSF": df["CVSSF"]})
+        repetidas = codigos.duplicated().to_numpy()
+        if repetidas.any():
+            filas = np.flatnonzero(~repetidas)
+            claves = {c: s.iloc[filas] for c, s in claves.items()}
+            df = df.iloc[filas]
+    compacto = pd.DataFrame({
+        **{c: s.array for c, s in claves.items()},
+        **{c: df[c].to_numpy(dtype="float32", na_value=np.nan) for c in PUNTAJES},
+        "Nivel de Exposición": pd.Categorical(df["Nivel de Exposición"], dtype=TIPO_NIVEL),
+    })
+    return compacto[COLUMNAS_RESULTADO]
+
+def ampliar_float32(df: pd.DataFrame) -> pd.DataFrame:
+    """Columnas float32 como float64 con su valor decimal más corto (7.8 y no 7.800000190734863)."""
+    f32 = [c for c in df.columns if df[c].dtype == np.float32]
+    if not f32:
+        return df
+    return df.assign(**{c: df[c].to_numpy().astype("U").astype("float64") for c in f32})
+
+# =========================
+#   MEMORIA
+# =========================
+def memoria_bytes(obj, vistos=None) -> int:
+    """Tamaño aproximado en memoria de ``obj`` y lo que referencia (cada objeto se cuenta una vez)."""
+    vistos = set() if vistos is None else vistos
+    if id(obj) in vistos:
+        return 0
+    vistos.add(id(obj))
+    if isinstance(obj, pd.DataFrame):
+        return int(obj.memory_usage(deep=True).sum())
+    if isinstance(obj, (pd.Series, pd.Index)):
+        return int(obj.memory_usage(deep=True))
+    if isinstance(obj, np.ndarray):
+        return obj.nbytes
+    tamano = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        tamano += sum(memoria_bytes(k, vistos) + memoria_bytes(v, vistos) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        tamano += sum(memoria_bytes(v, vistos) for v in obj)
+    elif hasattr(obj, "__dict__"):
+        tamano += memoria_bytes(vars(obj), vistos)
+    return tamano
+
+def memoria_sesion(estado) -> pd.DataFrame:
+    """MB por clave de un estado de sesión (objetos compartidos entre claves se cuentan en la primera)."""
+    vistos, filas = set(), []
+    for clave in list(estado.keys()):
+        filas.append((clave, memoria_bytes(estado[clave], vistos) / 2**20))
+    tabla = pd.DataFrame(filas, columns=["Objeto", "MB"])
+    tabla["MB"] = tabla["MB"].round(2)
+    return tabla.sort_values("MB", ascending=False, ignore_index=True)
@@ -0,0 +1,152 @@
+"""Cubo de agregados para los KPIs y gráficos del tablero.
+
+Se construye una vez por resultado (archivo + perfil): una celda por
+combinación distinta de Activo × Criticidad × Nivel de Exposición ×
+Nivel_CVSS con la cantidad de hallazgos, las sumas de CVSS, CVSSF y riesgo
+y la posición de su primera fila. Los filtros del panel (nivel, criticidad y
+activo) son dimensiones del cubo, así que se aplican sobre las celdas y no
+sobre las filas: refrescar el tablero cuesta según los activos distintos y
+no según los hallazgos.
+
+Reproduce lo que la interfaz calculaba con ``groupby`` sobre las filas
+filtradas, incluido el «first» por activo (la primera fila con dato, en el
+orden del resultado).
+"""
+import numpy as np
+import pandas as pd
+
+from .nucleo import NIVELES, NIVEL_SIN_DATO, ORDEN_NIVEL
+
+BINS_CVSS = [-0.01, 2.5, 5.0, 7.5, float("inf")]
+
+def nivel_cvss(cvss: pd.Series) -> pd.Series:
+    """Nivel que correspondería solo por CVSS (mismos cortes de 2.5, 5 y 7.5)."""
+    return pd.cut(
+        cvss.astype("float64").fillna(-0.01),   # en float64: -0.01 en float32 cae dentro del primer bin
+        bins=BINS_CVSS, labels=NIVELES
+    ).astype("string").fillna(NIVEL_SIN_DATO)
+
+def _codificar(serie: pd.Series):
+    # (códigos >= 0, valores); los nulos reciben el último código y valor NA.
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        codigos, valores = serie.cat.codes.to_numpy().astype(np.int64), serie.cat.categories.astype(object)
+    else:
+        codigos, valores = pd.factorize(serie)
+        codigos = codigos.astype(np.int64)
+    codigos[codigos < 0] = len(valores)
+    return codigos, np.append(np.asarray(valores, dtype=object), pd.NA)
+
+class CuboAgregado:
+    def __init__(self, resultado: pd.DataFrame):
+        columnas = {
+            "Activo": resultado["Activo"], "Criticidad": resultado["Criticidad"],
+            "Nivel de Exposición": resultado["Nivel de Exposición"], "Nivel_CVSS": nivel_cvss(resultado["CVSS"]),
+        }
+        clave = np.zeros(len(resultado), dtype=np.int64)
+        codigos, self._valores = {}, {}
+        for dim, serie in columnas.items():
+            codigos[dim], self._valores[dim] = _codificar(serie)
+            clave = clave * len(self._valores[dim]) + codigos[dim]
+        celda, unicas = pd.factorize(clave)
+        primera = np.full(len(unicas), len(resultado), dtype=np.int64)
+        np.minimum.at(primera, celda, np.arange(len(resultado)))
+
+        def suma(col):
+            return np.bincount(celda, weights=np.nan_to_num(resultado[col].to_numpy(dtype="float64", na_value=np.nan)),
+                               minlength=len(unicas))
+
+        # Celdas en el orden de su primera fila, con los códigos de cada dimensión.
+        orden = np.argsort(primera)
+        self.codigos = {dim: c[primera[orden]] for dim, c in codigos.items()}
+        self.cantidad = np.bincount(celda, minlength=len(unicas))[orden]
+        self.suma_cvss, self.suma_cvssf, self.suma_riesgo = (suma(c)[orden] for c in ("CVSS", "CVSSF", "riesgo"))
+        self.filas = len(resultado)
+        # Rango de cada valor en orden alfabético (nulos al final), para ordenar las salidas como groupby.
+        self._rango = {}
+        for dim in ("Activo", "Criticidad"):
+            rango = np.empty(len(self._valores[dim]), dtype=np.int64)
+            rango[pd.Series(self._valores[dim][:-1], dtype="string").argsort(kind="stable").to_numpy()] = np.arange(len(rango) - 1)
+            rango[-1] = len(rango) - 1
+            self._rango[dim] = rango
+
+    def __len__(self):
+        return len(self.cantidad)
+
+    def valores(self, dim: str, celdas=None) -> np.ndarray:
+        codigos = self.codigos[dim] if celdas is None else self.codigos[dim][celdas]
+        return self._valores[dim][codigos]
+
+    def filtrar(self, niveles=(), criticidades=(), activos=None) -> np.ndarray:
+        """Celdas que cumplen los filtros (mismas reglas que ``IndiceFiltros.filtrar``).
+
+        Una selección vacía no filtra ese campo; ``activos`` es la lista de
+        nombres que coinciden con la búsqueda, o None si no se busca.
+        """
+        mascara = np.ones(len(self), dtype=bool)
+        for dim, seleccion in (("Nivel de Exposición", niveles), ("Criticidad", criticidades), ("Activo", activos)):
+            if seleccion is None or (dim != "Activo" and not seleccion):
+                continue
+            elegidos = pd.Index(self._valores[dim][:-1]).get_indexer(list(seleccion))
+            mascara &= np.isin(self.codigos[dim], elegidos[elegidos >= 0])
+        return np.flatnonzero(mascara)
+
+    # ---- Consultas sobre las celdas filtradas ----
+    def total(self, celdas) -> int:
+        return int(self.cantidad[celdas].sum())
+
+    def _suma(self, dim, celdas, pesos) -> np.ndarray:
+        # Suma de ``pesos`` por valor de ``dim`` (índice = código).
+        return np.bincount(self.codigos[dim][celdas], weights=pesos[celdas], minlength=len(self._valores[dim]))
+
+    def por_nivel(self, celdas) -> dict:
+        """{nivel: cantidad} de los niveles presentes."""
+        conteo = self._suma("Nivel de Exposición", celdas, self.cantidad)
+        return {self._valores["Nivel de Exposición"][k]: int(conteo[k]) for k in np.flatnonzero(conteo)}
+
+    def por_criticidad(self, celdas) -> pd.DataFrame:
+        """Cantidad por criticidad (sin dato al final), como ``groupby("Criticidad", dropna=False)``."""
+        conteo = self._suma("Criticidad", celdas, self.cantidad)
+        presentes = np.flatnonzero(conteo)
+        presentes = presentes[np.argsort(self._rango["Criticidad"][presentes])]
+        return pd.DataFrame({
+            "Criticidad": pd.array(self._valores["Criticidad"][presentes], dtype="string"),
+            "Cantidad": conteo[presentes].astype(np.int64),
+        })
+
+    def por_nivel_cvss(self, celdas) -> pd.DataFrame:
+        """Cantidad por (Nivel de Exposición, Nivel_CVSS) con la diferencia de orden MURC − CVSS."""
+        n_cvss = len(self._valores["Nivel_CVSS"])
+        par = self.codigos["Nivel de Exposición"][celdas] * n_cvss + self.codigos["Nivel_CVSS"][celdas]
+        conteo = np.bincount(par, weights=self.cantidad[celdas], minlength=len(self._valores["Nivel de Exposición"]) * n_cvss)
+        presentes = np.flatnonzero(conteo)
+        nivel, nivel_cvss = presentes // n_cvss, presentes % n_cvss
+        orden = {d: np.array([ORDEN_NIVEL.get(v, 0) for v in self._valores[d]]) for d in ("Nivel de Exposición", "Nivel_CVSS")}
+        return pd.DataFrame({
+            "Nivel de Exposición": self._valores["Nivel de Exposición"][nivel],
+            "Nivel_CVSS": self._valores["Nivel_CVSS"][nivel_cvss],
+            "Cantidad": conteo[presentes].astype(np.int64),
+            "Diferencia": orden["Nivel de Exposición"][nivel] - orden["Nivel_CVSS"][nivel_cvss],
+        })
+
+    def por_activo(self, celdas) -> pd.DataFrame:
+        """Agregado por activo del gráfico de dispersión (nivel y criticidad de la primera fila con dato)."""
+        activo = self.codigos["Activo"][celdas]
+        cantidad = self._suma("Activo", celdas, self.cantidad)
+        presentes = np.flatnonzero(cantidad)
+        presentes = presentes[np.argsort(self._rango["Activo"][presentes])]
+        # Las celdas están en el orden de su primera fila: la primera celda de cada activo es su «first».
+        _, primera = np.unique(activo, return_index=True)
+        nivel = np.empty(len(self._valores["Activo"]), dtype=object)
+        nivel[activo[primera]] = self.valores("Nivel de Exposición", celdas[primera])
+        critic = np.full(len(self._valores["Activo"]), pd.NA, dtype=object)
+        con_dato = np.flatnonzero(self.codigos["Criticidad"][celdas] < len(self._valores["Criticidad"]) - 1)
+        _, primera = np.unique(activo[con_dato], return_index=True)
+        critic[activo[con_dato[primera]]] = self.valores("Criticidad", celdas[con_dato[primera]])
+        return pd.DataFrame({
+            "Activo": self._valores["Activo"][presentes],
+            "prom_riesgo": self._suma("Activo", celdas, self.suma_riesgo)[presentes] / cantidad[presentes],
+            "suma_cvssf": self._suma("Activo", celdas, self.suma_cvssf)[presentes],
+            "suma_cvss": self._suma("Activo", celdas, self.suma_cvss)[presentes],
+            "count_vuln": cantidad[presentes].astype(np.int64),
+            "nivel": nivel[presentes], "critic": critic[presentes],
+        })
@@ -0,0 +1,120 @@
+"""Diferencias entre dos escaneos puntuados: vulnerabilidades nuevas, remediadas y persistentes.
+
+La clave de comparación es el par normalizado (Activo, Identificador). Cada
+par se reduce a un hash de 64 bits y el cruce se hace con una tabla hash
+(``pd.Index.get_indexer``), sin ordenar ni hacer ``merge`` de las tablas
+completas; los pares cruzados se verifican contra las claves reales para
+descartar colisiones. Si un par aparece varias veces en un escaneo, se toma
+la fila de mayor riesgo.
+"""
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from .nucleo import NIVELES, NIVEL_SIN_DATO, ORDEN_NIVEL
+
+NUEVA, REMEDIADA, PERSISTENTE = "NUEVA", "REMEDIADA", "PERSISTENTE"
+SIN_REGISTRO = "—"
+
+def etiqueta_movimiento(n: int) -> str:
+    if n > 0:  return "⬆️ Sube nivel"
+    if n < 0:  return "⬇️ Baja nivel"
+    return "➡️ Mantiene nivel"
+
+def _por_clave(df: pd.DataFrame):
+    """Una fila por (Activo, Identificador), la de mayor riesgo, con su hash de clave."""
+    claves = df[["Activo", "Identificador"]].astype("string")
+    hashes = pd.util.hash_pandas_object(claves, index=False).to_numpy()
+    riesgo = df["riesgo"].to_numpy(dtype="float64", na_value=-np.inf)
+    orden = np.lexsort((-riesgo, hashes))
+    primero = np.ones(len(orden), dtype=bool)
+    primero[1:] = hashes[orden][1:] != hashes[orden][:-1]
+    sel = np.sort(orden[primero])
+    return df.iloc[sel].reset_index(drop=True), hashes[sel]
+
+def _mismas_claves(a: pd.DataFrame, b: pd.DataFrame) -> np.ndarray:
+    iguales = np.ones(len(a), dtype=bool)
+    for col in ("Activo", "Identificador"):
+        # En texto: dos resultados compactos tienen categorías distintas y no se comparan directamente.
+        x, y = a[col].astype("string").reset_index(drop=True), b[col].astype("string").reset_index(drop=True)
+        iguales &= ((x == y).fillna(False) | (x.isna() & y.isna())).to_numpy(dtype=bool)
+    return iguales
+
+@dataclass
+class Diferencias:
+    detalle: pd.DataFrame
+
+    def kpis(self) -> dict:
+        estado = self.detalle["Estado"]
+        persist = self.detalle[estado == PERSISTENTE]["Cambio_nivel"]
+        return {
+            "Nuevas": int((estado == NUEVA).sum()),
+            "Remediadas": int((estado == REMEDIADA).sum()),
+            "Persistentes": int((estado == PERSISTENTE).sum()),
+            "Suben nivel": int((persist > 0).sum()),
+            "Bajan nivel": int((persist < 0).sum()),
+        }
+
+    def matriz_transicion(self) -> pd.DataFrame:
+        """Conteo Nivel_anterior (filas) x Nivel_actual (columnas); «—» marca nuevas/remediadas."""
+        orden = [SIN_REGISTRO, NIVEL_SIN_DATO] + NIVELES
+        ant = pd.Categorical(self.detalle["Nivel_anterior"], categories=orden)
+        act = pd.Categorical(self.detalle["Nivel_actual"], categories=orden)
+        matriz = pd.crosstab(ant, act, dropna=False).reindex(index=orden, columns=orden, fill_value=0)
+        matriz.index.name, matriz.columns.name = "Nivel anterior", "Nivel actual"
+        return matriz
+
+    def movimientos(self) -> pd.DataFrame:
+        persist = self.detalle[self.detalle["Estado"] == PERSISTENTE]
+        return persist.groupby("Movimiento").size().reset_index(name="Cantidad")
+
+def comparar(anterior: pd.DataFrame, actual: pd.DataFrame) -> Diferencias:
+    """Compara dos resultados MURC (columnas de ``COLUMNAS_RESULTADO``)."""
+    ant, h_ant = _por_clave(anterior)
+    act, h_act = _por_clave(actual)
+
+    pos = pd.Index(h_ant).get_indexer(h_act)   # posición en «anterior» de cada clave actual, -1 si no está
+    cruzadas = np.flatnonzero(pos >= 0)
+    ok = _mismas_claves(act.iloc[cruzadas], ant.iloc[pos[cruzadas]])
+    pos[cruzadas[~ok]] = -1
+    persiste = pos >= 0
+    remediadas = np.ones(len(ant), dtype=bool)
+    remediadas[pos[persiste]] = False
+
+    nivel_ant = pd.Series(SIN_REGISTRO, index=act.index, dtype="object")
+    nivel_ant[persiste] = ant["Nivel de Exposición"].to_numpy(dtype=object)[pos[persiste]]
+    riesgo_ant = np.full(len(act), np.nan)
+    riesgo_ant[persiste] = ant["riesgo"].to_numpy(dtype="float64", na_value=np.nan)[pos[persiste]]
+
+    actuales = pd.DataFrame({
+        "Activo": act["Activo"],
+        "Identificador": act["Identificador"],
+        "Estado": np.where(persiste, PERSISTENTE, NUEVA),
+        "Nivel_anterior": nivel_ant,
+        "Nivel_actual": act["Nivel de Exposición"].astype("object"),
+        "riesgo_anterior": riesgo_ant,
+        "riesgo_actual": act["riesgo"].to_numpy(dtype="float64", na_value=np.nan),
+    })
+    rem = ant[remediadas]
+    remediadas_df = pd.DataFrame({
+        "Activo": rem["Activo"],
+        "Identificador": rem["Identificador"],
+        "Estado": REMEDIADA,
+        "Nivel_anterior": rem["Nivel de Exposición"].astype("object"),
+        "Nivel_actual": SIN_REGISTRO,
+        "riesgo_anterior": rem["riesgo"].to_numpy(dtype="float64", na_value=np.nan),
+        "riesgo_actual": np.nan,
+    })
+    partes = [d for d in (actuales, remediadas_df) if len(d)] or [actuales]
+    detalle = pd.concat(partes, ignore_index=True)
+    detalle["Delta_riesgo"] = (detalle["riesgo_actual"] - detalle["riesgo_anterior"]).round(4)
+    cambio = detalle["Nivel_actual"].map(ORDEN_NIVEL).fillna(0) - detalle["Nivel_anterior"].map(ORDEN_NIVEL).fillna(0)
+    detalle["Cambio_nivel"] = np.where(detalle["Estado"] == PERSISTENTE, cambio, 0).astype(int)
+    detalle["Movimiento"] = pd.Series(np.where(
+        detalle["Estado"] == PERSISTENTE,
+        np.select([detalle["Cambio_nivel"] > 0, detalle["Cambio_nivel"] < 0],
+                  [etiqueta_movimiento(1), etiqueta_movimiento(-1)], etiqueta_movimiento(0)),
+        SIN_REGISTRO,
+    ), index=detalle.index)
+    return Diferencias(detalle)
@@ -0,0 +1,160 @@
+"""Exportación en flujo (xlsx, CSV, Parquet) y caché de archivos exportados.
+
+Los escritores reciben un iterable de DataFrames y los vuelcan bloque a
+bloque, con memoria constante:
+
+* xlsx    — openpyxl en modo ``write_only``; al llegar al límite de filas de
+  Excel se abre una hoja nueva (Resultado, Resultado_2, ...).
+* CSV     — ``to_csv`` por bloques sobre el mismo archivo (utf-8-sig).
+* Parquet — un row group por bloque con ``pyarrow`` (opcional).
+
+``CacheExportaciones`` guarda en disco el archivo ya generado para cada
+estado de filtros, de modo que repetir una descarga no vuelve a escribirlo.
+"""
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+from openpyxl import Workbook
+
+from .compacto import ampliar_float32
+from .tabla import con_justificacion
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    # Parquet queda deshabilitado si pyarrow no está instalado
+    pa = pq = None
+
+PARQUET_DISPONIBLE = pq is not None
+FILAS_MAX_EXCEL = 1_048_576          # incluye la fila de encabezados
+TAM_BLOQUE_EXPORT = 50_000
+
+def bloques_de(df: pd.DataFrame, tam_bloque: int = TAM_BLOQUE_EXPORT):
+    for i in range(0, max(len(df), 1), tam_bloque):
+        yield df.iloc[i:i + tam_bloque]
+
+def filas_nativas(df: pd.DataFrame):
+    # Filas como tuplas de Python con None en lugar de NA/NaN.
+    df = ampliar_float32(df)
+    return df.astype(object).where(df.notna(), None).itertuples(index=False, name=None)
+
+def escribir_xlsx(bloques, destino, hoja: str = "Resultado", filas_por_hoja: int = FILAS_MAX_EXCEL) -> int:
+    wb = Workbook(write_only=True)
+    ws, encabezados, en_hoja, n_hojas, total = None, None, 0, 0, 0
+    for df in bloques:
+        if encabezados is None:
+            encabezados = list(df.columns)
+        for fila in filas_nativas(df):
+            if ws is None or en_hoja >= filas_por_hoja:
+                n_hojas += 1
+                ws = wb.create_sheet(hoja if n_hojas == 1 else f"{hoja}_{n_hojas}")
+                ws.append(encabezados)
+                en_hoja = 1
+            ws.append(fila)
+            en_hoja += 1
+            total += 1
+    if ws is None:
+        # Resultado vacío: hoja solo con encabezados.
+        wb.create_sheet(hoja).append(encabezados or [])
+    wb.save(destino)
+    return total
+
+def escribir_csv(bloques, destino, sep: str = ",") -> int:
+    total, primero = 0, True
+    with open(destino, "w", encoding="utf-8-sig", newline="") as f:
+        for df in bloques:
+            df.to_csv(f, index=False, header=primero, sep=sep)
+            primero = False
+            total += len(df)
+    return total
+
+def escribir_parquet(bloques, destino) -> int:
+    if not PARQUET_DISPONIBLE:
+        raise ValueError("La exportación Parquet requiere el paquete 'pyarrow'.")
+    writer, total = None, 0
+    try:
+        for df in bloques:
+            tabla = pa.Table.from_pandas(df, preserve_index=False, schema=writer.schema if writer else None)
+            if writer is None:
+                writer = pq.ParquetWriter(destino, tabla.schema)
+            writer.write_table(tabla)
+            total += len(df)
+    finally:
+        if writer is not None:
+            writer.close()
+    return total
+
+# formato: (escritor, extensión, mime)
+FORMATOS = {
+    "xlsx":    (escribir_xlsx, "xlsx", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+    "csv":     (escribir_csv, "csv", "text/csv"),
+    "parquet": (escribir_parquet, "parquet", "application/vnd.apache.parquet"),
+}
+
+def formatos_disponibles() -> list:
+    return [f for f in FORMATOS if f != "parquet" or PARQUET_DISPONIBLE]
+
+def formato_por_extension(ruta: str, por_defecto: str = "csv") -> str:
+    ext = os.path.splitext(str(ruta))[1].lower().lstrip(".")
+    return ext if ext in FORMATOS else por_defecto
+
+def exportar(df: pd.DataFrame, destino, formato: str, justificar: bool = True,
+             tam_bloque: int = TAM_BLOQUE_EXPORT) -> int:
+    """Escribe ``df`` en ``destino``; la justificación se arma bloque a bloque."""
+    escritor = FORMATOS[formato][0]
+    bloques = bloques_de(df, tam_bloque)
+    if justificar:
+        bloques = (con_justificacion(b) for b in bloques)
+    return escritor(bloques, destino)
+
+def clave_exportacion(*partes) -> str:
+    """Clave estable para un estado de filtros (clave del resultado, selecciones, formato...)."""
+    return hashlib.sha256(repr(partes).encode("utf-8")).hexdigest()
+
+class CacheExportaciones:
+    """Archivos exportados en disco, reutilizados por clave, con expulsión LRU."""
+
+    def __init__(self, directorio=None, max_entradas: int = 16):
+        self.directorio = directorio or tempfile.mkdtemp(prefix="murc_export_")
+        os.makedirs(self.directorio, exist_ok=True)
+        self.max_entradas = max_entradas
+        self._rutas = OrderedDict()
+        self._lock = threading.Lock()
+
+    def ruta(self, clave: str):
+        """Ruta del archivo ya generado para ``clave`` o None."""
+        with self._lock:
+            ruta = self._rutas.get(clave)
+            if ruta and os.path.exists(ruta):
+                self._rutas.move_to_end(clave)
+                return ruta
+            self._rutas.pop(clave, None)
+            return None
+
+    def generar(self, clave: str, df: pd.DataFrame, formato: str) -> str:
+        ruta = self.ruta(clave)
+        if ruta:
+            return ruta
+        ext = FORMATOS[formato][1]
+        final = os.path.join(self.directorio, f"{clave}.{ext}")
+        fd, parcial = tempfile.mkstemp(dir=self.directorio, suffix=f".{ext}.tmp")
+        os.close(fd)
+        try:
+            exportar(df, parcial, formato)
+            shutil.move(parcial, final)
+        finally:
+            if os.path.exists(parcial):
+                os.remove(parcial)
+        with self._lock:
+            self._rutas[clave] = final
+            while len(self._rutas) > self.max_entradas:
+                _, vieja = self._rutas.popitem(last=False)
+                if os.path.exists(vieja):
+                    os.remove(vieja)
+        return final
@@ -0,0 +1,115 @@
+"""Índice de filtros del panel «Filtros», construido una vez por archivo.
+
+* Nivel de Exposición y Criticidad se codifican como diccionario y cada
+  valor tiene un bitmap empaquetado de filas; una combinación de filtros se
+  resuelve con OR dentro de cada campo y AND entre campos.
+* Activo tiene un índice de trigramas sobre los nombres distintos y, por
+  nombre, la lista de filas donde aparece; una búsqueda solo recorre los
+  nombres candidatos y las filas que coinciden.
+
+Reproduce la semántica de la interfaz original (``isin`` y
+``str.contains(..., na=False)``, que interpreta el texto como expresión
+regular), incluido el orden de las filas.
+"""
+import re
+
+import numpy as np
+import pandas as pd
+
+_METACARACTERES = set(".^$*+?{}[]\\|()")
+
+def _bitmaps(serie: pd.Series):
+    # Devuelve ({valor: bitmap}, hay_nulos).
+    codigos, valores = pd.factorize(serie)
+    return {v: np.packbits(codigos == k) for k, v in enumerate(valores)}, bool((codigos < 0).any())
+
+def _trigramas(texto: str):
+    return {texto[i:i+3] for i in range(len(texto) - 2)}
+
+class IndiceFiltros:
+    def __init__(self, df: pd.DataFrame):
+        self.n = len(df)
+        self._bm_nivel, self._nulos_nivel   = _bitmaps(df["Nivel de Exposición"])
+        self._bm_critic, self._nulos_critic = _bitmaps(df["Criticidad"])
+        self.niveles      = sorted(self._bm_nivel)
+        self.criticidades = sorted(self._bm_critic)
+
+        # Filas agrupadas por nombre de activo (formato CSR): las filas del
+        # nombre k son self._filas[self._inicio[k]:self._inicio[k+1]].
+        codigos, activos = pd.factorize(df["Activo"])
+        self._activos = [str(a) for a in activos]
+        validos = np.flatnonzero(codigos >= 0)
+        self._filas = validos[np.argsort(codigos[validos], kind="stable")]
+        self._inicio = np.concatenate(([0], np.cumsum(np.bincount(codigos[validos], minlength=len(activos)))))
+
+        trigramas = {}
+        for k, nombre in enumerate(self._activos):
+            for t in _trigramas(nombre):
+                trigramas.setdefault(t, []).append(k)
+        self._trigramas = {t: np.asarray(ids, dtype=np.int64) for t, ids in trigramas.items()}
+
+    # ---- Activo ----
+    def _nombres_que_contienen(self, texto: str) -> list:
+        if _METACARACTERES.intersection(texto):
+            try:
+                patron = re.compile(texto)
+            except re.error:
+                patron = None   # expresión inválida: se busca como texto literal
+            if patron is not None:
+                return [k for k, nombre in enumerate(self._activos) if patron.search(nombre)]
+        if len(texto) < 3:
+            return [k for k, nombre in enumerate(self._activos) if texto in nombre]
+        listas = sorted((self._trigramas.get(t) for t in _trigramas(texto)), key=lambda l: -1 if l is None else len(l))
+        if listas[0] is None:
+            return []
+        candidatos = listas[0]
+        for ids in listas[1:]:
+            candidatos = np.intersect1d(candidatos, ids, assume_unique=True)
+            if not len(candidatos):
+                return []
+        return [k for k in candidatos.tolist() if texto in self._activos[k]]
+
+    def activos_que_contienen(self, texto: str) -> list:
+        """Nombres de activo que coinciden con la búsqueda (para filtrar el cubo de agregados)."""
+        return [self._activos[k] for k in self._nombres_que_contienen(texto)]
+
+    def _filas_activo(self, texto: str) -> np.ndarray:
+        ids = self._nombres_que_contienen(texto)
+        if not ids:
+            return np.empty(0, dtype=np.int64)
+        return np.sort(np.concatenate([self._filas[self._inicio[k]:self._inicio[k+1]] for k in ids]))
+
+    # ---- Combinación ----
+    def _mascara(self, seleccion, bitmaps):
+        m = np.zeros((self.n + 7) // 8, dtype=np.uint8)
+        for v in seleccion:
+            if v in bitmaps:
+                m |= bitmaps[v]
+        return m
+
+    def filtrar(self, niveles=(), criticidades=(), activo: str = ""):
+        """Posiciones (ordenadas) de las filas que cumplen los filtros, o None si no hay filtro.
+
+        Una selección vacía no filtra ese campo, igual que en la interfaz.
+        """
+        mascara = None
+        campos = ((niveles, self._bm_nivel, self._nulos_nivel), (criticidades, self._bm_critic, self._nulos_critic))
+        for seleccion, bitmaps, hay_nulos in campos:
+            # Seleccionar todos los valores de un campo sin nulos no descarta ninguna fila.
+            if seleccion and (hay_nulos or not set(bitmaps) <= set(seleccion)):
+                m = self._mascara(seleccion, bitmaps)
+                mascara = m if mascara is None else mascara & m
+        if activo:
+            filas = self._filas_activo(activo)
+            if mascara is not None:
+                bits = (mascara[filas >> 3] >> (7 - (filas & 7))) & 1
+                filas = filas[bits.astype(bool)]
+            return filas
+        if mascara is None:
+            return None
+        return np.flatnonzero(np.unpackbits(mascara, count=self.n))
+
+    @staticmethod
+    def aplicar(df: pd.DataFrame, filas) -> pd.DataFrame:
+        """Subconjunto de ``df`` para ``filas``; sin filtro devuelve ``df`` tal cual, sin copiarlo."""
+        return df if filas is None else df.iloc[filas]
@@ -0,0 +1,112 @@
+"""Motor de gráficos de dispersión para volúmenes grandes.
+
+Según la cantidad de puntos se elige el modo de dibujo:
+
+* ``svg``   — ``px.scatter`` normal, con todo el detalle en el hover.
+* ``webgl`` — la misma figura con ``render_mode="webgl"``.
+* ``bins``  — agregación 2D en el servidor: un marcador por celda y color,
+  con tamaño según la cantidad de filas. Cada marcador lleva en
+  ``customdata`` su celda, para poder recuperar las filas (``filas_del_bin``).
+
+Los límites se configuran con MURC_LIMITE_WEBGL y MURC_LIMITE_BINS.
+"""
+import os
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+import plotly.express as px
+
+LIMITE_WEBGL = int(os.getenv("MURC_LIMITE_WEBGL", "20000"))
+LIMITE_BINS  = int(os.getenv("MURC_LIMITE_BINS", "200000"))
+N_BINS = 60
+
+@dataclass
+class Dispersion:
+    fig: object
+    modo: str
+    bins: Optional[pd.DataFrame] = None
+    bordes: Optional[tuple] = None
+
+def modo_dispersion(n: int, limite_webgl: int = LIMITE_WEBGL, limite_bins: int = LIMITE_BINS) -> str:
+    if n > limite_bins:
+        return "bins"
+    if n > limite_webgl:
+        return "webgl"
+    return "svg"
+
+def _bordes(valores: np.ndarray, rango, n_bins: int) -> np.ndarray:
+    lo, hi = rango if rango else (np.nanmin(valores), np.nanmax(valores))
+    if not hi > lo:
+        hi = lo + 1
+    return np.linspace(lo, hi, n_bins + 1)
+
+def _celdas(valores: np.ndarray, bordes: np.ndarray) -> np.ndarray:
+    n_bins = len(bordes) - 1
+    return np.clip(np.searchsorted(bordes, valores, side="right") - 1, 0, n_bins - 1)
+
+def _xy(df: pd.DataFrame, x: str, y: str):
+    vx = df[x].to_numpy(dtype="float64", na_value=np.nan)
+    vy = df[y].to_numpy(dtype="float64", na_value=np.nan)
+    return vx, vy, ~(np.isnan(vx) | np.isnan(vy))
+
+def agrupar_en_bins(df: pd.DataFrame, x: str, y: str, color: str, n_bins: int = N_BINS,
+                    rango_x=None, rango_y=None):
+    """Cuenta filas por celda (x, y) y valor de ``color``; devuelve (agregado, (bordes_x, bordes_y))."""
+    vx, vy, validos = _xy(df, x, y)
+    bordes_x = _bordes(vx[validos], rango_x, n_bins) if validos.any() else np.linspace(0, 1, n_bins + 1)
+    bordes_y = _bordes(vy[validos], rango_y, n_bins) if validos.any() else np.linspace(0, 1, n_bins + 1)
+    celdas = pd.DataFrame({
+        "_bx": _celdas(vx[validos], bordes_x),
+        "_by": _celdas(vy[validos], bordes_y),
+        color: df[color].to_numpy()[validos],
+    })
+    agregado = celdas.groupby(["_bx", "_by", color], dropna=False, sort=False).size().reset_index(name="Cantidad")
+    agregado[x] = (bordes_x[agregado["_bx"]] + bordes_x[agregado["_bx"] + 1]) / 2
+    agregado[y] = (bordes_y[agregado["_by"]] + bordes_y[agregado["_by"] + 1]) / 2
+    agregado["_tam"] = np.sqrt(agregado["Cantidad"])
+    return agregado, (bordes_x, bordes_y)
+
+def filas_del_bin(df: pd.DataFrame, x: str, y: str, color: str, bordes: tuple, bx: int, by: int, valor) -> pd.DataFrame:
+    """Filas de ``df`` que caen en la celda (bx, by) con ``color == valor``."""
+    vx, vy, validos = _xy(df, x, y)
+    mascara = validos.copy()
+    mascara[validos] = (_celdas(vx[validos], bordes[0]) == bx) & (_celdas(vy[validos], bordes[1]) == by)
+    col = df[color]
+    mascara &= (col.isna() if pd.isna(valor) else (col == valor).fillna(False)).to_numpy(dtype=bool)
+    return df[mascara]
+
+def dispersion(df: pd.DataFrame, x: str, y: str, color: str, *, hover_data=None, labels=None,
+               size=None, size_max=20, height=460, n_bins: int = N_BINS, rango_x=None, rango_y=None,
+               limite_webgl: int = LIMITE_WEBGL, limite_bins: int = LIMITE_BINS, **kwargs) -> Dispersion:
+    """Dispersión ``x`` vs ``y`` coloreada por ``color`` en el modo que corresponda al volumen.
+
+    ``kwargs`` se pasan a ``px.scatter`` (p. ej. ``color_discrete_map``).
+    """
+    modo = modo_dispersion(len(df), limite_webgl, limite_bins)
+    if modo != "bins":
+        fig = px.scatter(
+            df, x=x, y=y, color=color, size=size, size_max=size_max,
+            hover_data=hover_data, labels=labels, height=height,
+            render_mode="webgl" if modo == "webgl" else "auto", **kwargs
+        )
+        return Dispersion(fig, modo)
+
+    agregado, bordes = agrupar_en_bins(df, x, y, color, n_bins, rango_x, rango_y)
+    fig = px.scatter(
+        agregado, x=x, y=y, color=color, size="_tam", size_max=size_max,
+        custom_data=["_bx", "_by", color],
+        hover_data={"Cantidad": True, "_tam": False, x: ":.2f", y: ":.2f"},
+        labels=labels, height=height, **kwargs
+    )
+    fig.update_traces(marker=dict(symbol="square", sizemin=3))
+    return Dispersion(fig, modo, agregado, bordes)
+
+def celdas_seleccionadas(evento) -> list:
+    """Extrae [(bx, by, valor_color), ...] del evento de selección de ``st.plotly_chart``."""
+    try:
+        puntos = evento.selection.points
+    except AttributeError:
+        return []
+    return [tuple(p["customdata"][:3]) for p in puntos if p.get("customdata")]
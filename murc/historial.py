@@ -0,0 +1,217 @@
+"""Histórico persistente de corridas MURC en SQLite (archivo local).
+
+Cada corrida puntuada se agrega con su fecha de escaneo; los hallazgos
+quedan indexados por Activo, Identificador, fecha de escaneo y Nivel de
+Exposición, de modo que las tendencias se consultan directamente sobre el
+archivo, sin volver a subir ni parsear libros anteriores.
+
+Cada corrida registra el perfil con que se puntuó (la interfaz guarda
+siempre el resultado MURC). Las tendencias se consultan por perfil; las
+corridas guardadas antes de registrar el perfil se asumen MURC.
+
+Uso::
+
+    h = HistorialMURC("murc_historial.db")
+    h.registrar(resultado, fecha_escaneo="2026-09-30", origen="escaneo_sept.xlsx")
+    h.tendencia_niveles()
+    h.historia_activo("SRV-CORE-01")
+"""
+import os
+import sqlite3
+from contextlib import contextmanager
+from datetime import date, datetime
+
+import pandas as pd
+
+from .exportar import filas_nativas
+from .nucleo import COLUMNAS_RESULTADO, NIVELES, NIVEL_SIN_DATO, PERFIL_MURC
+
+RUTA_HISTORIAL = os.getenv("MURC_HISTORIAL", "murc_historial.db")
+
+# Columna del resultado -> columna en la tabla hallazgos
+COLUMNAS_SQL = {
+    "Activo": "activo", "Identificador": "identificador", "CVSS": "cvss", "CVSSF": "cvssf",
+    "Criticidad": "criticidad", "riesgo": "riesgo", "Nivel de Exposición": "nivel",
+}
+
+_ESQUEMA = """
+CREATE TABLE IF NOT EXISTS corridas (
+    id            INTEGER PRIMARY KEY AUTOINCREMENT,
+    fecha_escaneo TEXT NOT NULL,
+    fecha_carga   TEXT NOT NULL,
+    origen        TEXT,
+    clave         TEXT,
+    filas         INTEGER NOT NULL DEFAULT 0,
+    perfil        TEXT
+);
+CREATE UNIQUE INDEX IF NOT EXISTS ix_corridas_clave_fecha ON corridas(clave, fecha_escaneo);
+CREATE TABLE IF NOT EXISTS hallazgos (
+    corrida_id    INTEGER NOT NULL REFERENCES corridas(id) ON DELETE CASCADE,
+    fecha_escaneo TEXT NOT NULL,
+    activo        TEXT,
+    identificador TEXT,
+    cvss          REAL,
+    cvssf         REAL,
+    criticidad    TEXT,
+    riesgo        REAL,
+    nivel         TEXT
+);
+CREATE INDEX IF NOT EXISTS ix_hallazgos_corrida       ON hallazgos(corrida_id);
+CREATE INDEX IF NOT EXISTS ix_hallazgos_activo        ON hallazgos(activo, fecha_escaneo);
+CREATE INDEX IF NOT EXISTS ix_hallazgos_identificador ON hallazgos(identificador, fecha_escaneo);
+CREATE INDEX IF NOT EXISTS ix_hallazgos_fecha         ON hallazgos(fecha_escaneo, nivel);
+CREATE INDEX IF NOT EXISTS ix_hallazgos_nivel         ON hallazgos(nivel, fecha_escaneo);
+"""
+
+# Corridas de un perfil (NULL: guardadas antes de registrar el perfil, puntuadas con MURC).
+_DEL_PERFIL = "corrida_id IN (SELECT id FROM corridas WHERE COALESCE(perfil, ?) = ?)"
+
+_SELECT_HALLAZGOS = ", ".join(f'{sql} AS "{col}"' for col, sql in COLUMNAS_SQL.items())
+
+def _fecha_iso(fecha) -> str:
+    if fecha is None:
+        return date.today().isoformat()
+    if isinstance(fecha, (date, datetime)):
+        return fecha.strftime("%Y-%m-%d")
+    return pd.Timestamp(fecha).strftime("%Y-%m-%d")
+
+class HistorialMURC:
+    def __init__(self, ruta=RUTA_HISTORIAL):
+        self.ruta = str(ruta)
+        con = self._conectar()
+        try:
+            con.executescript(_ESQUEMA)
+            # Históricos creados antes de la columna perfil.
+            if "perfil" not in {fila[1] for fila in con.execute("PRAGMA table_info(corridas)")}:
+                con.execute("ALTER TABLE corridas ADD COLUMN perfil TEXT")
+        finally:
+            con.close()
+
+    def _conectar(self):
+        con = sqlite3.connect(self.ruta, timeout=30)
+        con.execute("PRAGMA journal_mode=WAL")
+        con.execute("PRAGMA synchronous=NORMAL")
+        con.execute("PRAGMA foreign_keys=ON")
+        return con
+
+    def _consulta(self, sql: str, params=()) -> pd.DataFrame:
+        con = self._conectar()
+        try:
+            return pd.read_sql_query(sql, con, params=params)
+        finally:
+            con.close()
+
+    # ---- Escritura ----
+    @contextmanager
+    def corrida(self, fecha_escaneo=None, origen=None, clave=None, perfil: str = PERFIL_MURC.nombre):
+        """Abre una corrida en una transacción; se le agregan bloques con ``.agregar(df)``.
+
+        ``perfil`` es el nombre del perfil con que se puntuaron los bloques.
+
+        Si ya existe una corrida con la misma ``clave`` y fecha de escaneo, la
+        corrida devuelta queda marcada como ``existente`` y no inserta nada.
+        """
+        con = self._conectar()
+        try:
+            with con:
+                corrida = _Corrida(con, _fecha_iso(fecha_escaneo), origen, clave, perfil)
+                yield corrida
+                corrida.cerrar()
+        finally:
+            con.close()
+
+    def registrar(self, resultado, fecha_escaneo=None, origen=None, clave=None,
+                  perfil: str = PERFIL_MURC.nombre) -> int:
+        """Agrega una corrida completa; ``resultado`` es un DataFrame o un iterable de bloques."""
+        bloques = [resultado] if isinstance(resultado, pd.DataFrame) else resultado
+        with self.corrida(fecha_escaneo, origen, clave, perfil) as corrida:
+            for df in bloques:
+                corrida.agregar(df)
+        return corrida.id
+
+    def eliminar(self, corrida_id: int):
+        con = self._conectar()
+        try:
+            with con:
+                con.execute("DELETE FROM hallazgos WHERE corrida_id = ?", (corrida_id,))
+                con.execute("DELETE FROM corridas WHERE id = ?", (corrida_id,))
+        finally:
+            con.close()
+
+    # ---- Consultas ----
+    def corridas(self) -> pd.DataFrame:
+        return self._consulta("SELECT * FROM corridas ORDER BY fecha_escaneo, id")
+
+    def perfil(self, corrida_id: int) -> str:
+        """Nombre del perfil con que se puntuó la corrida (MURC si no quedó registrado)."""
+        df = self._consulta("SELECT COALESCE(perfil, ?) AS perfil FROM corridas WHERE id = ?",
+                            (PERFIL_MURC.nombre, corrida_id))
+        if df.empty:
+            raise KeyError(f"corrida {corrida_id} no encontrada")
+        return df["perfil"].iloc[0]
+
+    def hallazgos(self, corrida_id: int) -> pd.DataFrame:
+        """Resultado de una corrida con las columnas de ``COLUMNAS_RESULTADO``."""
+        return self._consulta(
+            f"SELECT {_SELECT_HALLAZGOS} FROM hallazgos WHERE corrida_id = ? ORDER BY rowid", (corrida_id,)
+        )
+
+    def tendencia_niveles(self, perfil: str = PERFIL_MURC.nombre) -> pd.DataFrame:
+        """Hallazgos por fecha de escaneo y Nivel de Exposición (una columna por nivel) de las corridas de ``perfil``."""
+        df = self._consulta(
+            f"SELECT fecha_escaneo, nivel, COUNT(*) AS n FROM hallazgos WHERE {_DEL_PERFIL} GROUP BY fecha_escaneo, nivel",
+            (PERFIL_MURC.nombre, perfil),
+        )
+        tabla = df.pivot_table(index="fecha_escaneo", columns="nivel", values="n", fill_value=0, aggfunc="sum")
+        return tabla.reindex(columns=[n for n in NIVELES + [NIVEL_SIN_DATO] if n in tabla.columns])
+
+    def historia_activo(self, activo: str, perfil: str = PERFIL_MURC.nombre) -> pd.DataFrame:
+        """Evolución de un activo: vulnerabilidades, riesgo medio/máximo y críticas por escaneo."""
+        return self._consulta(
+            f"""SELECT fecha_escaneo, COUNT(*) AS vulnerabilidades,
+                      AVG(riesgo) AS riesgo_medio, MAX(riesgo) AS riesgo_max,
+                      SUM(nivel = ?) AS criticas
+               FROM hallazgos WHERE activo = ? AND {_DEL_PERFIL}
+               GROUP BY fecha_escaneo ORDER BY fecha_escaneo""",
+            (NIVELES[-1], activo.strip().upper(), PERFIL_MURC.nombre, perfil),
+        )
+
+    def historia_identificador(self, identificador: str, perfil: str = PERFIL_MURC.nombre) -> pd.DataFrame:
+        """Evolución de una vulnerabilidad: activos afectados y riesgo por escaneo."""
+        return self._consulta(
+            f"""SELECT fecha_escaneo, COUNT(DISTINCT activo) AS activos,
+                      AVG(riesgo) AS riesgo_medio, MAX(riesgo) AS riesgo_max
+               FROM hallazgos WHERE identificador = ? AND {_DEL_PERFIL}
+               GROUP BY fecha_escaneo ORDER BY fecha_escaneo""",
+            (identificador.strip().upper(), PERFIL_MURC.nombre, perfil),
+        )
+
+class _Corrida:
+    _SQL = (
+        f"INSERT INTO hallazgos (corrida_id, fecha_escaneo, {', '.join(COLUMNAS_SQL.values())}) "
+        f"VALUES (?, ?, {', '.join('?' * len(COLUMNAS_SQL))})"
+    )
+
+    def __init__(self, con, fecha: str, origen, clave, perfil):
+        self._con, self.fecha, self.filas = con, fecha, 0
+        fila = None
+        if clave is not None:
+            fila = con.execute("SELECT id FROM corridas WHERE clave = ? AND fecha_escaneo = ?", (clave, fecha)).fetchone()
+        self.existente = fila is not None
+        if self.existente:
+            self.id = fila[0]
+        else:
+            self.id = con.execute(
+                "INSERT INTO corridas (fecha_escaneo, fecha_carga, origen, clave, perfil) VALUES (?, ?, ?, ?, ?)",
+                (fecha, datetime.now().isoformat(timespec="seconds"), origen, clave, perfil),
+            ).lastrowid
+
+    def agregar(self, df: pd.DataFrame):
+        if self.existente:
+            return
+        self._con.executemany(self._SQL, ((self.id, self.fecha) + f for f in filas_nativas(df[COLUMNAS_RESULTADO])))
+        self.filas += len(df)
+
+    def cerrar(self):
+        if not self.existente:
+            self._con.execute("UPDATE corridas SET filas = ? WHERE id = ?", (self.filas, self.id))
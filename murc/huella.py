@@ -0,0 +1,127 @@
+"""Huellas de contenido por hoja de un libro .xlsx, sin parsear las celdas.
+
+Un .xlsx es un zip con un XML por hoja y una tabla de textos compartidos
+(``sharedStrings.xml``) común a todas. La huella de una hoja combina:
+
+* el SHA-256 de su XML, y
+* el SHA-256 de los textos compartidos que puede referenciar (el prefijo de
+  la tabla hasta el índice más alto que aparece en la hoja).
+
+* el SHA-256 de la hoja de estilos (``styles.xml``), también común a todas:
+  el formato de número decide si una celda se lee como número o como fecha,
+  y cambiarlo en un estilo no toca el XML de las hojas que lo usan.
+
+Así, editar Criticidad_Activos no cambia la huella de Escaneo aunque Excel
+reescriba ``sharedStrings.xml`` al guardar, siempre que los textos que usa
+Escaneo sigan en las mismas posiciones (Excel los ordena por primera
+aparición, hoja por hoja). Un cambio de estilos, en cambio, invalida todas
+las hojas.
+"""
+import hashlib
+import posixpath
+import re
+import zipfile
+import xml.etree.ElementTree as ET
+from io import BytesIO
+
+_NS_REL = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}id"
+_TAM_LECTURA = 1 << 20
+# Celdas de texto compartido: <c ... t="s" ...><v>indice</v>
+_RE_INDICE_SST = re.compile(rb'<(?:\w+:)?c\b[^>]*?\bt="s"[^>]*>\s*<(?:\w+:)?v>(\d+)<')
+
+def _local(tag: str) -> str:
+    return tag.rsplit("}", 1)[-1]
+
+def _relaciones(z: zipfile.ZipFile) -> dict:
+    """{id: (tipo, ruta_en_el_zip)} de las relaciones de workbook.xml."""
+    rels = {}
+    for el in ET.fromstring(z.read("xl/_rels/workbook.xml.rels")):
+        destino = el.get("Target", "")
+        if destino.startswith("/"):
+            destino = destino.lstrip("/")
+        else:
+            destino = posixpath.normpath(posixpath.join("xl", destino))
+        rels[el.get("Id")] = (el.get("Type", "").rsplit("/", 1)[-1], destino)
+    return rels
+
+def _partes_hojas(z: zipfile.ZipFile, rels: dict) -> dict:
+    """{nombre_hoja: ruta_xml_en_el_zip} según workbook.xml y sus relaciones."""
+    partes = {}
+    for el in ET.fromstring(z.read("xl/workbook.xml")).iter():
+        if _local(el.tag) == "sheet":
+            partes[el.get("name")] = rels.get(el.get(_NS_REL), (None, None))[1]
+    return partes
+
+def _hash_estilos(z: zipfile.ZipFile, rels: dict) -> str:
+    h = hashlib.sha256()
+    for tipo, parte in rels.values():
+        if tipo == "styles" and parte in z.namelist():
+            with z.open(parte) as f:
+                while bloque := f.read(_TAM_LECTURA):
+                    h.update(bloque)
+    return h.hexdigest()
+
+def _hash_xml_hoja(z: zipfile.ZipFile, parte: str):
+    """SHA-256 del XML de la hoja y mayor índice de texto compartido usado (-1 si ninguno)."""
+    h, max_idx, cola = hashlib.sha256(), -1, b""
+    with z.open(parte) as f:
+        while bloque := f.read(_TAM_LECTURA):
+            h.update(bloque)
+            # La cola solapa el corte entre bloques; repetir un índice no altera el máximo.
+            buf = cola + bloque
+            indices = _RE_INDICE_SST.findall(buf)
+            if indices:
+                max_idx = max(max_idx, max(map(int, indices)))
+            cola = buf[-1024:]
+    return h.hexdigest(), max_idx
+
+def _hash_textos_compartidos(z: zipfile.ZipFile, hasta: int) -> str:
+    h = hashlib.sha256()
+    if hasta < 0 or "xl/sharedStrings.xml" not in z.namelist():
+        return h.hexdigest()
+    i = 0
+    with z.open("xl/sharedStrings.xml") as f:
+        for _, el in ET.iterparse(f):
+            if _local(el.tag) != "si":
+                continue
+            texto = "".join(t.text or "" for t in el.iter() if _local(t.tag) == "t")
+            h.update(texto.encode("utf-8") + b"\x00")
+            el.clear()
+            i += 1
+            if i > hasta:
+                break
+    return h.hexdigest()
+
+def huella_archivo(origen) -> str:
+    """SHA-256 del archivo completo (ruta, bytes o archivo abierto), sin abrir el zip."""
+    h = hashlib.sha256()
+    if isinstance(origen, (bytes, bytearray, memoryview)):
+        h.update(origen)
+        return h.hexdigest()
+    f = origen if hasattr(origen, "read") else open(origen, "rb")
+    try:
+        inicio = f.tell()
+        while bloque := f.read(_TAM_LECTURA):
+            h.update(bloque)
+        f.seek(inicio)
+    finally:
+        if f is not origen:
+            f.close()
+    return h.hexdigest()
+
+def huellas_hojas(origen, hojas) -> dict:
+    """Devuelve ``{hoja: huella_hex}`` para las ``hojas`` indicadas de ``origen`` (ruta o bytes)."""
+    if isinstance(origen, (bytes, bytearray)):
+        origen = BytesIO(origen)
+    with zipfile.ZipFile(origen) as z:
+        rels = _relaciones(z)
+        partes = _partes_hojas(z, rels)
+        h_estilos = _hash_estilos(z, rels)
+        huellas = {}
+        for hoja in hojas:
+            if not partes.get(hoja):
+                raise KeyError(f"Worksheet {hoja} does not exist.")
+            h_xml, max_idx = _hash_xml_hoja(z, partes[hoja])
+            h_sst = _hash_textos_compartidos(z, max_idx)
+            huellas[hoja] = hashlib.sha256(f"{h_xml}:{h_sst}:{h_estilos}".encode()).hexdigest()
+    return huellas
@@ -0,0 +1,116 @@
+"""Ingesta del libro MURC: una sola pasada por hoja y las tres hojas en paralelo.
+
+Cada hoja se recorre una vez en modo solo lectura (los encabezados se
+resuelven con la primera fila leída) y se normaliza en el mismo proceso
+que la leyó. Como openpyxl es Python puro, el paralelismo se hace con
+procesos; el tiempo total queda acotado por la hoja más lenta (Escaneo)
+en vez de la suma de las tres.
+"""
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import NamedTuple
+
+import pandas as pd
+
+from .lectura import leer_hoja
+from .metricas import MedicionEtapa, activo, medir
+from .nucleo import (
+    COLUMNAS_INFERIDAS, HOJA_CRITICIDAD, HOJA_CVSSF, HOJA_ESCANEO,
+    normalizar_criticidad, normalizar_cvssf, normalizar_escaneo,
+    resolver_columnas_criticidad, resolver_columnas_cvssf, resolver_columnas_escaneo,
+)
+
+HOJAS = {
+    HOJA_ESCANEO:    (resolver_columnas_escaneo, normalizar_escaneo),
+    HOJA_CVSSF:      (resolver_columnas_cvssf, normalizar_cvssf),
+    HOJA_CRITICIDAD: (resolver_columnas_criticidad, normalizar_criticidad),
+}
+
+@dataclass
+class TiempoHoja:
+    hoja: str
+    filas: int
+    segundos: float
+
+@dataclass
+class InformeIngesta:
+    paralelo: bool
+    segundos: float = 0.0
+    hojas: list = field(default_factory=list)
+
+    def tabla(self) -> pd.DataFrame:
+        return pd.DataFrame(
+            [(t.hoja, t.filas, round(t.segundos, 3)) for t in self.hojas],
+            columns=["Hoja", "Filas", "Segundos"],
+        )
+
+    def __str__(self) -> str:
+        modo = "paralela" if self.paralelo else "secuencial"
+        lineas = [f"Ingesta {modo}: {self.segundos:.2f} s"]
+        lineas += [f"  {t.hoja:<20} {t.filas:>10} filas  {t.segundos:8.2f} s" for t in self.hojas]
+        suma = sum(t.segundos for t in self.hojas)
+        if self.paralelo and self.segundos > 0:
+            lineas.append(f"  suma por hoja {suma:.2f} s -> aceleración x{suma / self.segundos:.2f}")
+        return "\n".join(lineas)
+
+class LibroNormalizado(NamedTuple):
+    escaneo: pd.DataFrame
+    cvssf: pd.DataFrame
+    criticidad: pd.DataFrame
+    informe: InformeIngesta
+
+def leer_hoja_normalizada(origen, hoja: str):
+    """Lee y normaliza una hoja; devuelve (DataFrame, TiempoHoja)."""
+    resolver, normalizar = HOJAS[hoja]
+    t0 = time.perf_counter()
+    with medir(f"lectura_{hoja}") as m:
+        df = normalizar(leer_hoja(origen, hoja, resolver, COLUMNAS_INFERIDAS.get(hoja, ())))
+        m.filas_salida = len(df)
+    return df, TiempoHoja(hoja, len(df), time.perf_counter() - t0)
+
+def leer_hojas(origen, hojas, paralelo=None):
+    """Lee y normaliza las ``hojas`` indicadas; devuelve (``{hoja: DataFrame}``, InformeIngesta).
+
+    ``origen`` puede ser una ruta o los bytes del .xlsx. En modo paralelo
+    los bytes se vuelcan una vez a un archivo temporal para que cada
+    proceso lo abra por su cuenta en lugar de recibir una copia serializada.
+    Con ``paralelo=None`` solo se usan procesos si hay más de un núcleo y
+    más de una hoja que leer.
+    """
+    hojas = list(hojas)
+    if paralelo is None:
+        paralelo = (os.cpu_count() or 1) > 1 and len(hojas) > 1
+    informe = InformeIngesta(paralelo=paralelo)
+    t0 = time.perf_counter()
+    if not paralelo:
+        resultados = [leer_hoja_normalizada(origen, h) for h in hojas]
+    else:
+        temporal = None
+        if isinstance(origen, (bytes, bytearray)):
+            fd, temporal = tempfile.mkstemp(suffix=".xlsx")
+            with os.fdopen(fd, "wb") as f:
+                f.write(origen)
+            origen = temporal
+        try:
+            with ProcessPoolExecutor(max_workers=len(hojas)) as pool:
+                futuros = [pool.submit(leer_hoja_normalizada, origen, h) for h in hojas]
+                resultados = [f.result() for f in futuros]
+        finally:
+            if temporal:
+                os.remove(temporal)
+    informe.segundos = time.perf_counter() - t0
+    informe.hojas = [t for _, t in resultados]
+    metricas = activo()
+    if paralelo and metricas is not None:
+        # Medidas en los procesos de lectura: tiempo y filas, sin memoria.
+        for t in informe.hojas:
+            metricas.agregar(MedicionEtapa(f"lectura_{t.hoja}", t.segundos, filas_salida=t.filas))
+    return {h: df for h, (df, _) in zip(hojas, resultados)}, informe
+
+def leer_libro(origen, paralelo=None) -> LibroNormalizado:
+    """Lee las hojas Escaneo, CVSSF y Criticidad_Activos ya normalizadas (ver ``leer_hojas``)."""
+    frames, informe = leer_hojas(origen, HOJAS, paralelo=paralelo)
+    return LibroNormalizado(frames[HOJA_ESCANEO], frames[HOJA_CVSSF], frames[HOJA_CRITICIDAD], informe)
@@ -0,0 +1,366 @@
+"""Enriquecimiento offline de CVSS y CVSSF con NVD, EPSS y el catálogo KEV.
+
+Los feeds se descargan (espejo local) y se compilan una vez en un índice en
+disco que se abre con ``np.memmap``: una columna de claves ordenadas
+(``CVE-AAAA-N`` -> AAAA * 10**10 + N) y una columna por dato. Buscar
+millones de identificadores es un ``searchsorted`` sobre las claves
+distintas, sin cargar el índice en memoria::
+
+    python -m murc inteligencia --nvd espejo/nvd --epss espejo/epss --kev espejo/kev -o murc_inteligencia.idx
+
+Volver a compilar sobre el mismo índice es incremental: solo se leen los
+archivos nuevos o modificados (por SHA-256) y sus datos reemplazan a los
+anteriores; dentro de una fuente, los archivos se aplican por nombre (el
+«modified» de NVD o el EPSS más reciente quedan al final).
+
+Los valores del libro mandan: solo se completan las celdas vacías de la
+hoja CVSSF y los identificadores del Escaneo que no figuran en ella.
+
+CVSSF a partir de la amenaza
+----------------------------
+CVSSF = 4 ** (CVSS_amenaza - 4) (máximo 4096 con CVSS 10), con
+CVSS_amenaza = CVSS base x factor de madurez del exploit de CVSS 3.1 (E),
+redondeado hacia arriba a un decimal:
+
+* en el catálogo KEV (explotación activa): 1.0 (High)
+* EPSS >= 0.1: 0.97 (Functional); EPSS >= 0.01: 0.94 (Proof-of-Concept)
+* EPSS menor: 0.91 (Unproven)
+* sin EPSS ni KEV: 1.0 (Not Defined)
+"""
+import glob
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+from dataclasses import dataclass, field
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from .metricas import medir
+from .nucleo import MAX_CVSSF
+
+RUTA_INTELIGENCIA = os.getenv("MURC_INTELIGENCIA", "murc_inteligencia.idx")
+
+_MAGICO = b"MURCINT1"
+_ALINEACION = 64
+COLUMNAS = {"clave": "<u8", "cvss": "<f4", "epss": "<f4", "percentil": "<f4", "kev": "u1"}
+FUENTES = ("nvd", "epss", "kev")
+
+FACTOR_KEV, FACTOR_SIN_DATO = 1.0, 1.0
+FACTORES_EPSS = [(0.1, 0.97), (0.01, 0.94), (0.0, 0.91)]    # (EPSS mínimo, factor de madurez)
+
+# =========================
+#   CLAVES Y CVSSF
+# =========================
+def claves_cve(identificadores) -> np.ndarray:
+    """Clave uint64 de cada identificador ``CVE-AAAA-N`` (0 si no es un CVE).
+
+    Se decodifica sobre los códigos de carácter de un arreglo de ancho fijo,
+    sin expresiones regulares por fila.
+    """
+    textos = np.asarray(pd.Series(identificadores, dtype=object).fillna(""), dtype="U")
+    n, ancho = len(textos), textos.dtype.itemsize // 4
+    if n == 0 or ancho < 10:
+        return np.zeros(n, dtype="uint64")
+    c = textos.view(np.uint32).reshape(n, ancho)
+    digito = (c >= 48) & (c <= 57)
+    validos = ((c[:, :4] | 0x20) == [ord(x) for x in "cve-"]).all(axis=1) & digito[:, 4:8].all(axis=1) & (c[:, 8] == 45)
+    # Número: solo dígitos y luego relleno (0), entre 1 y 10 dígitos.
+    cola, digitos_cola = c[:, 9:], digito[:, 9:]
+    largo = digitos_cola.sum(axis=1)
+    validos &= (digitos_cola | (cola == 0)).all(axis=1) & (largo >= 1) & (largo <= 10)
+    validos &= (np.diff(digitos_cola.astype(np.int8), axis=1) <= 0).all(axis=1)
+    anio = ((c[:, 4:8].astype(np.int64) - 48) * [1000, 100, 10, 1]).sum(axis=1)
+    numero = np.zeros(n, dtype=np.int64)
+    for j in range(min(cola.shape[1], 10)):
+        numero = np.where(digitos_cola[:, j], numero * 10 + cola[:, j].astype(np.int64) - 48, numero)
+    return np.where(validos, anio.astype("uint64") * np.uint64(10**10) + numero.astype("uint64"), np.uint64(0))
+
+def cvssf_por_amenaza(cvss, epss, kev) -> np.ndarray:
+    """CVSSF desde el CVSS base ajustado por madurez del exploit (ver el docstring del módulo)."""
+    cvss = np.asarray(cvss, dtype="float64")
+    epss = np.asarray(epss, dtype="float64")
+    kev = np.asarray(kev, dtype=bool)
+    factor = np.full(len(cvss), FACTOR_SIN_DATO)
+    for minimo, f in reversed(FACTORES_EPSS):
+        factor[epss >= minimo] = f
+    factor[kev] = FACTOR_KEV
+    ajustado = np.ceil(np.round(cvss * factor * 10, 6)) / 10
+    return np.minimum(np.round(4.0 ** (ajustado - 4), 2), MAX_CVSSF)
+
+# =========================
+#   LECTURA DE FEEDS
+# =========================
+def _abrir(ruta):
+    return gzip.open(ruta, "rt", encoding="utf-8") if str(ruta).endswith(".gz") else open(ruta, encoding="utf-8")
+
+def _puntaje_nvd(metricas: dict):
+    # Preferencia: CVSS 3.1, 3.0, 4.0 y 2; dentro de cada versión, la puntuación «Primary».
+    for version in ("cvssMetricV31", "cvssMetricV30", "cvssMetricV40", "cvssMetricV2"):
+        lista = metricas.get(version) or []
+        lista = sorted(lista, key=lambda m: m.get("type") != "Primary")
+        if lista:
+            return lista[0]["cvssData"]["baseScore"]
+    return None
+
+def leer_nvd(ruta) -> pd.DataFrame:
+    """CVE y CVSS base de un feed NVD (API 2.0 o feeds JSON 1.1), opcionalmente .gz."""
+    with _abrir(ruta) as f:
+        datos = json.load(f)
+    filas = []
+    if "vulnerabilities" in datos:
+        for v in datos["vulnerabilities"]:
+            if "cve" not in v:    # p. ej. el catálogo KEV, que también usa la clave «vulnerabilities»
+                continue
+            cve = v["cve"]
+            filas.append((cve["id"], _puntaje_nvd(cve.get("metrics", {}))))
+    else:
+        for item in datos.get("CVE_Items", []):
+            impacto = item.get("impact", {})
+            puntaje = (impacto.get("baseMetricV3", {}).get("cvssV3", {}).get("baseScore")
+                       or impacto.get("baseMetricV2", {}).get("cvssV2", {}).get("baseScore"))
+            filas.append((item["cve"]["CVE_data_meta"]["ID"], puntaje))
+    return pd.DataFrame(filas, columns=["cve", "cvss"])
+
+def leer_epss(ruta) -> pd.DataFrame:
+    """CSV diario de EPSS (``cve,epss,percentile``, con o sin la línea ``#model_version``)."""
+    df = pd.read_csv(ruta, comment="#", usecols=["cve", "epss", "percentile"])
+    return df.rename(columns={"percentile": "percentil"})
+
+def leer_kev(ruta) -> pd.DataFrame:
+    """Catálogo KEV de CISA en JSON o CSV (columna ``cveID``)."""
+    if str(ruta).lower().endswith((".csv", ".csv.gz")):
+        return pd.read_csv(ruta, usecols=["cveID"]).rename(columns={"cveID": "cve"})
+    with _abrir(ruta) as f:
+        datos = json.load(f)
+    return pd.DataFrame({"cve": [v["cveID"] for v in datos.get("vulnerabilities", [])]})
+
+LECTORES = {"nvd": (leer_nvd, ["cvss"]), "epss": (leer_epss, ["epss", "percentil"]), "kev": (leer_kev, ["kev"])}
+
+def archivos_de_fuente(rutas, tipo: str) -> list:
+    """Archivos de una fuente a partir de archivos y/o directorios, ordenados por nombre."""
+    extensiones = {"nvd": (".json", ".json.gz"), "epss": (".csv", ".csv.gz"), "kev": (".json", ".csv")}[tipo]
+    archivos = []
+    for ruta in rutas or []:
+        if os.path.isdir(ruta):
+            archivos += [a for a in glob.glob(os.path.join(ruta, "*")) if a.lower().endswith(extensiones)]
+        else:
+            archivos.append(ruta)
+    return sorted(archivos, key=lambda a: os.path.basename(a))
+
+def _sha256(ruta) -> str:
+    h = hashlib.sha256()
+    with open(ruta, "rb") as f:
+        for trozo in iter(lambda: f.read(1 << 20), b""):
+            h.update(trozo)
+    return h.hexdigest()
+
+# =========================
+#   ÍNDICE EN DISCO
+# =========================
+def _vacio(n: int) -> dict:
+    return {
+        "clave": np.zeros(n, dtype="uint64"),
+        "cvss": np.full(n, np.nan, dtype="float32"), "epss": np.full(n, np.nan, dtype="float32"),
+        "percentil": np.full(n, np.nan, dtype="float32"), "kev": np.zeros(n, dtype="uint8"),
+    }
+
+def _fusionar(columnas: dict, claves: np.ndarray, valores: dict) -> dict:
+    """Inserta o actualiza ``valores`` para ``claves``; ante claves repetidas gana la última."""
+    validas = claves > 0
+    claves, valores = claves[validas], {k: v[validas] for k, v in valores.items()}
+    orden = np.argsort(claves, kind="stable")
+    ordenadas = claves[orden]
+    ultima = np.ones(len(ordenadas), dtype=bool)
+    ultima[:-1] = ordenadas[1:] != ordenadas[:-1]
+    sel = orden[ultima]
+    claves, valores = claves[sel], {k: v[sel] for k, v in valores.items()}
+
+    todas = np.union1d(columnas["clave"], claves)
+    nuevas = _vacio(len(todas))
+    nuevas["clave"] = todas
+    pos = np.searchsorted(todas, columnas["clave"])
+    for nombre in COLUMNAS:
+        if nombre != "clave":
+            nuevas[nombre][pos] = columnas[nombre]
+    pos = np.searchsorted(todas, claves)
+    for nombre, v in valores.items():
+        nuevas[nombre][pos] = v
+    return nuevas
+
+def _escribir(ruta, columnas: dict, meta: dict):
+    # Encabezado: mágico, filas, largo del JSON de metadatos; luego cada columna alineada a 64 bytes.
+    n = len(columnas["clave"])
+    desplazamientos, pos = {}, 0
+    cuerpo = json.dumps(meta, ensure_ascii=False).encode("utf-8")
+    inicio = -(-(len(_MAGICO) + 16 + len(cuerpo) + 4096) // _ALINEACION) * _ALINEACION
+    for nombre, tipo in COLUMNAS.items():
+        desplazamientos[nombre] = inicio + pos
+        pos += -(-n * np.dtype(tipo).itemsize // _ALINEACION) * _ALINEACION
+    meta = {**meta, "filas": n, "columnas": {k: [COLUMNAS[k], d] for k, d in desplazamientos.items()}}
+    cuerpo = json.dumps(meta, ensure_ascii=False).encode("utf-8")
+    if len(_MAGICO) + 16 + len(cuerpo) > inicio:
+        raise ValueError("metadatos del índice demasiado grandes")
+
+    directorio = os.path.dirname(os.path.abspath(ruta))
+    fd, parcial = tempfile.mkstemp(dir=directorio, suffix=".idx.tmp")
+    with os.fdopen(fd, "wb") as f:
+        f.write(_MAGICO + np.array([n, len(cuerpo)], dtype="<u8").tobytes() + cuerpo)
+        for nombre, tipo in COLUMNAS.items():
+            f.seek(desplazamientos[nombre])
+            np.ascontiguousarray(columnas[nombre], dtype=tipo).tofile(f)
+        f.truncate(inicio + pos)
+    os.replace(parcial, ruta)
+
+def _leer_meta(ruta) -> dict:
+    with open(ruta, "rb") as f:
+        if f.read(len(_MAGICO)) != _MAGICO:
+            raise ValueError(f"{ruta} no es un índice de inteligencia MURC")
+        _, largo = np.frombuffer(f.read(16), dtype="<u8")
+        return json.loads(f.read(int(largo)).decode("utf-8"))
+
+class IndiceInteligencia:
+    """Índice compilado, abierto con ``np.memmap`` (solo lectura)."""
+
+    def __init__(self, ruta=RUTA_INTELIGENCIA):
+        self.ruta = ruta
+        self.meta = _leer_meta(ruta)
+        n = self.meta["filas"]
+        # np.memmap no admite archivos vacíos: un índice sin filas usa arreglos vacíos.
+        self._columnas = {
+            nombre: np.memmap(ruta, dtype=tipo, mode="r", offset=desp, shape=(n,)) if n else np.empty(0, dtype=tipo)
+            for nombre, (tipo, desp) in self.meta["columnas"].items()
+        }
+
+    def __len__(self) -> int:
+        return self.meta["filas"]
+
+    @property
+    def version(self) -> str:
+        """Huella de las fuentes compiladas (cambia con cada actualización)."""
+        return self.meta["version"]
+
+    def fuentes(self) -> pd.DataFrame:
+        return pd.DataFrame(
+            [(f["tipo"], os.path.basename(clave), f["registros"], f["compilado"]) for clave, f in self.meta["fuentes"].items()],
+            columns=["Fuente", "Archivo", "Registros", "Compilado"],
+        )
+
+    def buscar(self, identificadores) -> pd.DataFrame:
+        """CVSS, EPSS, percentil y KEV por identificador (NaN/False si no está en el índice)."""
+        serie = pd.Series(identificadores)
+        if isinstance(serie.dtype, pd.CategoricalDtype):
+            # Resultado compacto: las categorías ya son los identificadores distintos.
+            codigos, unicos = serie.cat.codes.to_numpy(), serie.cat.categories
+        else:
+            codigos, unicos = pd.factorize(serie.astype("string"))
+        claves = claves_cve(unicos)
+        indice = self._columnas["clave"]
+        pos = np.searchsorted(indice, claves)
+        hallado = (claves > 0) & (pos < len(indice))
+        hallado[hallado] = indice[pos[hallado]] == claves[hallado]
+        pos = pos[hallado]
+        # Una fila por identificador distinto más una final vacía para los nulos.
+        valores = {}
+        for nombre, salida, decimales in (("cvss", "CVSS", 1), ("epss", "EPSS", 5), ("percentil", "Percentil EPSS", 5)):
+            col = np.full(len(claves) + 1, np.nan)
+            # float32 en disco: se redondea a los decimales del feed.
+            col[:-1][hallado] = np.round(self._columnas[nombre][pos].astype("float64"), decimales)
+            valores[salida] = col
+        valores["KEV"] = np.zeros(len(claves) + 1, dtype=bool)
+        valores["KEV"][:-1][hallado] = self._columnas["kev"][pos] == 1
+        codigos = np.where(codigos < 0, len(claves), codigos)
+        return pd.DataFrame({k: v[codigos] for k, v in valores.items()})
+
+@dataclass
+class InformeCompilacion:
+    ruta: str
+    registros: int = 0
+    leidos: list = field(default_factory=list)      # (tipo, archivo, registros)
+    sin_cambios: list = field(default_factory=list)
+
+    def __str__(self) -> str:
+        lineas = [f"{self.registros} CVE en {self.ruta}"]
+        lineas += [f"  {tipo:<5} {os.path.basename(a)}: {n} registros" for tipo, a, n in self.leidos]
+        if self.sin_cambios:
+            lineas.append(f"  sin cambios: {', '.join(os.path.basename(a) for a in self.sin_cambios)}")
+        return "\n".join(lineas)
+
+def compilar(destino=RUTA_INTELIGENCIA, nvd=None, epss=None, kev=None, completo: bool = False) -> InformeCompilacion:
+    """Compila (o actualiza) el índice ``destino`` con los archivos o directorios de cada fuente.
+
+    Si el índice existe, solo se leen los archivos nuevos o modificados;
+    ``completo`` lo reconstruye desde cero con todos los archivos indicados.
+    """
+    existe = os.path.exists(destino) and not completo
+    if existe:
+        anterior = IndiceInteligencia(destino)
+        columnas = {k: np.array(v) for k, v in anterior._columnas.items()}
+        fuentes = dict(anterior.meta["fuentes"])
+        del anterior
+    else:
+        columnas, fuentes = _vacio(0), {}
+    informe = InformeCompilacion(destino)
+
+    for tipo, rutas in (("nvd", nvd), ("epss", epss), ("kev", kev)):
+        lector, campos = LECTORES[tipo]
+        for archivo in archivos_de_fuente(rutas, tipo):
+            clave_fuente = f"{tipo}:{os.path.abspath(archivo)}"
+            sha = _sha256(archivo)
+            if fuentes.get(clave_fuente, {}).get("sha256") == sha:
+                informe.sin_cambios.append(archivo)
+                continue
+            df = lector(archivo)
+            valores = {c: np.ones(len(df), dtype="uint8") if c == "kev" else df[c].to_numpy(dtype="float32")
+                       for c in campos}
+            columnas = _fusionar(columnas, claves_cve(df["cve"]), valores)
+            fuentes[clave_fuente] = {"tipo": tipo, "sha256": sha, "registros": len(df),
+                                     "compilado": datetime.now().isoformat(timespec="seconds")}
+            informe.leidos.append((tipo, archivo, len(df)))
+
+    if informe.leidos or not existe:
+        version = hashlib.sha256(json.dumps(sorted((k, f["sha256"]) for k, f in fuentes.items())).encode()).hexdigest()
+        _escribir(destino, columnas, {"version": version, "fuentes": fuentes})
+    informe.registros = len(columnas["clave"])
+    return informe
+
+# =========================
+#   ENRIQUECIMIENTO
+# =========================
+def abrir(inteligencia):
+    """Acepta un índice ya abierto, una ruta o None."""
+    if inteligencia is None or isinstance(inteligencia, IndiceInteligencia):
+        return inteligencia
+    return IndiceInteligencia(inteligencia)
+
+def enriquecer_cvssf(cvssf_df: pd.DataFrame, indice: IndiceInteligencia, identificadores=None) -> pd.DataFrame:
+    """Hoja CVSSF normalizada con CVSS y CVSSF completados desde el índice.
+
+    Las celdas con valor en el libro no se tocan. ``identificadores`` (los
+    del Escaneo) que no figuran en la hoja se agregan como filas nuevas.
+    """
+    with medir("enriquecimiento", filas_entrada=len(cvssf_df)) as m:
+        df = cvssf_df
+        if identificadores is not None:
+            ids = pd.Series(pd.unique(pd.Series(identificadores, dtype="string").dropna()), dtype="string")
+            faltan = ids[~ids.isin(cvssf_df["Identificador"])]
+            if len(faltan):
+                nuevas = pd.DataFrame({"Identificador": faltan.to_numpy(), "CVSS": np.nan, "CVSSF": np.nan})
+                df = pd.concat([df, nuevas.astype({c: df[c].dtype for c in nuevas})], ignore_index=True)
+        vacias = (df["CVSS"].isna() | df["CVSSF"].isna()).to_numpy()
+        if vacias.any():
+            df = df.copy() if df is cvssf_df else df
+            # Hojas con puntajes enteros se leen como Int64: el índice trae CVSSF con decimales.
+            df = df.astype({c: "Float64" for c in ("CVSS", "CVSSF") if pd.api.types.is_integer_dtype(df[c])})
+            datos = indice.buscar(df["Identificador"].to_numpy(dtype=object)[vacias])
+            cvss = df["CVSS"].to_numpy(dtype="float64", na_value=np.nan)[vacias]
+            cvss = np.where(np.isnan(cvss), datos["CVSS"].to_numpy(), cvss)
+            cvssf = df["CVSSF"].to_numpy(dtype="float64", na_value=np.nan)[vacias]
+            cvssf = np.where(np.isnan(cvssf), cvssf_por_amenaza(cvss, datos["EPSS"], datos["KEV"]), cvssf)
+            df.loc[vacias, "CVSS"] = cvss
+            df.loc[vacias, "CVSSF"] = cvssf
+        m.filas_salida = len(df)
+    return df
@@ -0,0 +1,120 @@
+"""Lectura en flujo de hojas Excel con openpyxl en modo solo lectura.
+
+Reproduce la conversión de celdas de ``pd.read_excel`` (engine openpyxl) para
+que los valores obtenidos por bloques sean idénticos a los de la lectura
+completa, pero sin materializar la hoja entera en memoria.
+"""
+from io import BytesIO
+
+import pandas as pd
+from openpyxl import load_workbook
+from openpyxl.cell.cell import ERROR_CODES
+
+# Valores que pandas interpreta como nulos por defecto al leer texto.
+NA_EXCEL = frozenset({
+    "", "#N/A", "#N/A N/A", "#NA", "-1.#IND", "-1.#QNAN", "-NaN", "-nan",
+    "1.#IND", "1.#QNAN", "<NA>", "N/A", "NA", "NULL", "NaN", "None", "n/a",
+    "nan", "null",
+}) | frozenset(ERROR_CODES)
+
+TAM_BLOQUE = 50_000
+
+def _abrir_libro(origen):
+    if isinstance(origen, (bytes, bytearray)):
+        origen = BytesIO(origen)
+    return load_workbook(origen, read_only=True, data_only=True, keep_links=False)
+
+def _convertir_celda(valor):
+    # Igual que pandas: enteros almacenados como float vuelven a int.
+    if valor is None:
+        return ""
+    if isinstance(valor, float) and valor.is_integer():
+        return int(valor)
+    return valor
+
+def _a_nulo(valor):
+    if isinstance(valor, str) and valor in NA_EXCEL:
+        return None
+    return valor
+
+def _encabezados(fila) -> list:
+    # Mismas reglas que pandas: vacíos -> "Unnamed: i", repetidos -> "X.1".
+    vistos, headers = {}, []
+    for i, valor in enumerate(fila):
+        h = _convertir_celda(valor)
+        if h == "":
+            h = f"Unnamed: {i}"
+        n = vistos.get(h, 0)
+        vistos[h] = n + 1
+        headers.append(h if n == 0 else f"{h}.{n}")
+    return headers
+
+def iterar_bloques(origen, hoja: str, resolver, tam_bloque: int = TAM_BLOQUE):
+    """Recorre ``hoja`` una sola vez y produce DataFrames de hasta ``tam_bloque`` filas.
+
+    ``resolver`` recibe los encabezados de la primera fila y devuelve
+    ``{columna_canónica: encabezado_real}``; los bloques salen con las
+    columnas canónicas y valores crudos (dtype object). Siempre se produce
+    al menos un bloque, vacío si la hoja no tiene datos.
+    """
+    wb = _abrir_libro(origen)
+    try:
+        ws = wb[hoja]
+        ws.reset_dimensions()
+        filas = ws.iter_rows(values_only=True)
+        headers = _encabezados(next(filas, ()))
+        mapeo = resolver(headers)
+        canon = list(mapeo)
+        idx = [headers.index(mapeo[c]) for c in canon]
+
+        columnas = {c: [] for c in canon}
+        n, vacias, emitidos = 0, 0, 0
+        for fila in filas:
+            # Las filas completamente vacías al final de la hoja se descartan,
+            # las intermedias se conservan como nulos (como pandas).
+            if not any(v is not None and v != "" for v in fila):
+                vacias += 1
+                continue
+            # Las vacías acumuladas se vuelcan por tramos: ningún bloque pasa de tam_bloque.
+            while vacias:
+                k = min(vacias, tam_bloque - n)
+                for c in canon:
+                    columnas[c].extend([None] * k)
+                n += k
+                vacias -= k
+                if n >= tam_bloque:
+                    yield pd.DataFrame(columnas, columns=canon, dtype=object)
+                    columnas = {c: [] for c in canon}
+                    n = 0
+                    emitidos += 1
+            for c, i in zip(canon, idx):
+                columnas[c].append(_a_nulo(_convertir_celda(fila[i])) if i < len(fila) else None)
+            n += 1
+            if n >= tam_bloque:
+                yield pd.DataFrame(columnas, columns=canon, dtype=object)
+                columnas = {c: [] for c in canon}
+                n = 0
+                emitidos += 1
+        if n or not emitidos:
+            yield pd.DataFrame(columnas, columns=canon, dtype=object)
+    finally:
+        wb.close()
+
+def _inferir_numerica(serie: pd.Series) -> pd.Series:
+    # Como el lector de pandas sin dtype: si todos los valores son números o
+    # textos numéricos, la columna pasa a int64 (o float64 si hay vacíos).
+    try:
+        return pd.to_numeric(serie)
+    except (ValueError, TypeError):
+        return serie
+
+def leer_hoja(origen, hoja: str, resolver, inferir=()) -> pd.DataFrame:
+    """Lee ``hoja`` completa en una sola pasada (ver ``iterar_bloques``).
+
+    Las columnas ``inferir`` toman el tipo que les daría ``pd.read_excel``
+    sin ``dtype`` (requiere la columna entera, por eso no se hace por bloque).
+    """
+    bloque, = iterar_bloques(origen, hoja, resolver, tam_bloque=float("inf"))
+    for columna in inferir:
+        bloque[columna] = _inferir_numerica(bloque[columna])
+    return bloque
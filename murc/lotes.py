@@ -0,0 +1,97 @@
+"""Puntuación por lotes: varios libros (uno por unidad de negocio) en paralelo.
+
+Cada libro se puntúa en un proceso del pool (uno por núcleo). Un error en
+un archivo se registra y el lote continúa (también si su proceso muere); el
+resultado consolidado lleva la columna «Origen» con el nombre del archivo.
+"""
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from typing import Optional
+
+import pandas as pd
+
+from .motor import puntuar_libro
+from .nucleo import COLUMNAS_RESULTADO
+
+@dataclass
+class ResultadoArchivo:
+    origen: str
+    filas: int = 0
+    segundos: float = 0.0
+    error: Optional[str] = None
+
+@dataclass
+class Lote:
+    resultado: pd.DataFrame
+    archivos: list = field(default_factory=list)
+    segundos: float = 0.0
+
+    def informe(self) -> pd.DataFrame:
+        return pd.DataFrame(
+            [(a.origen, a.filas, round(a.segundos, 2), a.error or "") for a in self.archivos],
+            columns=["Origen", "Filas", "Segundos", "Error"],
+        )
+
+    @property
+    def errores(self) -> list:
+        return [a for a in self.archivos if a.error]
+
+def archivos_de_directorio(directorio) -> dict:
+    """``{nombre: ruta}`` de los .xlsx del directorio (sin archivos de bloqueo de Excel)."""
+    nombres = sorted(n for n in os.listdir(directorio) if n.lower().endswith(".xlsx") and not n.startswith("~$"))
+    return {n: os.path.join(directorio, n) for n in nombres}
+
+def nombres_unicos(nombres) -> list:
+    """Los mismos ``nombres``, con sufijo « (2)», « (3)»... en los repetidos."""
+    vistos, unicos = {}, []
+    for nombre in nombres:
+        n = vistos[nombre] = vistos.get(nombre, 0) + 1
+        unicos.append(nombre if n == 1 else f"{nombre} ({n})")
+    return unicos
+
+def _puntuar_uno(origen: str, datos, inteligencia=None):
+    t0 = time.perf_counter()
+    try:
+        # Sin pool interno: el paralelismo está entre archivos.
+        df = puntuar_libro(datos, paralelo=False, inteligencia=inteligencia)
+        return origen, df, ResultadoArchivo(origen, len(df), time.perf_counter() - t0)
+    except Exception as e:
+        return origen, None, ResultadoArchivo(origen, 0, time.perf_counter() - t0, f"{type(e).__name__}: {e}")
+
+def puntuar_lote(archivos, max_procesos=None, al_avanzar=None, inteligencia=None) -> Lote:
+    """Puntúa ``archivos`` (``{nombre: ruta o bytes}`` o lista de rutas) en paralelo.
+
+    ``al_avanzar(hechos, total, ResultadoArchivo)`` se llama cada vez que
+    termina un archivo, en el orden en que van terminando. ``inteligencia``
+    es la ruta del índice de feeds; cada proceso lo abre por su cuenta.
+    """
+    if not isinstance(archivos, dict):
+        archivos = list(archivos)
+        archivos = dict(zip(nombres_unicos(os.path.basename(str(r)) for r in archivos), archivos))
+    t0 = time.perf_counter()
+    total = len(archivos)
+    max_procesos = max_procesos or os.cpu_count() or 1
+    frames, informes = {}, {}
+
+    with ProcessPoolExecutor(max_workers=max(1, min(max_procesos, total))) as pool:
+        futuros = {pool.submit(_puntuar_uno, nombre, datos, inteligencia): nombre for nombre, datos in archivos.items()}
+        for hechos, futuro in enumerate(as_completed(futuros), start=1):
+            try:
+                origen, df, info = futuro.result()
+            except Exception as e:
+                # El proceso murió (memoria, fallo nativo): BrokenProcessPool marca este
+                # archivo y todos los pendientes; los ya terminados se conservan.
+                origen, df = futuros[futuro], None
+                info = ResultadoArchivo(origen, error=f"{type(e).__name__}: {e}")
+            informes[origen] = info
+            if df is not None:
+                frames[origen] = df
+            if al_avanzar is not None:
+                al_avanzar(hechos, total, info)
+
+    partes = [frames[n].assign(Origen=n) for n in archivos if n in frames]
+    columnas = ["Origen"] + COLUMNAS_RESULTADO
+    resultado = pd.concat(partes, ignore_index=True)[columnas] if partes else pd.DataFrame(columns=columnas)
+    return Lote(resultado, [informes[n] for n in archivos], time.perf_counter() - t0)
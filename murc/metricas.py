@@ -0,0 +1,232 @@
+"""Instrumentación por etapa: tiempo, filas de entrada/salida y pico de memoria.
+
+Las etapas se marcan con ``medir``; si no hay un registro activo, ``medir``
+no hace nada (salvo crear la medición), de modo que el núcleo puede quedar
+instrumentado sin costo para quien no mide::
+
+    metricas = Metricas("carga")
+    with registrando(metricas):
+        with medir("union_cvssf", filas_entrada=len(df)) as m:
+            df = df.merge(...)
+            m.filas_salida = len(df)
+    metricas.escribir("murc_metricas.jsonl")
+
+El pico de memoria se mide según MURC_METRICAS_MEMORIA:
+
+* ``rss`` (por defecto) — pico de memoria residente del proceso durante la
+  etapa (``VmHWM`` de Linux, reiniciado al abrir cada etapa). Costo nulo;
+  en otros sistemas queda vacío.
+* ``tracemalloc`` — memoria asignada por Python y NumPy por encima de la
+  que había al iniciar la etapa. Más preciso, pero varias veces más lento.
+* ``0`` — sin memoria.
+
+Las etapas pueden anidarse; el pico de la etapa externa incluye el de las
+internas. Ambos picos son del proceso entero: si una etapa se solapa con
+otra de otra corrida (dos sesiones de Streamlit, hilos del servicio), su
+pico queda vacío en lugar de mezclar la memoria de las dos.
+"""
+import json
+import os
+import tempfile
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from typing import Optional
+
+import pandas as pd
+
+RUTA_METRICAS = os.getenv("MURC_METRICAS")                    # .prom = texto Prometheus; otro = JSON-lines
+MODO_MEMORIA = os.getenv("MURC_METRICAS_MEMORIA", "rss")
+
+_ACTIVO = ContextVar("murc_metricas", default=None)
+_LOCK_ARCHIVO = threading.Lock()
+_ULTIMAS, _EJECUCIONES = {}, {}   # por etapa, acumulado en el proceso (texto Prometheus)
+_LOCK_MEMORIA = threading.Lock()
+_EN_CURSO = set()                 # Metricas con etapas de memoria abiertas
+_TRACEMALLOC = [False]            # tracemalloc iniciado por estas mediciones (no por quien llama)
+
+# =========================
+#   MEMORIA
+# =========================
+# Cada modo da (memoria actual, pico desde el último reinicio) en bytes y
+# una forma de reiniciar el pico.
+def _vm_hwm() -> int:
+    with open("/proc/self/status") as f:
+        for linea in f:
+            if linea.startswith("VmHWM:"):
+                return int(linea.split()[1]) * 1024
+    return 0
+
+def _reiniciar_hwm():
+    with open("/proc/self/clear_refs", "w") as f:
+        f.write("5")
+
+def _rss_disponible() -> bool:
+    # Sin reiniciar: en un proceso compartido borraría el pico de otra etapa en curso.
+    try:
+        return _vm_hwm() > 0 and os.access("/proc/self/clear_refs", os.W_OK)
+    except OSError:
+        return False
+
+RSS_DISPONIBLE = _rss_disponible()
+
+def _memoria_rss():
+    return 0, _vm_hwm()
+
+def _memoria_tracemalloc():
+    return tracemalloc.get_traced_memory()
+
+@dataclass
+class MedicionEtapa:
+    etapa: str
+    segundos: float = 0.0
+    filas_entrada: Optional[int] = None
+    filas_salida: Optional[int] = None
+    pico_mb: Optional[float] = None
+    inicio: str = field(default_factory=lambda: datetime.now().isoformat(timespec="milliseconds"))
+
+class Metricas:
+    """Mediciones de una corrida (una carga, una interacción...), en orden de cierre."""
+
+    def __init__(self, corrida: str = "", memoria: str = MODO_MEMORIA):
+        self.corrida = corrida
+        self.memoria = memoria if memoria in ("rss", "tracemalloc") else None
+        if self.memoria == "rss" and not RSS_DISPONIBLE:
+            self.memoria = None
+        self.mediciones = []
+        self._pila = []          # [base, pico_visto, solapada] de cada etapa abierta
+
+    @contextmanager
+    def etapa(self, nombre: str, filas_entrada: int = None):
+        m = MedicionEtapa(nombre, filas_entrada=filas_entrada)
+        if self.memoria:
+            self._abrir_memoria()
+        t0 = time.perf_counter()
+        try:
+            yield m
+        finally:
+            m.segundos = time.perf_counter() - t0
+            if self.memoria:
+                m.pico_mb = self._cerrar_memoria()
+            self.mediciones.append(m)
+
+    def _abrir_memoria(self):
+        leer, reiniciar = self._lectores()
+        with _LOCK_MEMORIA:
+            otras = [m for m in _EN_CURSO if m is not self]
+            for m in otras:
+                for abierta in m._pila:
+                    abierta[2] = True
+            if self.memoria == "tracemalloc" and not tracemalloc.is_tracing():
+                tracemalloc.start()
+                _TRACEMALLOC[0] = True
+            actual, pico = leer()
+            if self._pila:
+                self._pila[-1][1] = max(self._pila[-1][1], pico)
+            # El pico es del proceso: reiniciarlo con otra corrida en curso arruinaría la suya.
+            if not otras:
+                reiniciar()
+            self._pila.append([actual, leer()[1], bool(otras)])
+            _EN_CURSO.add(self)
+
+    def _cerrar_memoria(self):
+        leer, _ = self._lectores()
+        with _LOCK_MEMORIA:
+            base, visto, solapada = self._pila.pop()
+            pico = max(visto, leer()[1])
+            if self._pila:
+                self._pila[-1][1] = max(self._pila[-1][1], pico)
+            else:
+                _EN_CURSO.discard(self)
+                if _TRACEMALLOC[0] and not _EN_CURSO:
+                    tracemalloc.stop()
+                    _TRACEMALLOC[0] = False
+        return None if solapada else round((pico - base) / 2**20, 2)
+
+    def _lectores(self):
+        if self.memoria == "tracemalloc":
+            return _memoria_tracemalloc, tracemalloc.reset_peak
+        return _memoria_rss, _reiniciar_hwm
+
+    def agregar(self, medicion: MedicionEtapa):
+        """Agrega una medición tomada fuera del registro (p. ej. en otro proceso)."""
+        self.mediciones.append(medicion)
+
+    def tabla(self) -> pd.DataFrame:
+        return pd.DataFrame(
+            [(m.etapa, round(m.segundos, 4), m.filas_entrada, m.filas_salida, m.pico_mb) for m in self.mediciones],
+            columns=["Etapa", "Segundos", "Filas entrada", "Filas salida", "Pico MB"],
+        )
+
+    # ---- Exportación ----
+    def escribir(self, ruta=None):
+        """Vuelca las mediciones en ``ruta`` (por defecto MURC_METRICAS; sin ruta no hace nada)."""
+        ruta = ruta or RUTA_METRICAS
+        if not ruta:
+            return
+        with _LOCK_ARCHIVO:
+            if str(ruta).endswith(".prom"):
+                self._escribir_prometheus(ruta)
+            else:
+                with open(ruta, "a", encoding="utf-8") as f:
+                    for m in self.mediciones:
+                        f.write(json.dumps({"corrida": self.corrida, **asdict(m)}, ensure_ascii=False) + "\n")
+
+    def _escribir_prometheus(self, ruta):
+        # Formato de texto para el textfile collector de node_exporter: última
+        # medición de cada etapa vista en el proceso y ejecuciones acumuladas;
+        # el archivo se reescribe de forma atómica.
+        for m in self.mediciones:
+            _ULTIMAS[m.etapa] = m
+            _EJECUCIONES[m.etapa] = _EJECUCIONES.get(m.etapa, 0) + 1
+        series = [
+            ("murc_etapa_segundos", "gauge", "Duración de la última ejecución de la etapa", "segundos"),
+            ("murc_etapa_filas_entrada", "gauge", "Filas de entrada de la última ejecución", "filas_entrada"),
+            ("murc_etapa_filas_salida", "gauge", "Filas de salida de la última ejecución", "filas_salida"),
+            ("murc_etapa_pico_memoria_bytes", "gauge", "Pico de memoria de la última ejecución", "pico_mb"),
+        ]
+        lineas = []
+        for nombre, tipo, ayuda, attr in series:
+            lineas += [f"# HELP {nombre} {ayuda}", f"# TYPE {nombre} {tipo}"]
+            for etapa, m in _ULTIMAS.items():
+                valor = getattr(m, attr)
+                if valor is None:
+                    continue
+                if attr == "pico_mb":
+                    valor = int(valor * 2**20)
+                lineas.append(f'{nombre}{{etapa="{etapa}"}} {valor}')
+        lineas += ["# HELP murc_etapa_ejecuciones_total Ejecuciones de la etapa", "# TYPE murc_etapa_ejecuciones_total counter"]
+        lineas += [f'murc_etapa_ejecuciones_total{{etapa="{e}"}} {n}' for e, n in _EJECUCIONES.items()]
+        directorio = os.path.dirname(os.path.abspath(ruta))
+        fd, parcial = tempfile.mkstemp(dir=directorio, suffix=".prom.tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write("\n".join(lineas) + "\n")
+        os.replace(parcial, ruta)
+
+# =========================
+#   REGISTRO ACTIVO
+# =========================
+@contextmanager
+def registrando(metricas: Metricas):
+    """Hace de ``metricas`` el registro activo de ``medir`` en este contexto."""
+    token = _ACTIVO.set(metricas)
+    try:
+        yield metricas
+    finally:
+        _ACTIVO.reset(token)
+
+def activo() -> Optional[Metricas]:
+    return _ACTIVO.get()
+
+@contextmanager
+def medir(nombre: str, filas_entrada: int = None):
+    metricas = _ACTIVO.get()
+    if metricas is None:
+        yield MedicionEtapa(nombre, filas_entrada=filas_entrada)
+        return
+    with metricas.etapa(nombre, filas_entrada) as m:
+        yield m
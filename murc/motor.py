@@ -0,0 +1,105 @@
+"""Motor de puntuación MURC sin interfaz, con lectura y escritura en flujo.
+
+La hoja Escaneo se procesa por bloques: cada bloque se une contra las tablas
+CVSSF y Criticidad_Activos (cargadas una vez en memoria) y las filas
+puntuadas se escriben de inmediato. El resultado es el mismo, fila a fila y
+en el mismo orden, que ``procesar_archivo_bytes`` en la interfaz.
+"""
+import time
+from dataclasses import dataclass
+
+import pandas as pd
+
+from .exportar import FORMATOS, escribir_csv
+from .ingesta import leer_libro
+from .inteligencia import abrir, enriquecer_cvssf
+from .lectura import TAM_BLOQUE, iterar_bloques, leer_hoja
+from .nucleo import (
+    COLUMNAS_INFERIDAS, HOJA_CRITICIDAD, HOJA_CVSSF, HOJA_ESCANEO,
+    PERFIL_MURC, normalizar_criticidad, normalizar_cvssf, normalizar_escaneo, puntuar,
+    resolver_columnas_criticidad, resolver_columnas_cvssf, resolver_columnas_escaneo,
+)
+
+@dataclass
+class ResumenFlujo:
+    filas_escaneo: int = 0
+    filas_escritas: int = 0
+    bloques: int = 0
+    segundos: float = 0.0
+
+def cargar_tablas_referencia(origen):
+    """Devuelve (cvssf_df, criticidad_df) normalizadas y sin filas repetidas.
+
+    Quitar repetidos exactos antes de unir no cambia el resultado final,
+    que de todos modos se deduplica, y evita multiplicar filas por bloque.
+    """
+    cvssf_df = normalizar_cvssf(leer_hoja(origen, HOJA_CVSSF, resolver_columnas_cvssf, COLUMNAS_INFERIDAS[HOJA_CVSSF]))
+    criticidad_df = normalizar_criticidad(leer_hoja(origen, HOJA_CRITICIDAD, resolver_columnas_criticidad))
+    return cvssf_df.drop_duplicates(), criticidad_df.drop_duplicates()
+
+def puntuar_por_bloques(origen, tam_bloque: int = TAM_BLOQUE, perfil=PERFIL_MURC, inteligencia=None):
+    """Genera DataFrames puntuados (columnas ``COLUMNAS_RESULTADO``) por bloque.
+
+    La deduplicación global se hace por la clave (Activo, Identificador): con
+    las tablas de referencia ya deduplicadas, cada clave produce siempre el
+    mismo conjunto de filas, así que basta con conservar su primera aparición.
+    La memoria crece con las claves distintas, no con las filas leídas.
+
+    Con ``inteligencia`` (índice o ruta, ver ``inteligencia.py``) la hoja
+    CVSSF se completa con los feeds locales; los identificadores de cada
+    bloque que no están en la hoja se agregan a medida que aparecen (solo
+    se consultan los nuevos, no la tabla acumulada).
+    """
+    cvssf_df, criticidad_df = cargar_tablas_referencia(origen)
+    indice = abrir(inteligencia)
+    if indice is not None:
+        cvssf_df = enriquecer_cvssf(cvssf_df, indice)
+        conocidos = set(cvssf_df["Identificador"].dropna())
+    vistos = set()
+    for bloque in iterar_bloques(origen, HOJA_ESCANEO, resolver_columnas_escaneo, tam_bloque):
+        escaneo_df = normalizar_escaneo(bloque)
+        claves = zip(escaneo_df["Activo"].tolist(), escaneo_df["Identificador"].tolist())
+        nuevas = [k not in vistos and not vistos.add(k) for k in claves]
+        if indice is not None:
+            ids = escaneo_df["Identificador"].dropna().unique()
+            faltan = [i for i in ids if i not in conocidos]
+            if faltan:
+                conocidos.update(faltan)
+                cvssf_df = pd.concat([cvssf_df, enriquecer_cvssf(cvssf_df.iloc[:0], indice, faltan)],
+                                     ignore_index=True)
+        yield len(bloque), puntuar(escaneo_df[nuevas], cvssf_df, criticidad_df, perfil)
+
+def puntuar_archivo(origen, destino, tam_bloque: int = TAM_BLOQUE, sep: str = ",", formato: str = "csv",
+                    al_bloque=None, perfil=PERFIL_MURC, inteligencia=None) -> ResumenFlujo:
+    """Puntúa ``origen`` (ruta o bytes .xlsx) y escribe el resultado en ``destino``.
+
+    ``formato`` es uno de ``exportar.FORMATOS`` (csv, xlsx, parquet). Si se
+    indica, ``al_bloque(df)`` recibe cada bloque puntuado (p. ej. para
+    agregarlo al histórico mientras se escribe).
+    """
+    resumen = ResumenFlujo()
+    t0 = time.perf_counter()
+
+    def bloques():
+        for n_leidas, df in puntuar_por_bloques(origen, tam_bloque, perfil, inteligencia):
+            resumen.filas_escaneo += n_leidas
+            resumen.bloques += 1
+            if al_bloque is not None:
+                al_bloque(df)
+            yield df
+
+    if formato == "csv":
+        resumen.filas_escritas = escribir_csv(bloques(), destino, sep=sep)
+    else:
+        resumen.filas_escritas = FORMATOS[formato][0](bloques(), destino)
+    resumen.segundos = time.perf_counter() - t0
+    return resumen
+
+def puntuar_libro(origen, paralelo=None, perfil=PERFIL_MURC, inteligencia=None) -> pd.DataFrame:
+    """Versión en memoria: lee el libro completo (ver ``ingesta.leer_libro``) y lo puntúa."""
+    libro = leer_libro(origen, paralelo=paralelo)
+    cvssf_df = libro.cvssf
+    indice = abrir(inteligencia)
+    if indice is not None:
+        cvssf_df = enriquecer_cvssf(cvssf_df, indice, libro.escaneo["Identificador"])
+    return puntuar(libro.escaneo, cvssf_df, libro.criticidad, perfil)
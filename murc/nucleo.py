@@ -0,0 +1,179 @@
+"""Núcleo de cálculo MURC: normalización de hojas, uniones y puntuación.
+
+No depende de Streamlit, de modo que la interfaz, la línea de comandos y
+cualquier proceso por lotes comparten exactamente la misma lógica.
+"""
+import unicodedata
+from dataclasses import dataclass
+
+import pandas as pd
+
+from .metricas import medir
+
+# =========================
+#   ESQUEMA DEL LIBRO
+# =========================
+HOJA_ESCANEO = "Escaneo"
+HOJA_CVSSF = "CVSSF"
+HOJA_CRITICIDAD = "Criticidad_Activos"
+
+ALIAS_IDENTIFICADOR = ["Identificador","ID","Id_vuln","CVE","CVE_ID"]
+ALIAS_ACTIVO        = ["Activo","Asset","Equipo","Hostname","Sistema"]
+ALIAS_CVSS          = ["CVSS","CVSS_Base","cvssscore"]
+ALIAS_CVSSF         = ["CVSSF","KEV","Exploitability","Threat_Score"]
+ALIAS_CRITICIDAD    = ["Criticidad","Criticidad_Activo","Clasificacion","Criticality"]
+
+COLUMNAS_RESULTADO = ["Activo","Identificador","CVSS","CVSSF","Criticidad","riesgo","Nivel de Exposición"]
+# Columnas que se leían sin dtype: pandas infería si eran numéricas (ver lectura.leer_hoja).
+COLUMNAS_INFERIDAS = {HOJA_CVSSF: ("CVSS", "CVSSF")}
+
+# =========================
+#   PARÁMETROS DEL MODELO
+# =========================
+MAPA_CRITICIDAD = {"bajo":1, "medio":2, "alto":3, "critico":4, "crítico":4}
+PESO_CVSS, PESO_CVSSF, PESO_CRITICIDAD = 0.5, 0.3, 0.2
+MAX_CVSS, MAX_CVSSF, MAX_CRITICIDAD = 10, 4096, 4
+BINS_EXPOSICION   = [-1, 0.25, 0.50, 0.75, float("inf")]
+NIVELES           = ["BAJO","MEDIO","ALTO","CRÍTICO"]
+NIVEL_SIN_DATO    = "SIN DATO"
+ORDEN_NIVEL       = {NIVEL_SIN_DATO: 0, **{n: i + 1 for i, n in enumerate(NIVELES)}}
+
+@dataclass(frozen=True)
+class PerfilPuntuacion:
+    """Pesos, normalizadores y umbrales de nivel de una forma de puntuar."""
+    nombre: str = "MURC"
+    peso_cvss: float = PESO_CVSS
+    peso_cvssf: float = PESO_CVSSF
+    peso_criticidad: float = PESO_CRITICIDAD
+    max_cvss: float = MAX_CVSS
+    max_cvssf: float = MAX_CVSSF
+    max_criticidad: float = MAX_CRITICIDAD
+    umbrales: tuple = tuple(BINS_EXPOSICION[1:-1])   # límites superiores de BAJO, MEDIO y ALTO
+
+    @property
+    def bins(self) -> list:
+        return [BINS_EXPOSICION[0], *self.umbrales, BINS_EXPOSICION[-1]]
+
+PERFIL_MURC = PerfilPuntuacion()
+
+# =========================
+#   HELPERS
+# =========================
+def _norm(s: str) -> str:
+    if s is None: return ""
+    s = str(s)
+    s = unicodedata.normalize("NFKD", s).encode("ascii", "ignore").decode("ascii")
+    return s.strip().lower().replace(" ", "").replace("-", "").replace("_", "")
+
+def _to_num(series: pd.Series) -> pd.Series:
+    return pd.to_numeric(series.astype("string").str.replace(",", ".", regex=False), errors="coerce")
+
+def _match_col(headers, aliases):
+    norm_map = { _norm(h): h for h in headers }
+    for alias in aliases:
+        a = _norm(alias)
+        if a in norm_map:
+            return norm_map[a]
+        for k, real in norm_map.items():
+            if a in k:
+                return real
+    return None
+
+# =========================
+#   RESOLUCIÓN DE COLUMNAS
+# =========================
+# Cada resolvedor recibe los encabezados reales de la hoja y devuelve
+# {columna_canónica: encabezado_real}, o lanza ValueError si falta alguna.
+def resolver_columnas_escaneo(headers) -> dict:
+    id_e  = _match_col(headers, ALIAS_IDENTIFICADOR)
+    act_e = _match_col(headers, ALIAS_ACTIVO)
+    if not id_e or not act_e:
+        raise ValueError(f"No encuentro columnas de Identificador/Activo en hoja Escaneo. Encabezados: {list(headers)}")
+    return {"Identificador": id_e, "Activo": act_e}
+
+def resolver_columnas_cvssf(headers) -> dict:
+    id_c    = _match_col(headers, ALIAS_IDENTIFICADOR)
+    cvss_c  = _match_col(headers, ALIAS_CVSS)
+    cvssf_c = _match_col(headers, ALIAS_CVSSF)
+    if not id_c or not cvss_c or not cvssf_c:
+        raise ValueError(f"No encuentro Identificador/CVSS/CVSSF en hoja CVSSF. Encabezados: {list(headers)}")
+    return {"Identificador": id_c, "CVSS": cvss_c, "CVSSF": cvssf_c}
+
+def resolver_columnas_criticidad(headers) -> dict:
+    act_cr  = _match_col(headers, ALIAS_ACTIVO)
+    crit_cr = _match_col(headers, ALIAS_CRITICIDAD)
+    if not act_cr or not crit_cr:
+        raise ValueError(
+            "Usecols no coincide con las columnas, columnas esperadas pero no encontradas: "
+            "['Activo','Criticidad'] (hoja: Criticidad_Activos). "
+            f"Encabezados detectados: {list(headers)}"
+        )
+    return {"Activo": act_cr, "Criticidad": crit_cr}
+
+# =========================
+#   NORMALIZACIÓN POR HOJA
+# =========================
+# Reciben las columnas ya renombradas a su nombre canónico.
+def normalizar_escaneo(df: pd.DataFrame) -> pd.DataFrame:
+    df = df[["Identificador","Activo"]].astype("string")
+    df["Identificador"] = df["Identificador"].str.strip().str.upper()
+    df["Activo"]        = df["Activo"].str.strip().str.upper()
+    return df
+
+def normalizar_cvssf(df: pd.DataFrame) -> pd.DataFrame:
+    df = df[["Identificador","CVSS","CVSSF"]].copy()
+    df["Identificador"] = df["Identificador"].astype("string").str.strip().str.upper()
+    df["CVSS"]  = _to_num(df["CVSS"])
+    df["CVSSF"] = _to_num(df["CVSSF"])
+    return df
+
+def normalizar_criticidad(df: pd.DataFrame) -> pd.DataFrame:
+    df = df[["Activo","Criticidad"]].astype("string")
+    df["Activo"]     = df["Activo"].str.strip().str.upper()
+    df["Criticidad"] = df["Criticidad"].str.strip().str.capitalize()
+    return df
+
+# =========================
+#   UNIÓN Y PUNTUACIÓN
+# =========================
+def unir(escaneo_df: pd.DataFrame, cvssf_df: pd.DataFrame, criticidad_df: pd.DataFrame) -> pd.DataFrame:
+    with medir("union_cvssf", filas_entrada=len(escaneo_df)) as m:
+        df = escaneo_df.merge(cvssf_df, on="Identificador", how="left")
+        m.filas_salida = len(df)
+    with medir("union_criticidad", filas_entrada=len(df)) as m:
+        df = df.merge(criticidad_df, on="Activo", how="left")
+        m.filas_salida = len(df)
+    return df
+
+def calcular_riesgo(df: pd.DataFrame, perfil: PerfilPuntuacion = PERFIL_MURC) -> pd.DataFrame:
+    # Agrega las columnas de cálculo sobre df (lo modifica) y devuelve la vista final.
+    df["Criticidad_num"]  = df["Criticidad"].astype("string").str.lower().map(MAPA_CRITICIDAD)
+    df["cvss_norm"]       = df["CVSS"] / perfil.max_cvss
+    df["cvssf_norm"]      = df["CVSSF"] / perfil.max_cvssf
+    df["criticidad_norm"] = df["Criticidad_num"] / perfil.max_criticidad
+
+    df["riesgo"] = (
+        perfil.peso_cvss*df["cvss_norm"].fillna(0) +
+        perfil.peso_cvssf*df["cvssf_norm"].fillna(0) +
+        perfil.peso_criticidad*df["criticidad_norm"].fillna(0)
+    )
+
+    df["Nivel de Exposición"] = pd.cut(df["riesgo"].fillna(-1), bins=perfil.bins, labels=NIVELES).astype("string")
+    df["Nivel de Exposición"] = df["Nivel de Exposición"].fillna(NIVEL_SIN_DATO)
+    return df[COLUMNAS_RESULTADO]
+
+def puntuar(escaneo_df: pd.DataFrame, cvssf_df: pd.DataFrame, criticidad_df: pd.DataFrame,
+            perfil: PerfilPuntuacion = PERFIL_MURC, compacto: bool = False) -> pd.DataFrame:
+    """Une las tres hojas normalizadas y devuelve el resultado MURC sin duplicados.
+
+    Con ``compacto`` el resultado usa la representación de ``compacto.py``.
+    """
+    from .compacto import compactar   # compacto.py importa las constantes de este módulo
+    df = unir(escaneo_df, cvssf_df, criticidad_df)
+    with medir("calculo_riesgo", filas_entrada=len(df)) as m:
+        df = calcular_riesgo(df, perfil)
+        m.filas_salida = len(df)
+    with medir("deduplicacion", filas_entrada=len(df)) as m:
+        df = compactar(df) if compacto else df.drop_duplicates().reset_index(drop=True)
+        m.filas_salida = len(df)
+    return df
@@ -0,0 +1,173 @@
+"""Perfiles de puntuación y análisis de sensibilidad (qué pasaría si...).
+
+Un perfil fija los pesos de CVSS, CVSSF y criticidad, sus normalizadores y
+los umbrales entre niveles (ver ``nucleo.PerfilPuntuacion``). Los perfiles
+propios se definen en un JSON (MURC_PERFILES)::
+
+    [{"nombre": "Amenaza", "peso_cvss": 0.35, "peso_cvssf": 0.45, "peso_criticidad": 0.2,
+      "umbrales": [0.3, 0.55, 0.8]}]
+
+La sensibilidad puntúa los hallazgos con cientos de perfiles en una sola
+pasada de NumPy. El nivel solo depende de (CVSS, CVSSF, criticidad), así
+que primero se agrupan los hallazgos por esa terna y se puntúa cada
+combinación distinta una vez, ponderada por su cantidad: el costo depende
+de las combinaciones distintas (pocas miles en un escaneo real) y no de
+las filas.
+"""
+import json
+import os
+from itertools import product
+
+import numpy as np
+import pandas as pd
+
+from .compacto import ampliar_float32, compactar, es_compacto
+from .nucleo import (
+    COLUMNAS_RESULTADO, MAPA_CRITICIDAD, NIVELES, NIVEL_SIN_DATO, PERFIL_MURC,
+    PerfilPuntuacion, calcular_riesgo,
+)
+
+RUTA_PERFILES = os.getenv("MURC_PERFILES")
+CELDAS_BLOQUE = 4_000_000        # combinaciones x perfiles evaluadas por bloque (memoria acotada)
+
+PERFILES_EJEMPLO = [
+    PERFIL_MURC,
+    PerfilPuntuacion("Amenaza", peso_cvss=0.35, peso_cvssf=0.45, peso_criticidad=0.2),
+    PerfilPuntuacion("Negocio", peso_cvss=0.4, peso_cvssf=0.2, peso_criticidad=0.4),
+]
+
+def cargar_perfiles(ruta=None) -> list:
+    """Perfil MURC, ejemplos y los perfiles del JSON ``ruta`` (o MURC_PERFILES), sin nombres repetidos."""
+    perfiles = {p.nombre: p for p in PERFILES_EJEMPLO}
+    ruta = ruta or RUTA_PERFILES
+    if ruta:
+        with open(ruta, encoding="utf-8") as f:
+            for d in json.load(f):
+                d = dict(d)
+                if "umbrales" in d:
+                    d["umbrales"] = tuple(float(u) for u in d["umbrales"])
+                perfil = PerfilPuntuacion(**d)
+                validar(perfil)
+                perfiles[perfil.nombre] = perfil
+    return list(perfiles.values())
+
+def validar(perfil: PerfilPuntuacion):
+    u = perfil.umbrales
+    if len(u) != len(NIVELES) - 1 or list(u) != sorted(u):
+        raise ValueError(f"Perfil '{perfil.nombre}': se esperan {len(NIVELES) - 1} umbrales crecientes, no {list(u)}")
+    if min(perfil.max_cvss, perfil.max_cvssf, perfil.max_criticidad) <= 0:
+        raise ValueError(f"Perfil '{perfil.nombre}': los normalizadores deben ser positivos")
+
+def repuntuar(resultado: pd.DataFrame, perfil: PerfilPuntuacion, desde=PERFIL_MURC) -> pd.DataFrame:
+    """Recalcula riesgo y Nivel de Exposición de un resultado ya puntuado con otro perfil.
+
+    Equivale a puntuar de nuevo el libro: el riesgo solo depende de CVSS,
+    CVSSF y Criticidad, y las filas distintas siguen siendo distintas. Un
+    resultado compacto se repuntúa desde sus valores float32 y sigue compacto.
+    ``desde`` es el perfil con que se puntuó ``resultado`` (None si no se
+    conoce: se recalcula siempre).
+    """
+    if perfil == desde:
+        return resultado
+    if es_compacto(resultado):
+        # Con su decimal más corto (7.3 y no 7.3000002): un valor justo en un umbral cae en el mismo nivel.
+        df = calcular_riesgo(ampliar_float32(resultado[COLUMNAS_RESULTADO[:5]]), perfil)
+        return compactar(df, deduplicar=False)
+    return calcular_riesgo(resultado[COLUMNAS_RESULTADO[:5]].copy(), perfil)
+
+# =========================
+#   SENSIBILIDAD
+# =========================
+def rejilla_perfiles(paso: float = 0.1, umbrales=None, max_cvssf=None, peso_minimo: float = 0.0) -> list:
+    """Perfiles con todos los pesos múltiplos de ``paso`` que suman 1, por cada juego de umbrales y normalizador."""
+    umbrales = umbrales or [PERFIL_MURC.umbrales]
+    max_cvssf = max_cvssf or [PERFIL_MURC.max_cvssf]
+    n = int(round(1 / paso))
+    pesos = [(i / n, j / n, (n - i - j) / n) for i in range(n + 1) for j in range(n + 1 - i)]
+    pesos = [p for p in pesos if min(p) >= peso_minimo]
+    perfiles = []
+    for (w1, w2, w3), u, mf in product(pesos, umbrales, max_cvssf):
+        nombre = f"{w1:.2f}/{w2:.2f}/{w3:.2f} · {'/'.join(f'{x:g}' for x in u)} · {mf:g}"
+        perfiles.append(PerfilPuntuacion(nombre, w1, w2, w3, max_cvssf=mf, umbrales=tuple(u)))
+    return perfiles
+
+class Sensibilidad:
+    """Combinaciones distintas (CVSS, CVSSF, criticidad) de un resultado, con su cantidad."""
+
+    def __init__(self, resultado: pd.DataFrame):
+        # Un dato faltante aporta 0 al riesgo con cualquier perfil (nan/x -> fillna(0)),
+        # así que se reemplaza por 0 antes de agrupar. Los float32 de un resultado compacto
+        # se amplían como en repuntuar, para que los niveles coincidan con calcular_riesgo.
+        resultado = ampliar_float32(resultado[["CVSS", "CVSSF", "Criticidad"]])
+        terna = pd.DataFrame({
+            "cvss": resultado["CVSS"].to_numpy(dtype="float64", na_value=np.nan),
+            "cvssf": resultado["CVSSF"].to_numpy(dtype="float64", na_value=np.nan),
+            "crit": resultado["Criticidad"].astype("string").str.lower().map(MAPA_CRITICIDAD)
+                                           .to_numpy(dtype="float64", na_value=np.nan),
+        }).fillna(0.0)
+        grupos = terna.groupby(["cvss", "cvssf", "crit"], sort=False).size()
+        self.combinaciones = grupos.index.to_frame(index=False).to_numpy()
+        self.cantidades = grupos.to_numpy(dtype="int64")
+        self.total = len(resultado)
+
+    def _bloques(self, perfiles):
+        """Genera (filas, columnas, niveles) con el código de nivel (0 = SIN DATO,
+        1..4 = BAJO..CRÍTICO) de un bloque de combinaciones para un grupo de perfiles."""
+        # Los perfiles con los mismos normalizadores comparten las columnas normalizadas.
+        por_norm = {}
+        for j, p in enumerate(perfiles):
+            por_norm.setdefault((p.max_cvss, p.max_cvssf, p.max_criticidad), []).append(j)
+        for (mc, mf, mk), cols in por_norm.items():
+            sel = [perfiles[j] for j in cols]
+            w1, w2, w3 = (np.array([getattr(p, a) for p in sel])[None, :] for a in ("peso_cvss", "peso_cvssf", "peso_criticidad"))
+            umbrales = np.array([p.umbrales for p in sel]).T[:, None, :]           # (3, 1, perfiles)
+            paso = max(1, CELDAS_BLOQUE // len(cols))
+            for i in range(0, len(self.combinaciones), paso):
+                x = self.combinaciones[i:i + paso]
+                # Mismo orden de operaciones que calcular_riesgo: mismos redondeos, mismos niveles.
+                riesgo = w1 * (x[:, 0:1] / mc) + w2 * (x[:, 1:2] / mf) + w3 * (x[:, 2:3] / mk)
+                nivel = 1 + (riesgo[None] > umbrales).sum(axis=0, dtype=np.int8)
+                nivel[~(riesgo > -1)] = 0
+                yield slice(i, i + len(x)), cols, nivel
+
+    def niveles(self, perfiles) -> np.ndarray:
+        """Matriz combinaciones x perfiles con el código de nivel."""
+        perfiles = list(perfiles)
+        niveles = np.empty((len(self.combinaciones), len(perfiles)), dtype=np.int8)
+        for filas, cols, nivel in self._bloques(perfiles):
+            niveles[filas, cols] = nivel
+        return niveles
+
+    def comparar(self, perfiles, base: PerfilPuntuacion = PERFIL_MURC) -> pd.DataFrame:
+        """Por perfil: hallazgos que cambian de nivel respecto de ``base`` y hallazgos por nivel."""
+        perfiles = list(perfiles)
+        ref = self.niveles([base]).astype(np.int32)
+        k = len(NIVELES) + 1
+        # Matriz de transición por perfil: [perfil, nivel base, nivel del perfil] -> hallazgos.
+        trans = np.zeros((len(perfiles), k, k))
+        for filas, cols, nivel in self._bloques(perfiles):
+            codigo = ref[filas] * k + nivel + (k * k) * np.arange(len(cols), dtype=np.int32)[None, :]
+            pesos = np.broadcast_to(self.cantidades[filas, None].astype(np.float64), codigo.shape)
+            trans[cols] += np.bincount(codigo.ravel(), weights=pesos.ravel(), minlength=k * k * len(cols)).reshape(-1, k, k)
+        trans = trans.round().astype(np.int64)
+        cambian = trans.sum(axis=(1, 2)) - np.trace(trans, axis1=1, axis2=2)
+        por_nivel = trans.sum(axis=1)
+        tabla = pd.DataFrame({
+            "Perfil": [p.nombre for p in perfiles],
+            "Peso CVSS": [p.peso_cvss for p in perfiles],
+            "Peso CVSSF": [p.peso_cvssf for p in perfiles],
+            "Peso Criticidad": [p.peso_criticidad for p in perfiles],
+            "Máx CVSSF": [p.max_cvssf for p in perfiles],
+            "Umbrales": ["/".join(f"{u:g}" for u in p.umbrales) for p in perfiles],
+            "Cambian": cambian,
+            "% Cambian": (100 * cambian / max(self.total, 1)).round(2),
+            "Suben": np.triu(trans, 1).sum(axis=(1, 2)),
+            "Bajan": np.tril(trans, -1).sum(axis=(1, 2)),
+        })
+        for codigo, nivel in enumerate([NIVEL_SIN_DATO] + NIVELES):
+            tabla[nivel] = por_nivel[:, codigo]
+        return tabla[["Perfil", "Peso CVSS", "Peso CVSSF", "Peso Criticidad", "Máx CVSSF", "Umbrales",
+                      "Cambian", "% Cambian", "Suben", "Bajan", *NIVELES, NIVEL_SIN_DATO]]
+
+def sensibilidad(resultado: pd.DataFrame, perfiles, base: PerfilPuntuacion = PERFIL_MURC) -> pd.DataFrame:
+    return Sensibilidad(resultado).comparar(perfiles, base)
@@ -0,0 +1,152 @@
+"""Rankings parciales: las K primeras filas sin ordenar la tabla completa.
+
+* ``top_k``: las K primeras por un valor (riesgo, |Delta|...), con
+  ``np.argpartition``: una pasada lineal para elegir y solo las K elegidas
+  se ordenan.
+* ``top_k_por_grupo``: las K primeras de cada grupo (por activo, por
+  criticidad). Los grupos con más de K filas se parten uno a uno; si son
+  muchos (cientos de activos), se hacen K pasadas vectorizadas que sacan la
+  mejor fila restante de cada grupo.
+* Paginación por cursor: la página siguiente empieza después de la última
+  fila entregada (su valor y su posición), no en un desplazamiento. Si los
+  filtros cambian entre páginas, no se repiten ni se saltan filas que ya
+  estaban antes o después del cursor.
+
+El orden es el mismo que ``sort_values(..., kind="stable").head(k)``: los
+empates se resuelven por posición (``posiciones``, por defecto el índice de
+la fila) y los valores faltantes van al final.
+"""
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+MAX_GRUPOS_PARTICION = 256      # grupos con más de K filas que se parten uno a uno
+
+class Cursor(NamedTuple):
+    """Última fila entregada: su clave de orden y su posición (desempate)."""
+    clave: float
+    posicion: int
+
+def claves_orden(valores, descendente: bool = True) -> np.ndarray:
+    """Clave float64 donde menor = antes; los faltantes quedan al final."""
+    v = pd.Series(valores).to_numpy(dtype="float64", na_value=np.nan)
+    clave = -v if descendente else v.copy()
+    clave[np.isnan(clave)] = np.inf
+    return clave
+
+def _despues(clave, posiciones, cursor):
+    return (clave > cursor.clave) | ((clave == cursor.clave) & (posiciones > cursor.posicion))
+
+def _menores(clave, posiciones, k) -> np.ndarray:
+    """Índices de las k filas con menor (clave, posición), sin orden particular."""
+    if k >= len(clave):
+        return np.arange(len(clave))
+    corte = np.partition(clave, k - 1)[k - 1]
+    antes = np.flatnonzero(clave < corte)
+    empatadas = np.flatnonzero(clave == corte)
+    faltan = k - len(antes)
+    if faltan < len(empatadas):
+        empatadas = empatadas[np.argpartition(posiciones[empatadas], faltan - 1)[:faltan]]
+    return np.concatenate([antes, empatadas])
+
+def _rondas(clave, posiciones, codigos, k) -> np.ndarray:
+    """Índices de las k filas con menor (clave, posición) de cada grupo: k pasadas vectorizadas."""
+    clave = clave.copy()
+    n_grupos = codigos.max() + 1
+    elegidas = []
+    for _ in range(k):
+        # fmin ignora NaN: las filas ya elegidas (NaN) no compiten en las rondas siguientes.
+        minimo = np.full(n_grupos, np.inf)
+        np.fmin.at(minimo, codigos, clave)
+        candidatas = np.flatnonzero(clave == minimo[codigos])
+        if not len(candidatas):
+            break
+        primera = np.full(n_grupos, np.iinfo(np.int64).max)
+        np.minimum.at(primera, codigos[candidatas], posiciones[candidatas])
+        ganadoras = candidatas[posiciones[candidatas] == primera[codigos[candidatas]]]
+        elegidas.append(ganadoras)
+        clave[ganadoras] = np.nan
+    return np.concatenate(elegidas) if elegidas else np.arange(0)
+
+def top_k(valores, k: int, descendente: bool = True, posiciones=None, despues: Cursor = None) -> np.ndarray:
+    """Índices (0..n-1) de las ``k`` primeras filas por ``valores``, ya ordenadas.
+
+    ``posiciones`` identifica cada fila para desempatar y para el cursor
+    (p. ej. el índice del resultado completo, estable aunque cambien los
+    filtros). Con ``despues`` solo se consideran las filas posteriores al cursor.
+    """
+    clave = claves_orden(valores, descendente)
+    posiciones = np.arange(len(clave)) if posiciones is None else np.asarray(posiciones)
+    idx = np.arange(len(clave))
+    if despues is not None:
+        idx = np.flatnonzero(_despues(clave, posiciones, despues))
+    if k <= 0 or not len(idx):
+        return idx[:0]
+    elegidas = idx[_menores(clave[idx], posiciones[idx], k)]
+    return elegidas[np.lexsort((posiciones[elegidas], clave[elegidas]))]
+
+def cursor_de(valores, indices, descendente: bool = True, posiciones=None):
+    """Cursor tras la última de ``indices`` (None si no hay filas): punto de partida de la página siguiente."""
+    if not len(indices):
+        return None
+    ultima = indices[-1]
+    clave = claves_orden(pd.Series(valores).iloc[[ultima]], descendente)[0]
+    posicion = ultima if posiciones is None else np.asarray(posiciones)[ultima]
+    return Cursor(float(clave), int(posicion))
+
+def _codigos(grupos) -> np.ndarray:
+    # Código por grupo desde 0; los nulos forman un grupo más.
+    grupos = pd.Series(grupos)
+    if isinstance(grupos.dtype, pd.CategoricalDtype):
+        return grupos.cat.codes.to_numpy().astype(np.int64) + 1
+    return pd.factorize(grupos, use_na_sentinel=False)[0].astype(np.int64)
+
+def top_k_por_grupo(valores, grupos, k: int, descendente: bool = True, posiciones=None,
+                    max_grupos: int = None) -> tuple:
+    """Las ``k`` primeras filas de cada grupo.
+
+    Devuelve (índices, puesto): los grupos van del que tiene la mejor fila al
+    que tiene la peor, y dentro de cada grupo por puesto (1..k). Con
+    ``max_grupos`` solo se devuelven los primeros grupos en ese orden.
+    """
+    clave = claves_orden(valores, descendente)
+    posiciones = np.arange(len(clave)) if posiciones is None else np.asarray(posiciones)
+    if k <= 0 or not len(clave):
+        return np.arange(0), np.arange(0)
+    codigos = _codigos(grupos)
+    conteo = np.bincount(codigos)
+    grandes = np.flatnonzero(conteo > k)
+    if len(grandes) > MAX_GRUPOS_PARTICION:
+        # Muchos grupos grandes (p. ej. por activo): k rondas vectorizadas que sacan
+        # la mejor fila restante de cada grupo, en lugar de una partición por grupo.
+        en_grande = np.isin(codigos, grandes)
+        f = np.flatnonzero(en_grande)
+        elegidas = np.concatenate([np.flatnonzero(~en_grande), f[_rondas(clave[f], posiciones[f], codigos[f], k)]])
+    elif len(grandes):
+        # Filas de grupos con hasta k filas: todas. Grupos mayores: partición por grupo.
+        en_grande = np.isin(codigos, grandes)
+        elegidas = [np.flatnonzero(~en_grande)]
+        filas_grandes = np.flatnonzero(en_grande)
+        filas_grandes = filas_grandes[np.argsort(codigos[filas_grandes], kind="stable")]
+        limites = np.cumsum(np.concatenate([[0], conteo[grandes]]))
+        for ini, fin in zip(limites[:-1], limites[1:]):
+            f = filas_grandes[ini:fin]
+            elegidas.append(f[_menores(clave[f], posiciones[f], k)])
+        elegidas = np.concatenate(elegidas)
+    else:
+        elegidas = np.arange(len(clave))
+    # Solo se ordenan las elegidas (a lo sumo k por grupo).
+    elegidas = elegidas[np.lexsort((posiciones[elegidas], clave[elegidas], codigos[elegidas]))]
+    cod = codigos[elegidas]
+    nuevo = np.r_[True, cod[1:] != cod[:-1]]
+    primera = np.flatnonzero(nuevo)
+    grupo = np.cumsum(nuevo) - 1
+    puesto = np.arange(len(elegidas)) - primera[grupo] + 1
+    # Grupos en el orden de su mejor fila (la primera de cada uno).
+    rango = np.empty(len(primera), dtype=np.int64)
+    rango[np.lexsort((posiciones[elegidas[primera]], clave[elegidas[primera]]))] = np.arange(len(primera))
+    filas = np.lexsort((puesto, rango[grupo]))
+    if max_grupos is not None:
+        filas = filas[rango[grupo[filas]] < max_grupos]
+    return elegidas[filas], puesto[filas]
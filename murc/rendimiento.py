@@ -0,0 +1,257 @@
+"""Suite de rendimiento: tiempo y memoria por etapa sobre libros sintéticos.
+
+Cada etapa de la aplicación se mide por separado (lectura, puntuación,
+índice de filtros, justificación, gráficos, exportaciones...) para cada
+tamaño de escaneo. El tiempo es el mínimo de ``repeticiones`` corridas; la
+memoria es el pico de ``tracemalloc`` en una corrida aparte (para no
+inflar los tiempos; solo cuenta el proceso principal, no los procesos de
+lectura en paralelo). Las mediciones se guardan como líneas base en un JSON
+y se comparan entre versiones::
+
+    python -m murc rendimiento --tamanos 10000 100000 --guardar-base v1.3
+    python -m murc rendimiento --tamanos 10000 100000 --comparar v1.3
+"""
+import json
+import os
+import platform
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+import pandas as pd
+
+from .cache import CacheEtapas, procesar_con_cache
+from .cubo import CuboAgregado
+from .exportar import PARQUET_DISPONIBLE, exportar
+from .filtros import IndiceFiltros
+from .graficos import dispersion
+from .ingesta import leer_libro
+from .nucleo import NIVELES, puntuar
+from .perfiles import Sensibilidad, rejilla_perfiles
+from .ranking import top_k, top_k_por_grupo
+from .sintetico import generar_libro
+from .tabla import TablaPaginada, con_justificacion
+
+RUTA_LINEA_BASE = os.getenv("MURC_LINEA_BASE", "murc_linea_base.json")
+TAMANOS = [10_000, 100_000, 1_000_000]
+UMBRAL_REGRESION = 1.2        # razón actual / base a partir de la cual se marca la etapa
+PISO_SEGUNDOS, PISO_MB = 0.01, 1.0   # por debajo, las diferencias son ruido de medición
+
+# =========================
+#   ETAPAS
+# =========================
+# Cada etapa recibe el contexto (bytes del libro y resultados de etapas
+# previas) y devuelve (valor, filas de salida). Las etapas que otras
+# necesitan dejan su valor en el contexto.
+def _lectura(ctx):
+    libro = leer_libro(ctx["datos"])
+    return libro, len(libro.escaneo)
+
+def _puntuacion(ctx):
+    libro = ctx["lectura"]
+    resultado = puntuar(libro.escaneo, libro.cvssf, libro.criticidad)
+    return resultado, len(resultado)
+
+def _procesar(ctx):
+    # Equivale a procesar_archivo_bytes con la caché vacía.
+    procesado = procesar_con_cache(ctx["datos"], CacheEtapas())
+    return procesado.resultado, len(procesado.resultado)
+
+def _procesar_compacto(ctx):
+    procesado = procesar_con_cache(ctx["datos"], CacheEtapas(), compacto=True)
+    return procesado.resultado, len(procesado.resultado)
+
+def _calentar_cache(ctx):
+    cache = CacheEtapas()
+    procesar_con_cache(ctx["datos"], cache)
+    return cache, None
+
+def _procesar_cache(ctx):
+    # Misma carga con la caché ya poblada (todas las etapas aciertan).
+    procesado = procesar_con_cache(ctx["datos"], ctx["cache_caliente"])
+    return procesado.resultado, len(procesado.resultado)
+
+def _indice_filtros(ctx):
+    return IndiceFiltros(ctx["procesar"]), len(ctx["procesar"])
+
+def _cubo(ctx):
+    cubo = CuboAgregado(ctx["procesar"])
+    return cubo, len(cubo)
+
+def _tablero(ctx):
+    # KPIs, barras, donut, agregado por activo y cambios de prioridad desde el cubo filtrado.
+    cubo = ctx["cubo"]
+    celdas = cubo.filtrar(NIVELES[1:], ())
+    cubo.por_nivel(celdas), cubo.por_criticidad(celdas), cubo.por_nivel_cvss(celdas)
+    agrup = cubo.por_activo(celdas)
+    return agrup, len(agrup)
+
+def _filtrar(ctx):
+    filas = ctx["indice_filtros"].filtrar(NIVELES[2:], (), "srv-0000")
+    return filas, len(filas)
+
+def _justificacion(ctx):
+    df = con_justificacion(ctx["procesar"])
+    return df, len(df)
+
+def _tabla(ctx):
+    tabla = TablaPaginada(ctx["procesar"])
+    pagina = tabla.pagina(tabla.ordenar(None), 1, 100)
+    return pagina, len(pagina)
+
+def _graficos(ctx):
+    # Construcción de la dispersión y su serialización (lo que hace st.plotly_chart).
+    df = ctx["procesar"]
+    disp = dispersion(df, "CVSS", "riesgo", "Nivel de Exposición", hover_data=["Activo", "Identificador"])
+    disp.fig.to_json()
+    return disp, len(df) if disp.bins is None else len(disp.bins)
+
+def _sensibilidad(ctx):
+    # Rejilla de pesos con paso 0.025 y dos juegos de umbrales (1.722 perfiles).
+    perfiles = rejilla_perfiles(0.025, [(0.25, 0.5, 0.75), (0.3, 0.55, 0.8)])
+    tabla = Sensibilidad(ctx["procesar"]).comparar(perfiles)
+    return tabla, len(tabla)
+
+def _ranking(ctx):
+    # Top 50 por |Delta| (como la comparación CVSS vs MURC) y top 5 por activo y por criticidad.
+    df = ctx["procesar"]
+    top = top_k(((df["riesgo"] * 10).round(2) - df["CVSS"]).abs(), 50)
+    por_activo, _ = top_k_por_grupo(df["riesgo"], df["Activo"], 5)
+    por_criticidad, _ = top_k_por_grupo(df["riesgo"], df["Criticidad"], 5)
+    return top, len(top) + len(por_activo) + len(por_criticidad)
+
+def _exportador(formato):
+    def etapa(ctx):
+        destino = os.path.join(ctx["directorio"], f"export.{formato}")
+        filas = exportar(ctx["procesar"], destino, formato)
+        os.remove(destino)
+        return None, filas
+    return etapa
+
+ETAPAS = {
+    "lectura":          _lectura,
+    "puntuacion":       _puntuacion,
+    "procesar":         _procesar,
+    "procesar_cache":   _procesar_cache,
+    "procesar_compacto": _procesar_compacto,
+    "indice_filtros":   _indice_filtros,
+    "filtrar":          _filtrar,
+    "cubo":             _cubo,
+    "tablero":          _tablero,
+    "justificacion":    _justificacion,
+    "tabla":            _tabla,
+    "graficos":         _graficos,
+    "sensibilidad":     _sensibilidad,
+    "ranking":          _ranking,
+    "exportar_csv":     _exportador("csv"),
+    "exportar_xlsx":    _exportador("xlsx"),
+    "exportar_parquet": _exportador("parquet"),
+}
+# Preparaciones que no se miden por sí mismas.
+PREVIAS = {**ETAPAS, "cache_caliente": _calentar_cache}
+DEPENDENCIAS = {
+    "puntuacion": ["lectura"], "procesar_cache": ["cache_caliente"],
+    "indice_filtros": ["procesar"], "filtrar": ["procesar", "indice_filtros"],
+    "justificacion": ["procesar"], "tabla": ["procesar"], "graficos": ["procesar"], "sensibilidad": ["procesar"],
+    "ranking": ["procesar"], "cubo": ["procesar"], "tablero": ["procesar", "cubo"],
+    "exportar_csv": ["procesar"], "exportar_xlsx": ["procesar"], "exportar_parquet": ["procesar"],
+}
+
+def etapas_disponibles() -> list:
+    return [e for e in ETAPAS if e != "exportar_parquet" or PARQUET_DISPONIBLE]
+
+# =========================
+#   MEDICIÓN
+# =========================
+def _medir(funcion, ctx, repeticiones: int, memoria: bool):
+    segundos = float("inf")
+    for _ in range(max(1, repeticiones)):
+        t0 = time.perf_counter()
+        valor, filas = funcion(ctx)
+        segundos = min(segundos, time.perf_counter() - t0)
+    pico = None
+    if memoria:
+        tracemalloc.start()
+        try:
+            funcion(ctx)
+            pico = tracemalloc.get_traced_memory()[1] / 2**20
+        finally:
+            tracemalloc.stop()
+    return valor, filas, segundos, pico
+
+def libro_sintetico(n: int, directorio: str, semilla: int = 0) -> str:
+    """Ruta de un libro sintético de ``n`` hallazgos; se genera solo si no existe."""
+    ruta = os.path.join(directorio, f"sintetico_{n}_{semilla}.xlsx")
+    if not os.path.exists(ruta):
+        generar_libro(ruta, n, semilla=semilla)
+    return ruta
+
+def ejecutar(tamanos=TAMANOS, etapas=None, repeticiones: int = 1, memoria: bool = True,
+             directorio=None, semilla: int = 0, al_medir=None) -> pd.DataFrame:
+    """Mide ``etapas`` (por defecto todas) para cada tamaño; una fila por (tamaño, etapa).
+
+    Las etapas de las que dependen las pedidas se ejecutan sin medir.
+    ``al_medir(dict)`` se llama tras cada medición.
+    """
+    etapas = list(etapas or etapas_disponibles())
+    directorio = directorio or os.path.join(tempfile.gettempdir(), "murc_rendimiento")
+    os.makedirs(directorio, exist_ok=True)
+    filas = []
+    for n in tamanos:
+        with open(libro_sintetico(n, directorio, semilla), "rb") as f:
+            ctx = {"datos": f.read(), "directorio": directorio}
+        for etapa in etapas:
+            for previa in DEPENDENCIAS.get(etapa, []):
+                if previa not in ctx:
+                    ctx[previa] = PREVIAS[previa](ctx)[0]
+            valor, n_salida, segundos, pico = _medir(ETAPAS[etapa], ctx, repeticiones, memoria)
+            ctx[etapa] = valor
+            fila = {"Tamaño": n, "Etapa": etapa, "Segundos": round(segundos, 4),
+                    "Memoria_MB": None if pico is None else round(pico, 1), "Filas": n_salida}
+            filas.append(fila)
+            if al_medir is not None:
+                al_medir(fila)
+    return pd.DataFrame(filas, columns=["Tamaño", "Etapa", "Segundos", "Memoria_MB", "Filas"])
+
+# =========================
+#   LÍNEAS BASE
+# =========================
+def _leer_bases(ruta) -> dict:
+    if not os.path.exists(ruta):
+        return {}
+    with open(ruta, encoding="utf-8") as f:
+        return json.load(f)
+
+def guardar_linea_base(mediciones: pd.DataFrame, etiqueta: str, ruta=RUTA_LINEA_BASE):
+    """Agrega (o reemplaza) la línea base ``etiqueta`` en el JSON ``ruta``."""
+    bases = _leer_bases(ruta)
+    bases[etiqueta] = {
+        "fecha": datetime.now().isoformat(timespec="seconds"),
+        "entorno": {"python": platform.python_version(), "pandas": pd.__version__,
+                    "plataforma": platform.platform(), "cpus": os.cpu_count()},
+        "mediciones": mediciones.astype(object).where(mediciones.notna(), None).to_dict("records"),
+    }
+    with open(ruta, "w", encoding="utf-8") as f:
+        json.dump(bases, f, ensure_ascii=False, indent=1)
+
+def cargar_linea_base(etiqueta: str = None, ruta=RUTA_LINEA_BASE) -> pd.DataFrame:
+    """Mediciones de la línea base ``etiqueta`` (por defecto, la última guardada)."""
+    bases = _leer_bases(ruta)
+    if not bases:
+        raise FileNotFoundError(f"no hay líneas base en {ruta}")
+    if etiqueta is None:
+        etiqueta = max(bases, key=lambda k: bases[k]["fecha"])
+    if etiqueta not in bases:
+        raise KeyError(f"línea base '{etiqueta}' no encontrada en {ruta}; disponibles: {', '.join(bases)}")
+    return pd.DataFrame(bases[etiqueta]["mediciones"])
+
+def comparar_con_base(mediciones: pd.DataFrame, base: pd.DataFrame, umbral: float = UMBRAL_REGRESION) -> pd.DataFrame:
+    """Une actual y base por (Tamaño, Etapa); ``Regresión`` marca razones >= umbral sobre el piso de ruido."""
+    df = mediciones.merge(base, on=["Tamaño", "Etapa"], how="left", suffixes=("", "_base"))
+    df["Razón_tiempo"] = (df["Segundos"] / df["Segundos_base"]).round(2)
+    df["Razón_memoria"] = (df["Memoria_MB"].astype(float) / df["Memoria_MB_base"].astype(float)).round(2)
+    df["Regresión"] = ((df["Razón_tiempo"] >= umbral) & (df["Segundos"] >= PISO_SEGUNDOS)) | \
+                      ((df["Razón_memoria"] >= umbral) & (df["Memoria_MB"].astype(float) >= PISO_MB))
+    return df[["Tamaño", "Etapa", "Segundos_base", "Segundos", "Razón_tiempo",
+               "Memoria_MB_base", "Memoria_MB", "Razón_memoria", "Regresión"]]
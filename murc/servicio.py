@@ -0,0 +1,311 @@
+"""Servicio HTTP local de puntuación MURC (para integraciones: mesa de ayuda, CMDB...).
+
+Recibe lotes de hallazgos ya unidos (una fila por hallazgo, con los
+encabezados o alias del libro: Identificador, Activo, CVSS, CVSSF,
+Criticidad) y devuelve ``riesgo`` y ``Nivel de Exposición`` por fila, en el
+mismo orden, con la misma normalización y el mismo cálculo que la interfaz::
+
+    python -m murc servir --puerto 8765 --procesos 4
+
+    POST /puntuar[?perfil=NOMBRE]   JSON (lista de objetos o {"hallazgos": [...]}) o CSV
+    GET  /salud                     estado, procesos y contadores
+
+La respuesta es JSON salvo que la solicitud sea CSV o pida ``Accept: text/csv``.
+
+* Los cálculos corren en un pool de procesos (pandas no libera el GIL).
+* Las solicitudes pequeñas que llegan casi juntas se agrupan
+  (micro-lotes): se espera hasta ``espera`` segundos o ``max_filas`` filas,
+  se puntúa una sola vez y se reparte el resultado.
+* HTTP/1.1 con keep-alive: un cliente puede reutilizar la conexión.
+
+Si MURC_TOKEN_SERVICIO está definido, cada solicitud debe llevar
+``Authorization: Bearer <token>``.
+"""
+import hmac
+import io
+import json
+import multiprocessing
+import os
+import queue
+import signal
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+import pandas as pd
+
+from .inteligencia import abrir, enriquecer_cvssf
+from .nucleo import (
+    ALIAS_ACTIVO, ALIAS_CRITICIDAD, ALIAS_CVSS, ALIAS_CVSSF, ALIAS_IDENTIFICADOR,
+    PERFIL_MURC, _match_col, calcular_riesgo, normalizar_criticidad, normalizar_cvssf, normalizar_escaneo,
+)
+from .perfiles import cargar_perfiles
+
+PUERTO = int(os.getenv("MURC_PUERTO_SERVICIO", "8765"))
+TOKEN = os.getenv("MURC_TOKEN_SERVICIO")
+ESPERA_LOTE = 0.005              # segundos que un micro-lote espera más solicitudes
+MAX_FILAS_LOTE = 50_000
+MAX_BYTES_SOLICITUD = 64 * 2**20
+
+ALIAS = {
+    "Identificador": ALIAS_IDENTIFICADOR, "Activo": ALIAS_ACTIVO,
+    "CVSS": ALIAS_CVSS, "CVSSF": ALIAS_CVSSF, "Criticidad": ALIAS_CRITICIDAD,
+}
+SALIDA = ["Identificador", "Activo", "riesgo", "Nivel de Exposición"]
+
+# =========================
+#   PUNTUACIÓN
+# =========================
+def resolver_columnas(headers) -> dict:
+    """{columna_canónica: encabezado_real}; Identificador y Activo son obligatorios."""
+    columnas = {}
+    # Primero las exactas y las más específicas: «Criticidad_Activo» no debe tomarse
+    # como Activo ni «CVSSF» como CVSS.
+    orden = ["Identificador", "Criticidad", "Activo", "CVSSF", "CVSS"]
+    for canon in sorted(orden, key=lambda c: c not in headers):
+        real = canon if canon in headers else _match_col([h for h in headers if h not in columnas.values()], ALIAS[canon])
+        if real is not None:
+            columnas[canon] = real
+    if "Identificador" not in columnas or "Activo" not in columnas:
+        raise ValueError(f"No encuentro columnas de Identificador/Activo en la solicitud. Encabezados: {list(headers)}")
+    return columnas
+
+def columnas_canonicas(df: pd.DataFrame) -> pd.DataFrame:
+    """Solo las columnas de ``ALIAS`` con su nombre canónico; las opcionales ausentes quedan vacías."""
+    columnas = resolver_columnas(list(df.columns))
+    return pd.DataFrame({canon: df[columnas[canon]] if canon in columnas else pd.Series(pd.NA, index=df.index, dtype=object)
+                         for canon in ALIAS})
+
+def puntuar_hallazgos(df: pd.DataFrame, perfil=PERFIL_MURC, inteligencia=None) -> pd.DataFrame:
+    """Puntúa hallazgos ya unidos, fila a fila y sin deduplicar (columnas de ``SALIDA``)."""
+    df = columnas_canonicas(df)
+    escaneo = normalizar_escaneo(df)
+    cvssf = normalizar_cvssf(df)
+    indice = abrir(inteligencia)
+    if indice is not None:
+        cvssf = enriquecer_cvssf(cvssf, indice)
+    criticidad = normalizar_criticidad(df)
+    unido = pd.DataFrame({
+        "Activo": escaneo["Activo"], "Identificador": escaneo["Identificador"],
+        "CVSS": cvssf["CVSS"], "CVSSF": cvssf["CVSSF"], "Criticidad": criticidad["Criticidad"],
+    })
+    return calcular_riesgo(unido, perfil)[SALIDA].reset_index(drop=True)
+
+# Índice abierto en cada proceso del pool: {ruta: (mtime, índice)}. Se vuelve a abrir
+# solo si el archivo cambió (``compilar`` lo reemplaza con ``os.replace``).
+_INDICES = {}
+
+def _indice_del_proceso(ruta):
+    if ruta is None:
+        return None
+    mtime = os.stat(ruta).st_mtime_ns
+    abierto = _INDICES.get(ruta)
+    if abierto is None or abierto[0] != mtime:
+        abierto = _INDICES[ruta] = (mtime, abrir(ruta))
+    return abierto[1]
+
+def _puntuar_micro_lote(partes, perfil, inteligencia):
+    # En el proceso del pool: una sola puntuación para todas las solicitudes del micro-lote.
+    df = pd.concat(partes, ignore_index=True) if len(partes) > 1 else partes[0]
+    return puntuar_hallazgos(df, perfil, _indice_del_proceso(inteligencia))
+
+class Agrupador:
+    """Junta solicitudes pequeñas en micro-lotes y las puntúa en un pool de procesos."""
+
+    def __init__(self, procesos=None, espera: float = ESPERA_LOTE, max_filas: int = MAX_FILAS_LOTE,
+                 inteligencia=None):
+        self.espera, self.max_filas, self.inteligencia = espera, max_filas, inteligencia
+        self.procesos = procesos or os.cpu_count() or 1
+        # forkserver: los procesos del pool no heredan el socket del servidor (con fork, al
+        # arrancar perezosamente en el primer envío, se quedaban con el puerto abierto).
+        self._pool = ProcessPoolExecutor(max_workers=self.procesos,
+                                         mp_context=multiprocessing.get_context("forkserver"))
+        self._cola = queue.Queue()
+        self._lock = threading.Lock()
+        self.contadores = {"solicitudes": 0, "filas": 0, "micro_lotes": 0, "errores": 0}
+        self._hilo = threading.Thread(target=self._bucle, name="murc-agrupador", daemon=True)
+        self._hilo.start()
+
+    def enviar(self, df: pd.DataFrame, perfil=PERFIL_MURC) -> Future:
+        """Future con el resultado de ``df`` (mismas filas, mismo orden)."""
+        # Se resuelve acá y no en el pool: cada solicitud puede usar otros alias, y una
+        # solicitud inválida no debe hacer fallar al resto de su micro-lote.
+        df = columnas_canonicas(df)
+        futuro = Future()
+        with self._lock:
+            self.contadores["solicitudes"] += 1
+            self.contadores["filas"] += len(df)
+        if len(df) >= self.max_filas:
+            self._despachar([(df, futuro)], perfil)
+        else:
+            self._cola.put((df, perfil, futuro))
+        return futuro
+
+    def _bucle(self):
+        while True:
+            item = self._cola.get()
+            if item is None:
+                return
+            pendientes, filas = [item], len(item[0])
+            limite = time.monotonic() + self.espera
+            while filas < self.max_filas:
+                restante = limite - time.monotonic()
+                if restante <= 0:
+                    break
+                try:
+                    item = self._cola.get(timeout=restante)
+                except queue.Empty:
+                    break
+                if item is None:
+                    self._cola.put(None)
+                    break
+                pendientes.append(item)
+                filas += len(item[0])
+            por_perfil = {}
+            for df, perfil, futuro in pendientes:
+                por_perfil.setdefault(perfil, []).append((df, futuro))
+            for perfil, grupo in por_perfil.items():
+                self._despachar(grupo, perfil)
+
+    def _despachar(self, grupo, perfil):
+        with self._lock:
+            self.contadores["micro_lotes"] += 1
+        ruta = getattr(self.inteligencia, "ruta", self.inteligencia)
+        try:
+            tarea = self._pool.submit(_puntuar_micro_lote, [df for df, _ in grupo], perfil, ruta)
+        except RuntimeError as e:     # pool cerrado
+            for _, futuro in grupo:
+                futuro.set_exception(e)
+            return
+        cortes = np.cumsum([0] + [len(df) for df, _ in grupo])
+
+        def repartir(t):
+            if t.exception() is not None:
+                with self._lock:
+                    self.contadores["errores"] += len(grupo)
+                for _, futuro in grupo:
+                    futuro.set_exception(t.exception())
+                return
+            resultado = t.result()
+            for (_, futuro), ini, fin in zip(grupo, cortes[:-1], cortes[1:]):
+                futuro.set_result(resultado.iloc[ini:fin].reset_index(drop=True))
+        tarea.add_done_callback(repartir)
+
+    def cerrar(self):
+        self._cola.put(None)
+        self._hilo.join()
+        self._pool.shutdown()
+
+# =========================
+#   HTTP
+# =========================
+def leer_solicitud(cuerpo: bytes, tipo: str) -> pd.DataFrame:
+    """DataFrame de hallazgos desde un cuerpo JSON o CSV (todas las columnas como texto)."""
+    if "csv" in tipo:
+        return pd.read_csv(io.BytesIO(cuerpo), dtype=str, keep_default_na=False, na_values=[""])
+    datos = json.loads(cuerpo or b"[]")
+    if isinstance(datos, dict):
+        datos = datos.get("hallazgos", [])
+    if not isinstance(datos, list):
+        raise ValueError("se esperaba una lista de hallazgos o {\"hallazgos\": [...]}")
+    return pd.DataFrame.from_records(datos).astype(object)
+
+def escribir_respuesta(resultado: pd.DataFrame, csv: bool) -> tuple:
+    """(cuerpo, content-type) del resultado."""
+    if csv:
+        return resultado.to_csv(index=False).encode("utf-8"), "text/csv; charset=utf-8"
+    salida = resultado.astype(object).where(resultado.notna(), None)
+    cuerpo = {"filas": len(salida), "resultados": salida.to_dict("records")}
+    return json.dumps(cuerpo, ensure_ascii=False).encode("utf-8"), "application/json; charset=utf-8"
+
+class ManejadorMURC(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"      # keep-alive
+    server_version = "MURC"
+
+    def log_message(self, formato, *args):
+        if self.server.verboso:
+            super().log_message(formato, *args)
+
+    def _responder(self, estado: int, cuerpo: bytes, tipo: str = "application/json; charset=utf-8"):
+        self.send_response(estado)
+        self.send_header("Content-Type", tipo)
+        self.send_header("Content-Length", str(len(cuerpo)))
+        self.end_headers()
+        self.wfile.write(cuerpo)
+
+    def _error(self, estado: int, mensaje: str):
+        self._responder(estado, json.dumps({"error": mensaje}, ensure_ascii=False).encode("utf-8"))
+
+    def _autorizado(self) -> bool:
+        if not self.server.token:
+            return True
+        esperado = f"Bearer {self.server.token}"
+        return hmac.compare_digest(self.headers.get("Authorization", "").encode(), esperado.encode())
+
+    def do_GET(self):
+        if urlparse(self.path).path != "/salud":
+            return self._error(404, "ruta no encontrada")
+        agrupador = self.server.agrupador
+        with agrupador._lock:
+            cuerpo = {"estado": "ok", "procesos": agrupador.procesos, **agrupador.contadores}
+        self._responder(200, json.dumps(cuerpo).encode("utf-8"))
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        largo = int(self.headers.get("Content-Length") or 0)
+        if largo > MAX_BYTES_SOLICITUD:
+            self.close_connection = True
+            return self._error(413, f"solicitud mayor a {MAX_BYTES_SOLICITUD // 2**20} MB")
+        cuerpo = self.rfile.read(largo)   # se lee siempre, para poder reutilizar la conexión
+        if url.path != "/puntuar":
+            return self._error(404, "ruta no encontrada")
+        if not self._autorizado():
+            return self._error(401, "token inválido")
+        nombre = parse_qs(url.query).get("perfil", [PERFIL_MURC.nombre])[0]
+        perfil = self.server.perfiles.get(nombre)
+        if perfil is None:
+            return self._error(400, f"perfil '{nombre}' no encontrado; disponibles: {', '.join(self.server.perfiles)}")
+        tipo = self.headers.get("Content-Type", "application/json")
+        try:
+            df = leer_solicitud(cuerpo, tipo)
+            resultado = self.server.agrupador.enviar(df, perfil).result() if len(df) else pd.DataFrame(columns=SALIDA)
+        except (ValueError, KeyError) as e:
+            return self._error(400, str(e))
+        except Exception as e:
+            return self._error(500, f"{type(e).__name__}: {e}")
+        csv = "csv" in tipo or "text/csv" in self.headers.get("Accept", "")
+        self._responder(200, *escribir_respuesta(resultado, csv))
+
+class ServidorMURC(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, direccion, agrupador: Agrupador, perfiles=None, token=TOKEN, verboso=False):
+        super().__init__(direccion, ManejadorMURC)
+        self.agrupador = agrupador
+        self.perfiles = {p.nombre: p for p in (perfiles or cargar_perfiles())}
+        self.token, self.verboso = token, verboso
+
+def _interrumpir(signum, frame):
+    raise KeyboardInterrupt
+
+def servir(host: str = "127.0.0.1", puerto: int = PUERTO, procesos=None, espera: float = ESPERA_LOTE,
+           max_filas: int = MAX_FILAS_LOTE, inteligencia=None, perfiles=None, verboso: bool = False,
+           al_iniciar=None):
+    """Levanta el servicio y atiende hasta Ctrl+C o SIGTERM."""
+    agrupador = Agrupador(procesos, espera, max_filas, inteligencia)
+    servidor = ServidorMURC((host, puerto), agrupador, perfiles, verboso=verboso)
+    if al_iniciar is not None:
+        al_iniciar(servidor)
+    if threading.current_thread() is threading.main_thread():
+        # SIGTERM (``Popen.terminate()``, systemd, docker stop) cierra igual que Ctrl+C.
+        signal.signal(signal.SIGTERM, _interrumpir)
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor.server_close()
+        agrupador.cerrar()
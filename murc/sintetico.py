@@ -0,0 +1,100 @@
+"""Generador de libros MURC sintéticos (pruebas de rendimiento y de carga).
+
+Los libros siguen el esquema de tres hojas con los defectos que aparecen
+en los escaneos reales:
+
+* encabezados con alias (``Hostname``, ``CVE_ID``, ``Threat_Score``...);
+* decimales con coma (``"7,5"``) y valores no numéricos (``"s/d"``);
+* criticidad con y sin tilde, en mayúsculas o minúsculas (``Crítico``,
+  ``critico``, ``CRÍTICO``), vacía o con valores fuera del catálogo;
+* activos del escaneo que no figuran en Criticidad_Activos;
+* espacios, minúsculas y filas repetidas en Escaneo.
+
+Uso::
+
+    generar_libro("sintetico_100k.xlsx", 100_000, semilla=1)
+"""
+import numpy as np
+from openpyxl import Workbook
+
+from .nucleo import (
+    ALIAS_ACTIVO, ALIAS_CRITICIDAD, ALIAS_CVSS, ALIAS_CVSSF, ALIAS_IDENTIFICADOR,
+    HOJA_CRITICIDAD, HOJA_CVSSF, HOJA_ESCANEO,
+    resolver_columnas_criticidad, resolver_columnas_cvssf, resolver_columnas_escaneo,
+)
+
+CRITICIDADES = ["Crítico", "critico", "CRÍTICO", "Alto", "alto", " Medio ", "medio", "Bajo", "BAJO"]
+CRITICIDADES_INVALIDAS = ["", "N/A", "pendiente"]
+
+def _encabezados(rng, resolver, alias: dict, extra=()) -> list:
+    # Un alias (nunca el nombre canónico) por columna; se descartan combinaciones
+    # que el resolvedor confundiría (p. ej. «Criticidad_Activo» contiene «activo»).
+    while True:
+        elegidos = {canon: lista[int(rng.integers(1, len(lista)))] for canon, lista in alias.items()}
+        encabezados = list(elegidos.values()) + list(extra)
+        if resolver(encabezados) == elegidos:
+            return encabezados
+
+def _variar_texto(rng, valores: np.ndarray, prob: float) -> np.ndarray:
+    # Minúsculas y espacios alrededor en una fracción de los valores.
+    valores = valores.astype(object)
+    sel = rng.random(len(valores)) < prob
+    valores[sel] = [f" {v.lower()} " for v in valores[sel]]
+    return valores
+
+def _con_coma(rng, valores: np.ndarray, prob: float) -> np.ndarray:
+    valores = valores.astype(object)
+    sel = np.flatnonzero(rng.random(len(valores)) < prob)
+    valores[sel] = [f"{v:.1f}".replace(".", ",") for v in valores[sel]]
+    return valores
+
+def generar_libro(destino, n_hallazgos: int, n_activos: int = None, n_vulnerabilidades: int = None,
+                  semilla: int = 0, prob_sin_criticidad: float = 0.1) -> dict:
+    """Escribe un libro sintético en ``destino`` y devuelve los tamaños de cada hoja."""
+    rng = np.random.default_rng(semilla)
+    n_activos = n_activos or max(10, n_hallazgos // 50)
+    n_vulnerabilidades = n_vulnerabilidades or max(50, n_hallazgos // 20)
+
+    activos = np.array([f"SRV-{i:06d}" for i in range(n_activos)], dtype=object)
+    cves = np.array([f"CVE-{2015 + i % 10}-{10000 + i}" for i in range(n_vulnerabilidades)], dtype=object)
+
+    wb = Workbook(write_only=True)
+
+    # ---- Escaneo: activos y vulnerabilidades con distribución sesgada (pocos activos concentran hallazgos) ----
+    ws = wb.create_sheet(HOJA_ESCANEO)
+    ws.append(_encabezados(rng, resolver_columnas_escaneo,
+                           {"Activo": ALIAS_ACTIVO, "Identificador": ALIAS_IDENTIFICADOR}, ["Puerto", "Detectado"]))
+    idx_act = (rng.zipf(1.3, n_hallazgos) - 1) % n_activos
+    idx_cve = rng.integers(0, n_vulnerabilidades, n_hallazgos)
+    col_act = _variar_texto(rng, activos[idx_act], 0.05)
+    col_cve = _variar_texto(rng, cves[idx_cve], 0.05)
+    puertos = rng.choice([22, 80, 443, 3389, 8080], n_hallazgos)
+    for fila in zip(col_act, col_cve, puertos.tolist()):
+        ws.append([*fila, "2026-09-30"])
+
+    # ---- CVSSF: CVSS con coma decimal y CVSSF entero o texto; algunas vulnerabilidades sin dato ----
+    ws = wb.create_sheet(HOJA_CVSSF)
+    ws.append(_encabezados(rng, resolver_columnas_cvssf,
+                           {"Identificador": ALIAS_IDENTIFICADOR, "CVSS": ALIAS_CVSS, "CVSSF": ALIAS_CVSSF}))
+    presentes = cves[rng.random(n_vulnerabilidades) < 0.95]
+    cvss = _con_coma(rng, np.round(rng.uniform(0, 10, len(presentes)), 1), 0.3)
+    cvss[rng.random(len(presentes)) < 0.02] = "s/d"
+    cvssf = rng.choice([0, 1, 8, 64, 512, 4096], len(presentes)).astype(object)
+    texto = rng.random(len(presentes)) < 0.1
+    cvssf[texto] = cvssf[texto].astype(str)
+    for fila in zip(presentes, cvss, cvssf):
+        ws.append(list(fila))
+
+    # ---- Criticidad_Activos: variantes con/sin tilde, vacías e inválidas; una fracción de activos falta ----
+    ws = wb.create_sheet(HOJA_CRITICIDAD)
+    ws.append(_encabezados(rng, resolver_columnas_criticidad,
+                           {"Activo": ALIAS_ACTIVO, "Criticidad": ALIAS_CRITICIDAD}))
+    con_fila = activos[rng.random(n_activos) >= prob_sin_criticidad]
+    valores = np.array(CRITICIDADES + CRITICIDADES_INVALIDAS, dtype=object)
+    pesos = np.r_[np.full(len(CRITICIDADES), 0.9 / len(CRITICIDADES)), np.full(len(CRITICIDADES_INVALIDAS), 0.1 / len(CRITICIDADES_INVALIDAS))]
+    crit = rng.choice(valores, len(con_fila), p=pesos)
+    for activo, c in zip(con_fila, crit):
+        ws.append([activo, c or None])
+
+    wb.save(destino)
+    return {HOJA_ESCANEO: n_hallazgos, HOJA_CVSSF: len(presentes), HOJA_CRITICIDAD: len(con_fila)}
@@ -0,0 +1,47 @@
+"""Tabla de resultados paginada y justificación bajo demanda.
+
+El orden por ``riesgo`` se calcula una vez por archivo; para un filtro dado
+basta con ordenar los rangos de las filas seleccionadas y recortar la
+página pedida. La columna «Justificación» solo se arma para las filas que
+se muestran o se exportan.
+"""
+import numpy as np
+import pandas as pd
+
+TAMANOS_PAGINA = [50, 100, 250, 500]
+
+def justificacion(df: pd.DataFrame) -> pd.Series:
+    return (
+        "La exposición se clasifica como " + df["Nivel de Exposición"].astype("string").fillna("SIN DATO") +
+        " porque la vulnerabilidad " + df["Identificador"].astype("string").fillna("No asignado") +
+        " tiene CVSS " + df["CVSS"].round(2).astype("string").replace({"nan":"s/d"}) +
+        ", CVSSF " + df["CVSSF"].round(0).astype("Int64").astype("string").replace({"<NA>":"s/d"}) +
+        " y afecta al activo " + df["Activo"].astype("string").fillna("Sin nombre") +
+        " con criticidad " + df["Criticidad"].astype("string").fillna("Sin dato") + "."
+    )
+
+def con_justificacion(df: pd.DataFrame) -> pd.DataFrame:
+    return df.assign(Justificación=justificacion(df))
+
+class TablaPaginada:
+    def __init__(self, resultado: pd.DataFrame):
+        self._df = resultado
+        # Orden global por riesgo descendente (estable) y rango de cada fila en ese orden.
+        self._orden = np.argsort(-resultado["riesgo"].to_numpy(dtype="float64", na_value=-np.inf), kind="stable")
+        self._rango = np.empty_like(self._orden)
+        self._rango[self._orden] = np.arange(len(self._orden))
+
+    def ordenar(self, filas) -> np.ndarray:
+        """Posiciones de ``filas`` (None = todas) ordenadas por riesgo descendente."""
+        if filas is None:
+            return self._orden
+        return self._orden[np.sort(self._rango[filas])]
+
+    def pagina(self, filas_ordenadas: np.ndarray, numero: int, tamano: int) -> pd.DataFrame:
+        """Página ``numero`` (desde 1) con la justificación de sus filas."""
+        inicio = (numero - 1) * tamano
+        return con_justificacion(self._df.iloc[filas_ordenadas[inicio:inicio + tamano]])
+
+    @staticmethod
+    def paginas(total: int, tamano: int) -> int:
+        return max(1, -(-total // tamano))
@@ -0,0 +1,14 @@
+import pytest
+
+from murc.sintetico import generar_libro
+
+@pytest.fixture(scope="session")
+def libro(tmp_path_factory):
+    """Ruta de un libro sintético (alias de encabezados, comas decimales, criticidades inválidas...)."""
+    ruta = tmp_path_factory.mktemp("libros") / "sintetico.xlsx"
+    generar_libro(ruta, 3000, semilla=7)
+    return ruta
+
+@pytest.fixture(scope="session")
+def libro_bytes(libro):
+    return libro.read_bytes()
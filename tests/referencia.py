@@ -0,0 +1,102 @@
+"""Implementación de referencia: ``procesar_archivo_bytes`` de la versión original de app.py.
+
+Se conserva tal cual (``pd.read_excel`` hoja por hoja, uniones y fórmula
+MURC) para comprobar que la lectura en flujo, las cachés y el motor dan
+exactamente el mismo resultado. Solo se separó la lectura de las hojas del
+cálculo, para poder comparar cada hoja por su cuenta.
+"""
+import unicodedata
+from io import BytesIO
+
+import pandas as pd
+
+def _norm(s: str) -> str:
+    if s is None: return ""
+    s = str(s)
+    s = unicodedata.normalize("NFKD", s).encode("ascii", "ignore").decode("ascii")
+    return s.strip().lower().replace(" ", "").replace("-", "").replace("_", "")
+
+def _to_num(series: pd.Series) -> pd.Series:
+    return pd.to_numeric(series.astype("string").str.replace(",", ".", regex=False), errors="coerce")
+
+def _match_col(headers, aliases):
+    norm_map = { _norm(h): h for h in headers }
+    for alias in aliases:
+        a = _norm(alias)
+        if a in norm_map:
+            return norm_map[a]
+        for k, real in norm_map.items():
+            if a in k:
+                return real
+    return None
+
+def leer_hojas_referencia(data_bytes: bytes):
+    """(escaneo_df, cvssf_df, criticidad_df) normalizadas como en la versión original."""
+    xls = pd.ExcelFile(BytesIO(data_bytes), engine="openpyxl")
+
+    # ---- Hoja Escaneo ----
+    esc_hdr = pd.read_excel(xls, sheet_name="Escaneo", nrows=0).columns
+    id_e  = _match_col(esc_hdr, ["Identificador","ID","Id_vuln","CVE","CVE_ID"])
+    act_e = _match_col(esc_hdr, ["Activo","Asset","Equipo","Hostname","Sistema"])
+    escaneo_df = pd.read_excel(
+        xls, sheet_name="Escaneo",
+        usecols=[id_e, act_e],
+        dtype={id_e:"string", act_e:"string"}
+    ).rename(columns={id_e:"Identificador", act_e:"Activo"})
+    escaneo_df["Identificador"] = escaneo_df["Identificador"].str.strip().str.upper()
+    escaneo_df["Activo"]        = escaneo_df["Activo"].str.strip().str.upper()
+
+    # ---- Hoja CVSSF ----
+    cv_hdr = pd.read_excel(xls, sheet_name="CVSSF", nrows=0).columns
+    id_c   = _match_col(cv_hdr, ["Identificador","ID","Id_vuln","CVE","CVE_ID"])
+    cvss_c = _match_col(cv_hdr, ["CVSS","CVSS_Base","cvssscore"])
+    cvssf_c= _match_col(cv_hdr, ["CVSSF","KEV","Exploitability","Threat_Score"])
+    cvssf_df = pd.read_excel(
+        xls, sheet_name="CVSSF",
+        usecols=[id_c, cvss_c, cvssf_c],
+        dtype={id_c:"string"}
+    ).rename(columns={id_c:"Identificador", cvss_c:"CVSS", cvssf_c:"CVSSF"})
+    cvssf_df["Identificador"] = cvssf_df["Identificador"].str.strip().str.upper()
+    cvssf_df["CVSS"]  = _to_num(cvssf_df["CVSS"])
+    cvssf_df["CVSSF"] = _to_num(cvssf_df["CVSSF"])
+
+    # ---- Hoja Criticidad_Activos ----
+    cr_hdr = pd.read_excel(xls, sheet_name="Criticidad_Activos", nrows=0).columns
+    act_cr  = _match_col(cr_hdr, ["Activo","Asset","Equipo","Hostname","Sistema"])
+    crit_cr = _match_col(cr_hdr, ["Criticidad","Criticidad_Activo","Clasificacion","Criticality"])
+    criticidad_df = pd.read_excel(
+        xls, sheet_name="Criticidad_Activos",
+        usecols=[act_cr, crit_cr],
+        dtype={act_cr:"string", crit_cr:"string"}
+    ).rename(columns={act_cr:"Activo", crit_cr:"Criticidad"})
+    criticidad_df["Activo"]     = criticidad_df["Activo"].str.strip().str.upper()
+    criticidad_df["Criticidad"] = criticidad_df["Criticidad"].astype("string").str.strip().str.capitalize()
+    return escaneo_df, cvssf_df, criticidad_df
+
+def procesar_referencia(data_bytes: bytes) -> pd.DataFrame:
+    escaneo_df, cvssf_df, criticidad_df = leer_hojas_referencia(data_bytes)
+
+    # ---- Uniones ----
+    df = escaneo_df.merge(cvssf_df, on="Identificador", how="left") \
+                   .merge(criticidad_df, on="Activo", how="left")
+
+    # ---- Cálculo de riesgo ----
+    mapa_criticidad = {"bajo":1, "medio":2, "alto":3, "critico":4, "crítico":4}
+    df["Criticidad_num"]  = df["Criticidad"].astype("string").str.lower().map(mapa_criticidad)
+    df["cvss_norm"]       = df["CVSS"] / 10
+    df["cvssf_norm"]      = df["CVSSF"] / 4096
+    df["criticidad_norm"] = df["Criticidad_num"] / 4
+
+    df["riesgo"] = (
+        0.5*df["cvss_norm"].fillna(0) +
+        0.3*df["cvssf_norm"].fillna(0) +
+        0.2*df["criticidad_norm"].fillna(0)
+    )
+
+    bins   = [-1, 0.25, 0.50, 0.75, float("inf")]
+    labels = ["BAJO","MEDIO","ALTO","CRÍTICO"]
+    df["Nivel de Exposición"] = pd.cut(df["riesgo"].fillna(-1), bins=bins, labels=labels).astype("string")
+    df["Nivel de Exposición"] = df["Nivel de Exposición"].fillna("SIN DATO")
+
+    columnas = ["Activo","Identificador","CVSS","CVSSF","Criticidad","riesgo","Nivel de Exposición"]
+    return df[columnas].drop_duplicates().reset_index(drop=True)
@@ -0,0 +1,110 @@
+"""Caché por etapas: aciertos, invalidación por hoja y resultado igual al de la versión original."""
+import time
+import zipfile
+from io import BytesIO
+
+import pandas as pd
+import pytest
+from openpyxl import load_workbook
+
+from murc.cache import ETAPA_ARCHIVO, ETAPA_RESULTADO, CacheEtapas, procesar_con_cache
+from murc.huella import huellas_hojas
+from murc.ingesta import HOJAS
+from murc.nucleo import HOJA_CRITICIDAD, HOJA_CVSSF, HOJA_ESCANEO
+from murc.sintetico import generar_libro
+from referencia import procesar_referencia
+
+@pytest.fixture(scope="module")
+def libro_otra_criticidad(tmp_path_factory):
+    """El mismo libro que ``libro`` salvo la hoja Criticidad_Activos."""
+    ruta = tmp_path_factory.mktemp("libros") / "otra_criticidad.xlsx"
+    generar_libro(ruta, 3000, semilla=7, prob_sin_criticidad=0.3)
+    return ruta.read_bytes()
+
+@pytest.fixture(scope="module")
+def libros_con_formato(tmp_path_factory):
+    """Dos libros con el mismo XML de hojas; solo cambia el formato de número de un estilo."""
+    ruta = tmp_path_factory.mktemp("libros") / "formato.xlsx"
+    generar_libro(ruta, 300, semilla=5)
+    wb = load_workbook(ruta)
+    for fila in wb[HOJA_CVSSF].iter_rows(min_row=2):
+        fila[1].number_format = "0.0"
+    wb.save(ruta)
+    original = ruta.read_bytes()
+    salida = BytesIO()
+    with zipfile.ZipFile(BytesIO(original)) as z, zipfile.ZipFile(salida, "w", zipfile.ZIP_DEFLATED) as nuevo:
+        for item in z.infolist():
+            datos = z.read(item)
+            if item.filename == "xl/styles.xml":
+                assert b'formatCode="0.0"' in datos
+                datos = datos.replace(b'formatCode="0.0"', b'formatCode="yyyy-mm-dd"')
+            nuevo.writestr(item, datos)
+    return original, salida.getvalue()
+
+def test_primera_carga_igual_a_version_original(libro_bytes):
+    procesado = procesar_con_cache(libro_bytes, CacheEtapas(), paralelo=False)
+    assert set(procesado.eventos.values()) == {"fallo"}
+    pd.testing.assert_frame_equal(procesado.resultado, procesar_referencia(libro_bytes))
+
+def test_mismo_archivo_acierta_sin_releer(libro_bytes):
+    cache = CacheEtapas()
+    primero = procesar_con_cache(libro_bytes, cache, paralelo=False)
+    segundo = procesar_con_cache(libro_bytes, cache, paralelo=False)
+    assert segundo.eventos == {ETAPA_ARCHIVO: "acierto", ETAPA_RESULTADO: "acierto"}
+    assert segundo.clave == primero.clave
+    assert segundo.resultado is primero.resultado
+
+def test_cambio_en_una_hoja_solo_relee_esa_hoja(libro_bytes, libro_otra_criticidad):
+    cache = CacheEtapas()
+    primero = procesar_con_cache(libro_bytes, cache, paralelo=False)
+    segundo = procesar_con_cache(libro_otra_criticidad, cache, paralelo=False)
+    assert segundo.clave != primero.clave
+    assert segundo.eventos == {
+        ETAPA_ARCHIVO: "fallo", ETAPA_RESULTADO: "fallo",
+        HOJA_ESCANEO: "acierto", HOJA_CVSSF: "acierto", HOJA_CRITICIDAD: "fallo",
+    }
+    pd.testing.assert_frame_equal(segundo.resultado, procesar_referencia(libro_otra_criticidad))
+
+def test_cambio_de_estilos_invalida_las_hojas(libros_con_formato):
+    original, con_fechas = libros_con_formato
+    antes, despues = huellas_hojas(original, HOJAS), huellas_hojas(con_fechas, HOJAS)
+    assert all(antes[h] != despues[h] for h in HOJAS)
+    cache = CacheEtapas()
+    procesar_con_cache(original, cache, paralelo=False)
+    procesado = procesar_con_cache(con_fechas, cache, paralelo=False)
+    assert procesado.eventos[HOJA_CVSSF] == "fallo"
+    # Con formato de fecha las celdas se leen como fechas: el resultado no es el del libro original.
+    esperado = procesar_referencia(con_fechas)
+    assert not esperado.equals(procesar_referencia(original))
+    pd.testing.assert_frame_equal(procesado.resultado, esperado)
+
+def test_nivel_en_disco_compartido_entre_instancias(tmp_path, libro_bytes):
+    pytest.importorskip("pyarrow")
+    for compacto in (False, True):
+        primero = procesar_con_cache(libro_bytes, CacheEtapas(directorio=tmp_path), paralelo=False, compacto=compacto)
+        # Otra instancia (otro proceso) con el mismo directorio: nada se recalcula.
+        otra = CacheEtapas(directorio=tmp_path)
+        segundo = procesar_con_cache(libro_bytes, otra, paralelo=False, compacto=compacto)
+        assert set(segundo.eventos.values()) == {"acierto en disco"}
+        pd.testing.assert_frame_equal(segundo.resultado, primero.resultado)
+        assert set(procesar_con_cache(libro_bytes, otra, paralelo=False, compacto=compacto).eventos.values()) == {"acierto"}
+
+def test_entradas_vencidas(monkeypatch, tmp_path):
+    pytest.importorskip("pyarrow")
+    cache = CacheEtapas(ttl=60, directorio=tmp_path)
+    cache.guardar(HOJA_ESCANEO, "h", pd.DataFrame({"a": [1, 2]}))
+    ahora = time.time()
+    monkeypatch.setattr("murc.cache.time.time", lambda: ahora + 120)
+    assert cache.consultar(HOJA_ESCANEO, "h") == (None, "fallo")
+    vencidas = cache.estadisticas().set_index("Nivel")["Vencidas"]
+    assert vencidas["memoria"] == 1 and vencidas["disco"] == 1
+
+def test_desalojo_por_tamano():
+    cache = CacheEtapas(max_mb=1)
+    grande = pd.DataFrame({"a": range(80_000)})     # ~0,6 MB: caben de a uno
+    cache.guardar(HOJA_ESCANEO, "1", grande)
+    cache.guardar(HOJA_ESCANEO, "2", grande.copy())
+    assert cache.buscar(HOJA_ESCANEO, "1") is None
+    assert cache.buscar(HOJA_ESCANEO, "2") is not None
+    assert cache.estadisticas().set_index("Nivel").loc["memoria", "Desalojos"] == 1
+    assert cache.ocupacion().set_index("Nivel").loc["memoria", "Entradas"] == 1
@@ -0,0 +1,39 @@
+"""Representación compacta: ida y vuelta contra el resultado normal y medición de memoria."""
+import numpy as np
+import pandas as pd
+import pytest
+
+from murc.compacto import ampliar_float32, compactar, es_compacto, memoria_bytes, memoria_sesion
+from murc.motor import puntuar_libro
+
+@pytest.fixture(scope="module")
+def resultado(libro):
+    return puntuar_libro(libro, paralelo=False)
+
+def test_ampliar_recupera_el_resultado(resultado):
+    compacto = compactar(resultado)
+    assert es_compacto(compacto) and not es_compacto(resultado)
+    ampliado = ampliar_float32(compacto)
+    # CVSS y CVSSF vienen con pocos decimales: vuelven exactos; riesgo conserva ~7 dígitos.
+    for col in ("CVSS", "CVSSF"):
+        np.testing.assert_array_equal(ampliado[col].to_numpy(), resultado[col].to_numpy(dtype="float64", na_value=np.nan))
+    np.testing.assert_allclose(ampliado["riesgo"].to_numpy(), resultado["riesgo"].to_numpy(dtype="float64", na_value=np.nan),
+                               rtol=1e-6)
+    for col in ("Activo", "Identificador", "Criticidad", "Nivel de Exposición"):
+        pd.testing.assert_series_equal(ampliado[col].astype("string"), resultado[col], check_names=False)
+
+def test_deduplica_igual_que_drop_duplicates(resultado):
+    repetido = pd.concat([resultado, resultado.iloc[::3]], ignore_index=True)
+    compacto = compactar(repetido)
+    assert len(compacto) == len(repetido.drop_duplicates()) == len(resultado)
+    assert len(compactar(repetido, deduplicar=False)) == len(repetido)
+
+def test_memoria_bytes(resultado):
+    compacto = compactar(resultado)
+    assert memoria_bytes(compacto) < memoria_bytes(resultado)
+    assert memoria_bytes(resultado) == resultado.memory_usage(deep=True).sum()
+    # Un objeto referenciado dos veces se cuenta una sola vez.
+    assert memoria_bytes([resultado, resultado]) < 2 * memoria_bytes(resultado)
+    tabla = memoria_sesion({"resultado": resultado, "vista": resultado, "compacto": compacto})
+    assert tabla.set_index("Objeto").loc["vista", "MB"] == 0
+    assert tabla["Objeto"].iloc[0] == "resultado"
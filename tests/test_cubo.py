@@ -0,0 +1,68 @@
+"""Cubo de agregados contra el ``groupby`` de la versión original sobre las filas filtradas."""
+import pandas as pd
+import pytest
+
+from murc.compacto import compactar
+from murc.cubo import CuboAgregado, nivel_cvss
+from murc.motor import puntuar_libro
+from murc.nucleo import ORDEN_NIVEL
+
+FILTROS = {
+    "sin filtros": ((), (), None),
+    "niveles": (["ALTO", "CRÍTICO"], (), None),
+    "criticidades": ((), ["Alto", "Crítico", "Critico"], None),
+    "activos": ((), (), ["SRV-000002", "SRV-000017", "SRV-000031", "NO-EXISTE"]),
+    "combinados": (["BAJO", "MEDIO", "SIN DATO"], ["Bajo", "Medio"], ["SRV-000002", "SRV-000005", "SRV-000040"]),
+    "sin coincidencias": (["CRÍTICO"], (), []),
+}
+
+@pytest.fixture(scope="module")
+def resultado(libro):
+    return puntuar_libro(libro, paralelo=False)
+
+def _filas(df, niveles, criticidades, activos):
+    mascara = pd.Series(True, index=df.index)
+    if niveles:
+        mascara &= df["Nivel de Exposición"].isin(niveles)
+    if criticidades:
+        mascara &= df["Criticidad"].isin(criticidades).fillna(False)
+    if activos is not None:
+        mascara &= df["Activo"].isin(activos)
+    return df[mascara]
+
+@pytest.mark.parametrize("compacto", [False, True])
+@pytest.mark.parametrize("filtro", FILTROS, ids=list(FILTROS))
+def test_cubo_igual_a_groupby(resultado, compacto, filtro):
+    cubo = CuboAgregado(compactar(resultado) if compacto else resultado)
+    celdas = cubo.filtrar(*FILTROS[filtro])
+    df = _filas(resultado, *FILTROS[filtro])
+
+    assert cubo.total(celdas) == len(df)
+    assert cubo.por_nivel(celdas) == df.groupby("Nivel de Exposición").size().to_dict()
+
+    esperado = df.groupby("Criticidad", dropna=False).size().reset_index(name="Cantidad")
+    pd.testing.assert_frame_equal(cubo.por_criticidad(celdas), esperado, check_dtype=False)
+
+    conteo = (df.assign(Nivel_CVSS=nivel_cvss(df["CVSS"]))
+                .groupby(["Nivel de Exposición", "Nivel_CVSS"]).size().reset_index(name="Cantidad"))
+    conteo["Diferencia"] = conteo["Nivel de Exposición"].map(ORDEN_NIVEL) - conteo["Nivel_CVSS"].map(ORDEN_NIVEL)
+    obtenido = cubo.por_nivel_cvss(celdas).sort_values(["Nivel de Exposición", "Nivel_CVSS"], ignore_index=True)
+    pd.testing.assert_frame_equal(obtenido, conteo, check_dtype=False)
+
+    agrup = (
+        df.groupby("Activo", dropna=False)
+        .agg(
+            prom_riesgo=("riesgo", "mean"),
+            suma_cvssf=("CVSSF", "sum"),
+            suma_cvss=("CVSS", "sum"),
+            count_vuln=("Identificador", "size"),
+            nivel=("Nivel de Exposición", "first"),
+            critic=("Criticidad", "first"),
+        )
+        .reset_index()
+    )
+    obtenido = cubo.por_activo(celdas)
+    # Las sumas en float32 del resultado compacto solo coinciden hasta su precisión.
+    pd.testing.assert_frame_equal(obtenido.astype({"Activo": "string", "nivel": "string", "critic": "string"}),
+                                  agrup.astype({c: "float64" for c in ("prom_riesgo", "suma_cvssf", "suma_cvss")}),
+                                  check_dtype=False, rtol=1e-5 if compacto else 1e-9)
@@ -0,0 +1,57 @@
+"""Cruce por hash de ``comparar`` contra un ``merge`` completo de pandas."""
+import numpy as np
+import pandas as pd
+import pytest
+
+from murc.compacto import compactar
+from murc.diferencias import NUEVA, PERSISTENTE, REMEDIADA, SIN_REGISTRO, comparar
+from murc.motor import puntuar_libro
+from murc.sintetico import generar_libro
+
+CLAVE = ["Activo", "Identificador"]
+
+def _por_merge(anterior: pd.DataFrame, actual: pd.DataFrame) -> pd.DataFrame:
+    def unica(df):
+        return df.sort_values("riesgo", ascending=False, kind="stable").drop_duplicates(CLAVE)
+    unido = unica(anterior).merge(unica(actual), on=CLAVE, how="outer", suffixes=("_ant", "_act"), indicator=True)
+    return pd.DataFrame({
+        "Activo": unido["Activo"].astype("string"),
+        "Identificador": unido["Identificador"].astype("string"),
+        "Estado": unido["_merge"].map({"both": PERSISTENTE, "right_only": NUEVA, "left_only": REMEDIADA}).astype(str),
+        "Nivel_anterior": unido["Nivel de Exposición_ant"].astype(object).fillna(SIN_REGISTRO).astype(str),
+        "Nivel_actual": unido["Nivel de Exposición_act"].astype(object).fillna(SIN_REGISTRO).astype(str),
+        "riesgo_anterior": unido["riesgo_ant"].astype("float64"),
+        "riesgo_actual": unido["riesgo_act"].astype("float64"),
+    })
+
+def _ordenado(df: pd.DataFrame) -> pd.DataFrame:
+    df = df[["Activo", "Identificador", "Estado", "Nivel_anterior", "Nivel_actual", "riesgo_anterior", "riesgo_actual"]]
+    df = df.astype({"Activo": "string", "Identificador": "string", "Estado": str,
+                    "Nivel_anterior": str, "Nivel_actual": str})
+    return df.sort_values(CLAVE, kind="stable").reset_index(drop=True)
+
+@pytest.fixture(scope="module")
+def escaneos(tmp_path_factory, libro):
+    # Mismo universo de activos y CVE con otra semilla: hay nuevas, remediadas y persistentes.
+    otro = tmp_path_factory.mktemp("libros") / "siguiente.xlsx"
+    generar_libro(otro, 3000, semilla=8)
+    return puntuar_libro(libro, paralelo=False), puntuar_libro(otro, paralelo=False)
+
+@pytest.mark.parametrize("compacto", [False, True])
+def test_comparar_igual_a_merge(escaneos, compacto):
+    anterior, actual = escaneos
+    # Resultados compactos: cada uno con sus propias categorías.
+    detalle = comparar(*(map(compactar, escaneos) if compacto else escaneos)).detalle
+    esperado = _por_merge(anterior, actual)
+    assert {NUEVA, REMEDIADA, PERSISTENTE} <= set(detalle["Estado"])
+    pd.testing.assert_frame_equal(_ordenado(detalle), _ordenado(esperado))
+
+def test_claves_repetidas_toman_la_de_mayor_riesgo():
+    base = {"Activo": ["A", "A", "B"], "Identificador": ["CVE-1", "CVE-1", "CVE-2"],
+            "riesgo": [0.2, 0.9, 0.5], "Nivel de Exposición": ["BAJO", "CRÍTICO", "MEDIO"]}
+    anterior = pd.DataFrame(base)
+    actual = pd.DataFrame({**base, "riesgo": [0.6, np.nan, 0.1], "Nivel de Exposición": ["ALTO", "SIN DATO", "BAJO"]})
+    detalle = comparar(anterior, actual).detalle.set_index("Identificador")
+    assert detalle.loc["CVE-1", ["riesgo_anterior", "riesgo_actual"]].tolist() == [0.9, 0.6]
+    assert detalle.loc["CVE-1", "Cambio_nivel"] == -1
+    assert (detalle["Estado"] == PERSISTENTE).all()
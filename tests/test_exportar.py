@@ -0,0 +1,53 @@
+"""Escritores en flujo contra ``to_excel``/``to_csv``/``to_parquet`` del DataFrame completo."""
+import pandas as pd
+import pytest
+
+from murc.compacto import ampliar_float32, compactar
+from murc.exportar import CacheExportaciones, escribir_xlsx, exportar
+from murc.motor import puntuar_libro
+from murc.tabla import con_justificacion
+
+@pytest.fixture(scope="module")
+def resultado(libro):
+    return puntuar_libro(libro, paralelo=False)
+
+@pytest.mark.parametrize("compacto", [False, True])
+@pytest.mark.parametrize("tam_bloque", [1000, 100_000])
+def test_xlsx_igual_a_to_excel(tmp_path, resultado, compacto, tam_bloque):
+    df = compactar(resultado) if compacto else resultado
+    assert exportar(df, tmp_path / "flujo.xlsx", "xlsx", tam_bloque=tam_bloque) == len(df)
+    # to_excel escribiría el float32 ampliado en binario (7.800000190734863): se compara con el decimal corto.
+    con_justificacion(ampliar_float32(df)).to_excel(tmp_path / "completo.xlsx", sheet_name="Resultado", index=False)
+    pd.testing.assert_frame_equal(pd.read_excel(tmp_path / "flujo.xlsx"), pd.read_excel(tmp_path / "completo.xlsx"))
+
+@pytest.mark.parametrize("compacto", [False, True])
+def test_csv_igual_a_to_csv(tmp_path, resultado, compacto):
+    df = compactar(resultado) if compacto else resultado
+    assert exportar(df, tmp_path / "flujo.csv", "csv", tam_bloque=333) == len(df)
+    con_justificacion(df).to_csv(tmp_path / "completo.csv", index=False, encoding="utf-8-sig")
+    assert (tmp_path / "flujo.csv").read_bytes() == (tmp_path / "completo.csv").read_bytes()
+
+def test_parquet_igual_al_resultado(tmp_path, resultado):
+    pytest.importorskip("pyarrow")
+    exportar(resultado, tmp_path / "flujo.parquet", "parquet", tam_bloque=500)
+    pd.testing.assert_frame_equal(pd.read_parquet(tmp_path / "flujo.parquet"), con_justificacion(resultado))
+
+def test_xlsx_reparte_en_hojas(tmp_path, resultado):
+    df = resultado.head(25)
+    escribir_xlsx([df.iloc[:10], df.iloc[10:]], tmp_path / "hojas.xlsx", filas_por_hoja=10)
+    hojas = pd.read_excel(tmp_path / "hojas.xlsx", sheet_name=None)
+    assert list(hojas) == ["Resultado", "Resultado_2", "Resultado_3"]
+    assert [len(h) for h in hojas.values()] == [9, 9, 7]
+    df.to_excel(tmp_path / "completo.xlsx", index=False)
+    pd.testing.assert_frame_equal(pd.concat(hojas.values(), ignore_index=True), pd.read_excel(tmp_path / "completo.xlsx"))
+
+def test_vacio_solo_encabezados(tmp_path, resultado):
+    exportar(resultado.iloc[:0], tmp_path / "vacio.xlsx", "xlsx")
+    assert list(pd.read_excel(tmp_path / "vacio.xlsx").columns) == list(resultado.columns) + ["Justificación"]
+
+def test_cache_reutiliza_y_expulsa(tmp_path, resultado):
+    cache = CacheExportaciones(tmp_path, max_entradas=1)
+    ruta = cache.generar("a", resultado.head(10), "csv")
+    assert cache.generar("a", resultado.head(99), "csv") == ruta
+    cache.generar("b", resultado.head(10), "csv")
+    assert cache.ruta("a") is None and cache.ruta("b") is not None
@@ -0,0 +1,50 @@
+"""Índice de filtros contra el filtrado original de la interfaz (``isin`` y ``str.contains``)."""
+import pandas as pd
+import pytest
+
+from murc.compacto import compactar
+from murc.filtros import IndiceFiltros
+from murc.motor import puntuar_libro
+from murc.nucleo import NIVELES, NIVEL_SIN_DATO
+
+@pytest.fixture(scope="module", params=[False, True], ids=["completo", "compacto"])
+def resultado(request, libro):
+    df = puntuar_libro(libro, paralelo=False)
+    return compactar(df) if request.param else df
+
+def _como_antes(df, niveles, criticidades, activo):
+    if niveles:      df = df[df["Nivel de Exposición"].isin(niveles)]
+    if criticidades: df = df[df["Criticidad"].isin(criticidades)]
+    if activo:       df = df[df["Activo"].str.contains(activo, na=False)]
+    return df
+
+CASOS = {
+    "sin_filtro": ((), (), ""),
+    "todos_los_niveles": (NIVELES + [NIVEL_SIN_DATO], (), ""),
+    "niveles_y_criticidad": (["ALTO", "CRÍTICO"], ["Alto", "Crítico"], ""),
+    "activo_literal": ((), (), "SRV-00002"),
+    "activo_corto": ((), (), "7"),
+    "activo_regex": ((), (), r"SRV-00001[1-3]$"),
+    "activo_regex_ancla": (["MEDIO"], (), "^SRV-00001"),
+    "sin_coincidencias": ((), (), "NO-EXISTE"),
+    "todo_combinado": (["BAJO", "MEDIO"], ["Bajo", "Medio", "Alto"], "SRV-000"),
+}
+
+@pytest.mark.parametrize("niveles, criticidades, activo", CASOS.values(), ids=CASOS.keys())
+def test_igual_al_filtrado_original(resultado, niveles, criticidades, activo):
+    indice = IndiceFiltros(resultado)
+    filtrado = IndiceFiltros.aplicar(resultado, indice.filtrar(niveles, criticidades, activo))
+    pd.testing.assert_frame_equal(filtrado, _como_antes(resultado, niveles, criticidades, activo))
+
+def test_sin_filtro_no_copia(resultado):
+    indice = IndiceFiltros(resultado)
+    assert indice.filtrar() is None
+    assert IndiceFiltros.aplicar(resultado, indice.filtrar()) is resultado
+
+def test_todas_las_criticidades_con_nulos(resultado):
+    # Las criticidades vacías no están en ninguna selección: elegir todas sí filtra.
+    indice = IndiceFiltros(resultado)
+    filas = indice.filtrar(criticidades=indice.criticidades)
+    assert resultado["Criticidad"].isna().any() and filas is not None
+    pd.testing.assert_frame_equal(IndiceFiltros.aplicar(resultado, filas),
+                                  _como_antes(resultado, (), indice.criticidades, ""))
@@ -0,0 +1,49 @@
+"""Agregación en bins de la dispersión y recuperación de las filas de cada celda."""
+import numpy as np
+import pandas as pd
+import pytest
+
+from murc.graficos import agrupar_en_bins, dispersion, filas_del_bin, modo_dispersion
+
+@pytest.fixture(scope="module")
+def puntos():
+    rng = np.random.default_rng(5)
+    n = 5000
+    df = pd.DataFrame({
+        "x": rng.gamma(2.0, 3.0, n),
+        "y": pd.array(rng.normal(50, 20, n), dtype="Float64"),
+        "nivel": pd.array(rng.choice(["BAJO", "MEDIO", "ALTO", None], n), dtype="string"),
+    })
+    df.loc[::97, "x"] = np.nan
+    df.loc[::89, "y"] = pd.NA
+    return df
+
+def test_modo_segun_volumen():
+    assert [modo_dispersion(n, 10, 100) for n in (10, 11, 100, 101)] == ["svg", "webgl", "webgl", "bins"]
+
+@pytest.mark.parametrize("rango", [None, ((0, 20), (0, 100))], ids=["datos", "fijo"])
+def test_filas_del_bin_son_los_puntos_de_la_celda(puntos, rango):
+    rango_x, rango_y = rango or (None, None)
+    agregado, (bx, by) = agrupar_en_bins(puntos, "x", "y", "nivel", n_bins=12, rango_x=rango_x, rango_y=rango_y)
+    validos = puntos["x"].notna() & puntos["y"].notna()
+    assert agregado["Cantidad"].sum() == validos.sum()
+    vistas = []
+    for celda in agregado.itertuples(index=False):
+        filas = filas_del_bin(puntos, "x", "y", "nivel", (bx, by), celda._0, celda._1, celda.nivel)
+        assert len(filas) == celda.Cantidad
+        x, y = filas["x"].to_numpy(), filas["y"].to_numpy(dtype="float64")
+        # Dentro de los bordes de la celda; fuera del rango fijo, en la celda del extremo.
+        assert ((x >= bx[celda._0]) | (celda._0 == 0)).all() and ((x < bx[celda._0 + 1]) | (celda._0 == 11)).all()
+        assert ((y >= by[celda._1]) | (celda._1 == 0)).all() and ((y < by[celda._1 + 1]) | (celda._1 == 11)).all()
+        assert (filas["nivel"].isna().all() if pd.isna(celda.nivel) else (filas["nivel"] == celda.nivel).all())
+        vistas.append(filas.index.to_numpy())
+    # Cada punto válido aparece en exactamente una celda.
+    vistas = np.concatenate(vistas)
+    assert len(vistas) == len(np.unique(vistas))
+    assert set(vistas) == set(puntos.index[validos])
+
+def test_dispersion_en_bins(puntos):
+    puntos = puntos.fillna({"nivel": "SIN DATO"})
+    disp = dispersion(puntos, "x", "y", "nivel", n_bins=12, limite_webgl=10, limite_bins=100)
+    assert disp.modo == "bins" and len(disp.bins) > 0
+    assert dispersion(puntos.head(50), "x", "y", "nivel", limite_webgl=10, limite_bins=100).modo == "webgl"
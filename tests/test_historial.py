@@ -0,0 +1,49 @@
+"""Histórico: perfil de cada corrida, tendencias por perfil y migración de históricos anteriores."""
+import sqlite3
+
+import pandas as pd
+import pytest
+
+from murc.historial import HistorialMURC
+from murc.motor import puntuar_libro
+from murc.nucleo import PERFIL_MURC
+from murc.perfiles import PERFILES_EJEMPLO, repuntuar
+
+AMENAZA = PERFILES_EJEMPLO[1]
+
+@pytest.fixture(scope="module")
+def resultado(libro):
+    return puntuar_libro(libro, paralelo=False)
+
+def test_tendencia_solo_del_perfil(tmp_path, resultado):
+    h = HistorialMURC(tmp_path / "h.db")
+    id_murc = h.registrar(resultado, "2026-09-01")
+    id_amenaza = h.registrar(repuntuar(resultado, AMENAZA), "2026-09-01", perfil=AMENAZA.nombre)
+    assert (h.perfil(id_murc), h.perfil(id_amenaza)) == (PERFIL_MURC.nombre, AMENAZA.nombre)
+    esperado = resultado["Nivel de Exposición"].value_counts()
+    assert h.tendencia_niveles().iloc[0][esperado.index].tolist() == esperado.tolist()
+    esperado = repuntuar(resultado, AMENAZA)["Nivel de Exposición"].value_counts()
+    assert h.tendencia_niveles(AMENAZA.nombre).iloc[0][esperado.index].tolist() == esperado.tolist()
+
+def test_corrida_de_otro_perfil_se_repuntua(tmp_path, resultado):
+    h = HistorialMURC(tmp_path / "h.db")
+    corrida = h.registrar(repuntuar(resultado, AMENAZA), "2026-09-01", perfil=AMENAZA.nombre)
+    guardado = h.hallazgos(corrida)
+    # Tal cual está guardado tiene los niveles de Amenaza; repuntuado desde None vuelve a MURC.
+    assert not guardado["Nivel de Exposición"].equals(resultado["Nivel de Exposición"])
+    recalculado = repuntuar(guardado, PERFIL_MURC, desde=None)
+    pd.testing.assert_series_equal(recalculado["Nivel de Exposición"], resultado["Nivel de Exposición"],
+                                   check_dtype=False)
+
+def test_migra_historico_sin_perfil(tmp_path, resultado):
+    ruta = tmp_path / "viejo.db"
+    con = sqlite3.connect(ruta)
+    con.executescript("""
+        CREATE TABLE corridas (id INTEGER PRIMARY KEY AUTOINCREMENT, fecha_escaneo TEXT NOT NULL,
+                               fecha_carga TEXT NOT NULL, origen TEXT, clave TEXT, filas INTEGER NOT NULL DEFAULT 0);
+        INSERT INTO corridas (fecha_escaneo, fecha_carga) VALUES ('2026-08-01', '2026-08-01T00:00:00');
+    """)
+    con.close()
+    h = HistorialMURC(ruta)
+    assert h.perfil(1) == PERFIL_MURC.nombre
+    assert h.perfil(h.registrar(resultado.head(10), "2026-09-01", perfil=AMENAZA.nombre)) == AMENAZA.nombre
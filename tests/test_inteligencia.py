@@ -0,0 +1,80 @@
+"""Índice de inteligencia: compilación incremental contra completa y enriquecimiento de la hoja CVSSF."""
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from murc.inteligencia import IndiceInteligencia, compilar, cvssf_por_amenaza, enriquecer_cvssf
+
+CVES = [f"CVE-2024-{n:05d}" for n in range(1, 301)]
+
+def _nvd(ruta, cves, rng):
+    ruta.write_text(json.dumps({"vulnerabilities": [
+        {"cve": {"id": c, "metrics": {"cvssMetricV31": [{"type": "Primary", "cvssData": {"baseScore": float(p)}}]}}}
+        for c, p in zip(cves, rng.integers(10, 100, len(cves)) / 10)
+    ]}))
+    return ruta
+
+def _epss(ruta, cves, rng):
+    pd.DataFrame({"cve": cves, "epss": rng.random(len(cves)), "percentile": rng.random(len(cves))}).to_csv(ruta, index=False)
+    return ruta
+
+def _kev(ruta, cves):
+    ruta.write_text(json.dumps({"vulnerabilities": [{"cveID": c} for c in cves]}))
+    return ruta
+
+@pytest.fixture(scope="module")
+def fuentes(tmp_path_factory):
+    carpeta = tmp_path_factory.mktemp("feeds")
+    rng = np.random.default_rng(11)
+    return {
+        # El segundo feed NVD repite CVE del primero con otro puntaje: gana el último.
+        "nvd": [_nvd(carpeta / "nvd-1.json", CVES[:150], rng), _nvd(carpeta / "nvd-2.json", CVES[100:250], rng)],
+        "epss": [_epss(carpeta / "epss.csv", CVES[50:], rng)],
+        "kev": [_kev(carpeta / "kev.json", CVES[::17])],
+    }
+
+@pytest.fixture(scope="module")
+def hoja_cvssf():
+    """Hoja CVSSF normalizada con huecos; CVSSF entero (Int64), como lo infiere la lectura."""
+    ids = CVES[::3] + ["CVE-1999-00001", "NO-ES-CVE"]
+    n = len(ids)
+    return pd.DataFrame({
+        "Identificador": pd.array(ids, dtype="string"),
+        "CVSS": pd.array([None if i % 2 else 5.5 for i in range(n)], dtype="Float64"),
+        "CVSSF": pd.array([None if i % 3 else 64 for i in range(n)], dtype="Int64"),
+    })
+
+def test_compilacion_incremental_igual_a_completa(tmp_path, fuentes, hoja_cvssf):
+    completo = tmp_path / "completo.murc"
+    compilar(completo, **fuentes)
+    incremental = tmp_path / "incremental.murc"
+    compilar(incremental, nvd=fuentes["nvd"][:1])
+    compilar(incremental, nvd=fuentes["nvd"], epss=fuentes["epss"])
+    informe = compilar(incremental, **fuentes)
+    assert [tipo for tipo, _, _ in informe.leidos] == ["kev"]
+    assert len(informe.sin_cambios) == 3
+
+    a, b = IndiceInteligencia(completo), IndiceInteligencia(incremental)
+    assert a.version == b.version
+    pd.testing.assert_frame_equal(a.buscar(CVES), b.buscar(CVES))
+    esperado = enriquecer_cvssf(hoja_cvssf, a, ["CVE-2024-00002", "CVE-2024-00299"])
+    pd.testing.assert_frame_equal(enriquecer_cvssf(hoja_cvssf, b, ["CVE-2024-00002", "CVE-2024-00299"]), esperado)
+
+def test_enriquecer_solo_completa_celdas_vacias(tmp_path, fuentes, hoja_cvssf):
+    ruta = tmp_path / "indice.murc"
+    compilar(ruta, **fuentes)
+    indice = IndiceInteligencia(ruta)
+    enriquecido = enriquecer_cvssf(hoja_cvssf, indice)
+    assert hoja_cvssf["CVSSF"].dtype == "Int64"       # la entrada no se modifica
+    datos = indice.buscar(hoja_cvssf["Identificador"].to_numpy(dtype=object))
+    cvss = hoja_cvssf["CVSS"].to_numpy(dtype="float64", na_value=np.nan)
+    cvss = np.where(np.isnan(cvss), datos["CVSS"].to_numpy(), cvss)
+    cvssf = hoja_cvssf["CVSSF"].to_numpy(dtype="float64", na_value=np.nan)
+    cvssf = np.where(np.isnan(cvssf), cvssf_por_amenaza(cvss, datos["EPSS"], datos["KEV"]), cvssf)
+    np.testing.assert_array_equal(enriquecido["CVSS"].to_numpy(dtype="float64", na_value=np.nan), cvss)
+    np.testing.assert_array_equal(enriquecido["CVSSF"].to_numpy(dtype="float64", na_value=np.nan), cvssf)
+    # Con decimales del índice: la columna entera pasa a Float64.
+    assert (cvssf[~np.isnan(cvssf)] % 1 != 0).any()
+    assert enriquecido["CVSSF"].dtype == "Float64"
@@ -0,0 +1,25 @@
+"""Lote de libros en paralelo contra puntuar cada libro por separado."""
+import pandas as pd
+
+from murc.lotes import nombres_unicos, puntuar_lote
+from murc.motor import puntuar_libro
+from murc.sintetico import generar_libro
+
+def test_lote_igual_a_libros_por_separado(tmp_path, libro):
+    otro = tmp_path / "sintetico.xlsx"            # mismo nombre que ``libro``, otro directorio
+    generar_libro(otro, 500, semilla=3)
+    roto = tmp_path / "roto.xlsx"
+    roto.write_bytes(b"no es un libro")
+    avances = []
+    lote = puntuar_lote([libro, roto, otro], max_procesos=2, al_avanzar=lambda h, t, info: avances.append((h, t)))
+
+    assert [a.origen for a in lote.archivos] == ["sintetico.xlsx", "roto.xlsx", "sintetico.xlsx (2)"]
+    assert [a.origen for a in lote.errores] == ["roto.xlsx"]
+    assert sorted(avances) == [(1, 3), (2, 3), (3, 3)]
+    partes = [puntuar_libro(libro, paralelo=False).assign(Origen="sintetico.xlsx"),
+              puntuar_libro(otro, paralelo=False).assign(Origen="sintetico.xlsx (2)")]
+    pd.testing.assert_frame_equal(lote.resultado, pd.concat(partes, ignore_index=True)[lote.resultado.columns])
+    assert lote.informe()["Filas"].tolist() == [len(partes[0]), 0, len(partes[1])]
+
+def test_nombres_unicos():
+    assert nombres_unicos(["a", "b", "a", "a"]) == ["a", "b", "a (2)", "a (3)"]
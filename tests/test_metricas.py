@@ -0,0 +1,60 @@
+"""Mediciones por etapa: registro activo, pico de memoria, solapamiento y exportación."""
+import json
+
+import numpy as np
+import pytest
+
+from murc.metricas import Metricas, activo, medir, registrando
+from murc.motor import puntuar_libro
+
+def test_medir_sin_registro_no_hace_nada():
+    assert activo() is None
+    with medir("suelta", filas_entrada=3) as m:
+        m.filas_salida = 1
+    assert m.etapa == "suelta" and m.segundos == 0.0
+
+def test_etapas_del_motor(libro):
+    metricas = Metricas("prueba", memoria="0")
+    with registrando(metricas):
+        resultado = puntuar_libro(libro, paralelo=False)
+    assert activo() is None
+    tabla = metricas.tabla()
+    assert len(tabla) > 0 and (tabla["Segundos"] >= 0).all()
+    assert tabla["Pico MB"].isna().all()
+    assert len(resultado) in set(tabla["Filas salida"].dropna())
+
+def test_pico_tracemalloc_anidado():
+    metricas = Metricas(memoria="tracemalloc")
+    with metricas.etapa("externa"):
+        with metricas.etapa("interna"):
+            bloque = np.ones(2**21)        # 16 MB
+            del bloque
+    interna, externa = metricas.mediciones
+    assert interna.pico_mb >= 15
+    assert externa.pico_mb >= interna.pico_mb
+
+def test_etapas_solapadas_sin_pico():
+    una, otra = Metricas(memoria="tracemalloc"), Metricas(memoria="tracemalloc")
+    with una.etapa("a"):
+        with otra.etapa("b"):
+            pass
+    assert una.mediciones[0].pico_mb is None and otra.mediciones[0].pico_mb is None
+    with una.etapa("c"):
+        pass
+    assert una.mediciones[-1].pico_mb is not None
+
+@pytest.mark.parametrize("extension", ["jsonl", "prom"])
+def test_escribir(tmp_path, extension):
+    metricas = Metricas("carga", memoria="0")
+    with metricas.etapa("lectura", filas_entrada=10) as m:
+        m.filas_salida = 7
+    ruta = tmp_path / f"metricas.{extension}"
+    metricas.escribir(ruta)
+    metricas.escribir(ruta)
+    texto = ruta.read_text(encoding="utf-8")
+    if extension == "jsonl":
+        filas = [json.loads(linea) for linea in texto.splitlines()]
+        assert len(filas) == 2 and filas[0]["corrida"] == "carga" and filas[0]["filas_salida"] == 7
+    else:
+        assert 'murc_etapa_filas_salida{etapa="lectura"} 7' in texto
+        assert 'murc_etapa_ejecuciones_total{etapa="lectura"}' in texto
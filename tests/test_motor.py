@@ -0,0 +1,94 @@
+"""Lectura en flujo y motor de puntuación contra la versión original (``pd.read_excel``)."""
+import pandas as pd
+import pytest
+from openpyxl import Workbook
+
+from murc.lectura import iterar_bloques, leer_hoja
+from murc.motor import puntuar_libro, puntuar_por_bloques
+from murc.nucleo import (
+    COLUMNAS_INFERIDAS, HOJA_CRITICIDAD, HOJA_CVSSF, HOJA_ESCANEO,
+    normalizar_criticidad, normalizar_cvssf, normalizar_escaneo, resolver_columnas_criticidad, resolver_columnas_cvssf, resolver_columnas_escaneo,
+)
+from referencia import leer_hojas_referencia, procesar_referencia
+
+HOJAS = [
+    (0, HOJA_ESCANEO, resolver_columnas_escaneo, normalizar_escaneo),
+    (1, HOJA_CVSSF, resolver_columnas_cvssf, normalizar_cvssf),
+    (2, HOJA_CRITICIDAD, resolver_columnas_criticidad, normalizar_criticidad),
+]
+
+@pytest.fixture(scope="module")
+def libro_irregular(tmp_path_factory):
+    """Filas vacías intermedias y finales, números en columnas de texto, celdas en blanco."""
+    wb = Workbook()
+    ws = wb.active
+    ws.title = HOJA_ESCANEO
+    for fila in [["Hostname", "CVE_ID", "Puerto"], [" srv-01 ", "cve-2024-0001", 22], [None, None, None],
+                 [1001, "CVE-2024-0002", 443], ["SRV-02", 20240003, None], ["SRV-03", None, 80],
+                 [None, None, None], [None, None, None]]:
+        ws.append(fila)
+    ws = wb.create_sheet(HOJA_CVSSF)
+    for fila in [["ID", "CVSS_Base", "Threat_Score"], ["CVE-2024-0001", 9.8, 4096], ["CVE-2024-0002", "7,5", "512"],
+                 [None, None, None], ["20240003", "s/d", 8.0], ["CVE-2024-0004", 5, None]]:
+        ws.append(fila)
+    ws = wb.create_sheet(HOJA_CRITICIDAD)
+    for fila in [["Asset", "Criticality"], ["SRV-01", " crítico "], ["1001", "ALTO"], ["SRV-02", None],
+                 ["SRV-03", "desconocida"], [None, None]]:
+        ws.append(fila)
+    ruta = tmp_path_factory.mktemp("libros") / "irregular.xlsx"
+    wb.save(ruta)
+    return ruta
+
+@pytest.mark.parametrize("posicion, hoja, resolver, normalizar", HOJAS, ids=[h[1] for h in HOJAS])
+@pytest.mark.parametrize("nombre_libro", ["libro", "libro_irregular"])
+def test_leer_hoja_igual_a_read_excel(request, nombre_libro, posicion, hoja, resolver, normalizar):
+    ruta = request.getfixturevalue(nombre_libro)
+    esperado = leer_hojas_referencia(ruta.read_bytes())[posicion]
+    leido = normalizar(leer_hoja(ruta, hoja, resolver, COLUMNAS_INFERIDAS.get(hoja, ())))
+    # usecols de la versión original conserva el orden de la hoja; las uniones no dependen de él.
+    pd.testing.assert_frame_equal(leido, esperado[leido.columns])
+
+@pytest.mark.parametrize("tam_bloque", [1, 7, 1000])
+def test_bloques_concatenados_igual_a_hoja_completa(libro, tam_bloque):
+    bloques = list(iterar_bloques(libro, HOJA_ESCANEO, resolver_columnas_escaneo, tam_bloque))
+    assert all(len(b) <= tam_bloque for b in bloques)
+    pd.testing.assert_frame_equal(pd.concat(bloques, ignore_index=True),
+                                  leer_hoja(libro, HOJA_ESCANEO, resolver_columnas_escaneo))
+
+@pytest.fixture(scope="module")
+def libro_con_huecos(tmp_path_factory):
+    """Tramos de filas vacías más largos que el bloque, entre datos y al final."""
+    wb = Workbook()
+    ws = wb.active
+    ws.title = HOJA_ESCANEO
+    ws.append(["Activo", "Identificador"])
+    for i, huecos in enumerate([0, 3, 12, 1, 25, 0, 7]):
+        for _ in range(huecos):
+            ws.append([None, None])
+        ws.append([f"SRV-{i}", f"CVE-2024-{i:04d}"])
+    for _ in range(9):
+        ws.append([None, None])
+    ruta = tmp_path_factory.mktemp("libros") / "huecos.xlsx"
+    wb.save(ruta)
+    return ruta
+
+@pytest.mark.parametrize("tam_bloque", [1, 4, 10, 100])
+def test_bloques_con_tramos_vacios_no_pasan_del_tamano(libro_con_huecos, tam_bloque):
+    bloques = list(iterar_bloques(libro_con_huecos, HOJA_ESCANEO, resolver_columnas_escaneo, tam_bloque))
+    assert all(len(b) <= tam_bloque for b in bloques)
+    concatenado = pd.concat(bloques, ignore_index=True)
+    assert len(concatenado) == len(pd.read_excel(libro_con_huecos, sheet_name=HOJA_ESCANEO)) == 55
+    pd.testing.assert_frame_equal(concatenado, leer_hoja(libro_con_huecos, HOJA_ESCANEO, resolver_columnas_escaneo))
+
+@pytest.mark.parametrize("nombre_libro", ["libro", "libro_irregular"])
+def test_puntuar_libro_igual_a_version_original(request, nombre_libro):
+    ruta = request.getfixturevalue(nombre_libro)
+    datos = ruta.read_bytes()
+    esperado = procesar_referencia(datos)
+    pd.testing.assert_frame_equal(puntuar_libro(ruta, paralelo=False), esperado)
+    pd.testing.assert_frame_equal(puntuar_libro(datos, paralelo=False), esperado)
+
+@pytest.mark.parametrize("tam_bloque", [1, 333])
+def test_puntuar_por_bloques_igual_a_version_original(libro, libro_bytes, tam_bloque):
+    partes = [df for _, df in puntuar_por_bloques(libro, tam_bloque=tam_bloque)]
+    pd.testing.assert_frame_equal(pd.concat(partes, ignore_index=True), procesar_referencia(libro_bytes))
@@ -0,0 +1,44 @@
+"""Perfiles: repuntuar y sensibilidad dan los mismos niveles con resultados completos y compactos."""
+import pandas as pd
+import pytest
+
+from murc.compacto import ampliar_float32, compactar
+from murc.motor import puntuar_libro
+from murc.nucleo import PerfilPuntuacion, calcular_riesgo
+from murc.perfiles import PERFILES_EJEMPLO, Sensibilidad, repuntuar
+
+# Solo CVSS, con umbrales justo en valores que float32 no representa exactamente.
+PERFIL_UMBRAL = PerfilPuntuacion("Umbral", 1.0, 0.0, 0.0, umbrales=(0.25, 0.73, 0.9))
+
+@pytest.fixture(scope="module")
+def resultado(libro):
+    return puntuar_libro(libro, paralelo=False)
+
+@pytest.fixture
+def en_umbral():
+    df = pd.DataFrame({
+        "Activo": ["A", "B", "C", "D"], "Identificador": ["CVE-1", "CVE-2", "CVE-3", "CVE-4"],
+        "CVSS": [2.5, 7.3, 9.0, 7.4], "CVSSF": [0.0, 0.0, 0.0, 0.0], "Criticidad": ["Alto"] * 4,
+    })
+    return calcular_riesgo(df)
+
+def test_repuntuar_compacto_en_umbral(en_umbral):
+    completo = repuntuar(en_umbral, PERFIL_UMBRAL)
+    assert completo["Nivel de Exposición"].tolist() == ["BAJO", "MEDIO", "ALTO", "ALTO"]
+    compacto = repuntuar(compactar(en_umbral), PERFIL_UMBRAL)
+    pd.testing.assert_frame_equal(ampliar_float32(compacto), ampliar_float32(compactar(completo)))
+
+@pytest.mark.parametrize("perfil", PERFILES_EJEMPLO[1:] + [PERFIL_UMBRAL], ids=lambda p: p.nombre)
+def test_repuntuar_compacto_igual_a_completo(resultado, perfil):
+    completo = repuntuar(resultado, perfil)
+    compacto = repuntuar(compactar(resultado), perfil)
+    assert compacto["Nivel de Exposición"].astype(str).tolist() == completo["Nivel de Exposición"].tolist()
+
+def test_sensibilidad_igual_a_repuntuar(resultado, en_umbral):
+    perfiles = PERFILES_EJEMPLO + [PERFIL_UMBRAL]
+    for df in (resultado, en_umbral):
+        esperado = [repuntuar(df, p)["Nivel de Exposición"].value_counts() for p in perfiles]
+        for entrada in (df, compactar(df, deduplicar=False)):
+            tabla = Sensibilidad(entrada).comparar(perfiles).set_index("Perfil")
+            for perfil, conteo in zip(perfiles, esperado):
+                assert tabla.loc[perfil.nombre, conteo.index].tolist() == conteo.tolist()
@@ -0,0 +1,70 @@
+"""Rankings parciales contra ``sort_values(kind="stable")`` y ``groupby().head(k)``."""
+import numpy as np
+import pandas as pd
+import pytest
+
+import murc.ranking as ranking
+from murc.ranking import cursor_de, top_k, top_k_por_grupo
+
+@pytest.fixture(scope="module")
+def datos():
+    # Pocos valores distintos (muchos empates), faltantes y grupos de tamaños muy distintos.
+    rng = np.random.default_rng(3)
+    n = 5000
+    valor = rng.integers(0, 40, n) / 4
+    valor[rng.random(n) < 0.05] = np.nan
+    grupo = np.array([f"G{i:03d}" for i in (rng.zipf(1.5, n) % 400)], dtype=object)
+    grupo[rng.random(n) < 0.01] = None
+    return pd.DataFrame({"valor": valor, "grupo": grupo}, index=rng.permutation(n) + 10_000)
+
+def _ordenado(df, descendente):
+    return df.sort_values("valor", ascending=not descendente, kind="stable", na_position="last")
+
+@pytest.mark.parametrize("descendente", [True, False])
+@pytest.mark.parametrize("k", [0, 1, 37, 5000, 6000])
+def test_top_k_igual_a_sort_values(datos, descendente, k):
+    idx = top_k(datos["valor"], k, descendente)
+    assert datos.index[idx].tolist() == _ordenado(datos, descendente).head(k).index.tolist()
+
+@pytest.mark.parametrize("descendente", [True, False])
+@pytest.mark.parametrize("tam_pagina", [1, 13, 500])
+def test_cursor_recorre_cada_fila_una_vez(datos, descendente, tam_pagina):
+    # Posiciones = índice del resultado completo, como en la interfaz.
+    valores, posiciones = datos["valor"], datos.index.to_numpy()
+    filas, cursor = [], None
+    while True:
+        pagina = top_k(valores, tam_pagina, descendente, posiciones=posiciones, despues=cursor)
+        if not len(pagina):
+            break
+        assert len(pagina) <= tam_pagina
+        filas.extend(pagina.tolist())
+        cursor = cursor_de(valores, pagina, descendente, posiciones=posiciones)
+    assert len(filas) == len(set(filas)) == len(datos)
+    esperado = datos.assign(pos=posiciones).sort_values("pos", kind="stable")
+    assert datos.index[filas].tolist() == _ordenado(esperado, descendente).index.tolist()
+
+def _por_grupo(df, k, descendente):
+    orden = _ordenado(df, descendente)
+    cabeza = orden.groupby("grupo", sort=False, dropna=False).head(k)
+    # Grupos en el orden de su mejor fila; dentro de cada grupo, por puesto.
+    primero = {g: i for i, g in enumerate(pd.unique(cabeza["grupo"]))}
+    cabeza = cabeza.assign(_g=cabeza["grupo"].map(primero).fillna(primero.get(None, -1)))
+    cabeza = cabeza.assign(puesto=cabeza.groupby("_g").cumcount() + 1)
+    return cabeza.sort_values(["_g", "puesto"], kind="stable")
+
+@pytest.mark.parametrize("rondas", [False, True], ids=["particion", "rondas"])
+@pytest.mark.parametrize("descendente", [True, False])
+@pytest.mark.parametrize("k", [1, 3, 50])
+def test_top_k_por_grupo_igual_a_groupby_head(monkeypatch, datos, rondas, descendente, k):
+    monkeypatch.setattr(ranking, "MAX_GRUPOS_PARTICION", 0 if rondas else len(datos))
+    datos = datos.reset_index(drop=True)
+    idx, puesto = top_k_por_grupo(datos["valor"], datos["grupo"], k, descendente)
+    esperado = _por_grupo(datos, k, descendente)
+    assert idx.tolist() == esperado.index.tolist()
+    assert puesto.tolist() == esperado["puesto"].tolist()
+
+def test_top_k_por_grupo_max_grupos(datos):
+    datos = datos.reset_index(drop=True)
+    idx, _ = top_k_por_grupo(datos["valor"], datos["grupo"], 3, max_grupos=5)
+    esperado = _por_grupo(datos, 3, True)
+    assert idx.tolist() == esperado[esperado["_g"] < 5].index.tolist()
@@ -0,0 +1,38 @@
+"""Suite de rendimiento: todas las etapas corren sobre un libro chico y las líneas base se comparan."""
+import os
+
+import pandas as pd
+import pytest
+
+from murc.rendimiento import (
+    cargar_linea_base, comparar_con_base, ejecutar, etapas_disponibles, guardar_linea_base, libro_sintetico,
+)
+
+@pytest.fixture(scope="module")
+def mediciones(tmp_path_factory):
+    return ejecutar([500], repeticiones=1, memoria=False, directorio=tmp_path_factory.mktemp("rendimiento"))
+
+def test_todas_las_etapas(mediciones):
+    assert mediciones["Etapa"].tolist() == etapas_disponibles()
+    assert (mediciones["Segundos"] >= 0).all() and mediciones["Memoria_MB"].isna().all()
+    filas = mediciones.set_index("Etapa")["Filas"]
+    assert filas["procesar"] == filas["procesar_cache"] == filas["procesar_compacto"] == filas["exportar_csv"]
+
+def test_libro_se_genera_una_vez(tmp_path):
+    ruta = libro_sintetico(100, tmp_path)
+    modificado = os.stat(ruta).st_mtime_ns
+    assert libro_sintetico(100, tmp_path) == ruta and os.stat(ruta).st_mtime_ns == modificado
+
+def test_linea_base(tmp_path, mediciones):
+    ruta = tmp_path / "base.json"
+    guardar_linea_base(mediciones, "v1", ruta)
+    base = cargar_linea_base("v1", ruta)
+    pd.testing.assert_frame_equal(base, mediciones, check_dtype=False)
+    with pytest.raises(KeyError):
+        cargar_linea_base("otra", ruta)
+
+    actual = mediciones.copy()
+    lenta = actual["Segundos"].idxmax()
+    actual.loc[lenta, "Segundos"] = max(actual.loc[lenta, "Segundos"], 0.01) * 3
+    comparacion = comparar_con_base(actual, base)
+    assert comparacion.loc[comparacion["Regresión"], "Etapa"].tolist() == [actual.loc[lenta, "Etapa"]]
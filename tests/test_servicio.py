@@ -0,0 +1,64 @@
+"""Micro-lotes del servicio contra ``puntuar_hallazgos`` sobre las mismas filas."""
+import json
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from murc import servicio
+from murc.inteligencia import compilar
+from murc.motor import puntuar_libro
+from murc.nucleo import PerfilPuntuacion
+from murc.servicio import Agrupador, puntuar_hallazgos
+
+@pytest.fixture(scope="module")
+def hallazgos(libro):
+    """Hallazgos ya unidos, con un tercio de CVSS y CVSSF en blanco para completar desde el índice."""
+    df = puntuar_libro(libro, paralelo=False)[["Identificador", "Activo", "CVSS", "CVSSF", "Criticidad"]].astype(object)
+    df.loc[df.index % 3 == 0, ["CVSS", "CVSSF"]] = None
+    return df.rename(columns={"Identificador": "CVE_ID", "Activo": "Hostname"})
+
+@pytest.fixture(scope="module")
+def indice(tmp_path_factory, hallazgos):
+    carpeta = tmp_path_factory.mktemp("inteligencia")
+    cves = pd.unique(hallazgos["CVE_ID"].dropna())[::2]
+    rng = np.random.default_rng(3)
+    nvd = carpeta / "nvd.json"
+    nvd.write_text(json.dumps({"vulnerabilities": [
+        {"cve": {"id": c, "metrics": {"cvssMetricV31": [{"type": "Primary", "cvssData": {"baseScore": float(p)}}]}}}
+        for c, p in zip(cves, rng.integers(10, 100, len(cves)) / 10)
+    ]}))
+    epss = carpeta / "epss.csv"
+    pd.DataFrame({"cve": cves, "epss": rng.random(len(cves)), "percentile": rng.random(len(cves))}).to_csv(epss, index=False)
+    ruta = carpeta / "indice.murc"
+    compilar(ruta, nvd=[nvd], epss=[epss])
+    return ruta
+
+@pytest.mark.parametrize("con_indice", [False, True])
+def test_micro_lotes_igual_a_puntuar(hallazgos, indice, con_indice):
+    inteligencia = indice if con_indice else None
+    perfiles = [servicio.PERFIL_MURC, PerfilPuntuacion(nombre="Otro", peso_cvss=0.7, peso_cvssf=0.2, peso_criticidad=0.1)]
+    cortes = [0, 1, 5, 40, 41, 300, 900, len(hallazgos)]
+    agrupador = Agrupador(procesos=2, espera=0.05, inteligencia=inteligencia)
+    try:
+        futuros = [(perfil, ini, fin, agrupador.enviar(hallazgos.iloc[ini:fin], perfil))
+                   for perfil in perfiles for ini, fin in zip(cortes[:-1], cortes[1:])]
+        for perfil, ini, fin, futuro in futuros:
+            esperado = puntuar_hallazgos(hallazgos.iloc[ini:fin], perfil, inteligencia)
+            pd.testing.assert_frame_equal(futuro.result(timeout=60), esperado)
+        # Las solicitudes que llegaron juntas se puntuaron en menos micro-lotes.
+        assert agrupador.contadores["micro_lotes"] < len(futuros)
+        assert agrupador.contadores["errores"] == 0
+    finally:
+        agrupador.cerrar()
+
+def test_indice_abierto_una_vez_por_proceso(monkeypatch, indice):
+    monkeypatch.setattr(servicio, "_INDICES", {})
+    primero = servicio._indice_del_proceso(indice)
+    assert servicio._indice_del_proceso(indice) is primero
+    # Un índice recompilado (otro mtime) se vuelve a abrir.
+    mtime = os.stat(indice).st_mtime_ns
+    os.utime(indice, ns=(mtime + 10**9, mtime + 10**9))
+    assert servicio._indice_del_proceso(indice) is not primero
+    assert servicio._indice_del_proceso(None) is None
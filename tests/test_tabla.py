@@ -0,0 +1,36 @@
+"""Tabla paginada contra ordenar el resultado filtrado con ``sort_values``."""
+import numpy as np
+import pandas as pd
+import pytest
+
+from murc.compacto import compactar
+from murc.motor import puntuar_libro
+from murc.tabla import TablaPaginada, con_justificacion
+
+@pytest.fixture(scope="module")
+def resultado(libro):
+    df = puntuar_libro(libro, paralelo=False)
+    # Empates y riesgos sin dato: el orden debe ser estable y dejar los nulos al final.
+    df.loc[df.index % 7 == 0, "riesgo"] = 0.5
+    df.loc[df.index % 11 == 0, "riesgo"] = pd.NA
+    return df
+
+@pytest.mark.parametrize("compacto", [False, True])
+@pytest.mark.parametrize("tamano", [7, 50, 333])
+@pytest.mark.parametrize("seleccion", ["todas", "nivel", "vacia"])
+def test_paginas_igual_a_ordenar(resultado, compacto, tamano, seleccion):
+    df = compactar(resultado, deduplicar=False) if compacto else resultado
+    filas = {"todas": None, "nivel": np.flatnonzero((resultado["Nivel de Exposición"] == "MEDIO").to_numpy()),
+             "vacia": np.array([], dtype=np.int64)}[seleccion]
+    tabla = TablaPaginada(df)
+    ordenadas = tabla.ordenar(filas)
+    n_paginas = TablaPaginada.paginas(len(ordenadas), tamano)
+    paginas = [tabla.pagina(ordenadas, numero, tamano) for numero in range(1, n_paginas + 1)]
+    assert all(len(p) <= tamano for p in paginas)
+
+    filtrado = df if filas is None else df.iloc[filas]
+    esperado = con_justificacion(filtrado.sort_values("riesgo", ascending=False, kind="stable"))
+    pd.testing.assert_frame_equal(pd.concat(paginas), esperado)
+
+def test_cantidad_de_paginas():
+    assert [TablaPaginada.paginas(n, 50) for n in (0, 1, 50, 51, 100)] == [1, 1, 1, 2, 2]